@@ -1,5 +1,6 @@
 # api/activity_check.py
 from fastapi import APIRouter, HTTPException, Depends, Query
+import asyncio
 from datetime import datetime, date, timedelta
 from services.supabase_service import get_supabase_service
 from utils.timezone_utils import get_timezone_offset, get_user_today
@@ -36,12 +37,11 @@ async def check_activity_logged(
         # Check based on activity type
         if activity_type == 'meal':
             # Check if any meal logged today
-            response = supabase_service.client.table('meal_entries')\
+            response = await supabase_service.execute(supabase_service.client.table('meal_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
                 .gte('date', str(check_date))\
-                .lt('date', str(check_date + datetime.timedelta(days=1)))\
-                .execute()
+                .lt('date', str(check_date + datetime.timedelta(days=1))))
             
             meals = response.data if response.data else []
             is_logged = len(meals) > 0
@@ -52,12 +52,11 @@ async def check_activity_logged(
             
         elif activity_type == 'exercise':
             # Check if exercise logged today
-            response = supabase_service.client.table('exercise_logs')\
+            response = await supabase_service.execute(supabase_service.client.table('exercise_logs')\
                 .select('*')\
                 .eq('user_id', user_id)\
                 .gte('date', str(check_date))\
-                .lt('date', str(check_date + datetime.timedelta(days=1)))\
-                .execute()
+                .lt('date', str(check_date + datetime.timedelta(days=1))))
             
             exercises = response.data if response.data else []
             is_logged = len(exercises) > 0
@@ -68,11 +67,10 @@ async def check_activity_logged(
             
         elif activity_type == 'water':
             # Check if water logged today
-            response = supabase_service.client.table('daily_water')\
+            response = await supabase_service.execute(supabase_service.client.table('daily_water')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(check_date))\
-                .execute()
+                .eq('date', str(check_date)))
             
             water_entries = response.data if response.data else []
             is_logged = len(water_entries) > 0 and any(
@@ -84,11 +82,10 @@ async def check_activity_logged(
             
         elif activity_type == 'sleep':
             # Check if sleep logged for last night
-            response = supabase_service.client.table('sleep_entries')\
+            response = await supabase_service.execute(supabase_service.client.table('sleep_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(check_date))\
-                .execute()
+                .eq('date', str(check_date)))
             
             sleep_entries = response.data if response.data else []
             is_logged = len(sleep_entries) > 0
@@ -98,12 +95,11 @@ async def check_activity_logged(
             
         elif activity_type == 'supplement':
             # Check if supplements logged today
-            response = supabase_service.client.table('supplement_logs')\
+            response = await supabase_service.execute(supabase_service.client.table('supplement_logs')\
                 .select('*')\
                 .eq('user_id', user_id)\
                 .gte('date', str(check_date))\
-                .lt('date', str(check_date + datetime.timedelta(days=1)))\
-                .execute()
+                .lt('date', str(check_date + datetime.timedelta(days=1))))
             
             supplement_entries = response.data if response.data else []
             is_logged = len(supplement_entries) > 0
@@ -115,12 +111,11 @@ async def check_activity_logged(
             # Check if weight logged this week
             # Weight is logged weekly, so check last 7 days
             week_ago = check_date - datetime.timedelta(days=7)
-            response = supabase_service.client.table('weight_entries')\
+            response = await supabase_service.execute(supabase_service.client.table('weight_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
                 .gte('date', str(week_ago))\
-                .lte('date', str(check_date))\
-                .execute()
+                .lte('date', str(check_date)))
             
             weight_entries = response.data if response.data else []
             is_logged = len(weight_entries) > 0
@@ -130,11 +125,10 @@ async def check_activity_logged(
             
         elif activity_type == 'steps':
             # Check if steps logged today
-            response = supabase_service.client.table('daily_steps')\
+            response = await supabase_service.execute(supabase_service.client.table('daily_steps')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(check_date))\
-                .execute()
+                .eq('date', str(check_date)))
             
             step_entries = response.data if response.data else []
             is_logged = len(step_entries) > 0 and any(
@@ -182,20 +176,29 @@ async def get_daily_activity_summary(
         else:
             check_date = get_user_today(tz_offset)
         
-        # Check all activities
-        meals = await supabase_service.get_meals_by_date(user_id, check_date)
-        exercises = await supabase_service.get_exercise_logs(
-            user_id,
-            start_date=str(check_date),
-            end_date=str(check_date)
+        # Check all activities - the lookups are independent, so submit them together
+        (
+            meals,
+            exercises,
+            water_entry,
+            sleep_entry,
+            supplement_status,
+            weight_entries
+        ) = await asyncio.gather(
+            supabase_service.get_meals_by_date(user_id, check_date),
+            supabase_service.get_exercise_logs(
+                user_id,
+                start_date=str(check_date),
+                end_date=str(check_date)
+            ),
+            supabase_service.get_water_entry_by_date(user_id, check_date),
+            supabase_service.get_sleep_entry_by_date(user_id, check_date),
+            supabase_service.get_supplement_status_by_date(user_id, check_date),
+            supabase_service.get_weight_history(user_id, limit=100)
         )
-        water_entry = await supabase_service.get_water_entry_by_date(user_id, check_date)
-        sleep_entry = await supabase_service.get_sleep_entry_by_date(user_id, check_date)
-        supplement_status = await supabase_service.get_supplement_status_by_date(user_id, check_date)
         
         # Get weight entries from last 7 days
         week_ago = check_date - timedelta(days=7)
-        weight_entries = await supabase_service.get_weight_history(user_id, limit=100)
         recent_weight_entries = [
             e for e in weight_entries 
             if e.get('date') and datetime.fromisoformat(e['date'].replace('Z', '+00:00')).date() >= week_ago
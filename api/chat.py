@@ -39,10 +39,9 @@ async def cleanup_old_contexts(days_to_keep: int = 7):
         supabase_service = get_supabase_service()
         cutoff_date = (datetime.now().date() - timedelta(days=days_to_keep)).isoformat()
         
-        response = supabase_service.client.table('chat_contexts')\
+        response = await supabase_service.execute(supabase_service.client.table('chat_contexts')\
             .delete()\
-            .lt('date', cutoff_date)\
-            .execute()
+            .lt('date', cutoff_date))
         
         return {
             'success': True,
@@ -133,11 +132,10 @@ async def fix_today_context(user_id: str):
         today = datetime.now().date()
         
         # Delete today's corrupted context
-        supabase_service.client.table('chat_contexts')\
+        await supabase_service.execute(supabase_service.client.table('chat_contexts')\
             .delete()\
             .eq('user_id', user_id)\
-            .eq('date', str(today))\
-            .execute()
+            .eq('date', str(today)))
         
         # Force fresh generation
         context_manager = get_context_manager()
@@ -188,12 +186,11 @@ async def check_context_date(user_id: str):
         today = datetime.now().date()
         
         # Check for existing context
-        response = context_manager.supabase_service.client.table('chat_contexts')\
+        response = await context_manager.supabase_service.execute(context_manager.supabase_service.client.table('chat_contexts')\
             .select('date')\
             .eq('user_id', user_id)\
             .order('date', desc=True)\
-            .limit(1)\
-            .execute()
+            .limit(1))
         
         if response.data:
             last_context_date = datetime.strptime(response.data[0]['date'], '%Y-%m-%d').date()
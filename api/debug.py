@@ -7,6 +7,16 @@ from services.weekly_context_manager import get_weekly_context_manager
 
 router = APIRouter(prefix="/debug", tags=["debug"])
 
+@router.get("/cache-stats")
+async def cache_stats():
+    """Hit rates of the in-process caches"""
+    from services.usda_service import get_usda_service
+    return {
+        **get_supabase_service().cache_info(),
+        'weekly_context': get_weekly_context_manager().cache_info(),
+        'usda': get_usda_service().cache_info()
+    }
+
 @router.get("/check-data/{user_id}")
 async def check_data(user_id: str):
     """Check what data exists in database"""
@@ -14,23 +24,20 @@ async def check_data(user_id: str):
         supabase = get_supabase_service()
         
         # Get sample of ALL data for this user
-        meals = supabase.client.table('meal_entries')\
+        meals = await supabase.execute(supabase.client.table('meal_entries')\
             .select('meal_date, food_item, calories')\
             .eq('user_id', user_id)\
-            .limit(10)\
-            .execute()
+            .limit(10))
         
-        exercises = supabase.client.table('exercise_logs')\
+        exercises = await supabase.execute(supabase.client.table('exercise_logs')\
             .select('exercise_date, exercise_name, duration_minutes')\
             .eq('user_id', user_id)\
-            .limit(10)\
-            .execute()
+            .limit(10))
         
-        sleep = supabase.client.table('sleep_entries')\
+        sleep = await supabase.execute(supabase.client.table('sleep_entries')\
             .select('date, total_hours')\
             .eq('user_id', user_id)\
-            .limit(10)\
-            .execute()
+            .limit(10))
         
         return {
             'meals': meals.data,
@@ -46,11 +53,10 @@ async def list_cached_weeks(user_id: str):
     try:
         supabase = get_supabase_service()
         
-        response = supabase.client.table('weekly_contexts')\
+        response = await supabase.execute(supabase.client.table('weekly_contexts')\
             .select('week_start_date, week_end_date, week_number, year, created_at')\
             .eq('user_id', user_id)\
-            .order('week_start_date', desc=True)\
-            .execute()
+            .order('week_start_date', desc=True))
         
         weeks = response.data or []
         
@@ -72,10 +78,10 @@ async def clear_weekly_cache(user_id: str):
         print(f"🗑️ Clearing ALL weekly context cache for user: {user_id}")
         
         # Delete all weekly contexts (no date filter = delete everything)
-        response = supabase.client.table('weekly_contexts')\
+        response = await supabase.execute(supabase.client.table('weekly_contexts')\
             .delete()\
-            .eq('user_id', user_id)\
-            .execute()
+            .eq('user_id', user_id))
+        get_weekly_context_manager().invalidate(user_id)
         
         deleted_count = len(response.data) if response.data else 0
         print(f"✅ Deleted {deleted_count} cached weekly contexts")
@@ -111,11 +117,11 @@ async def rebuild_specific_week(
         print(f"Week: {week_start} to {week_end}")
         
         # Delete existing cache for this specific week
-        delete_response = supabase.client.table('weekly_contexts')\
+        delete_response = await supabase.execute(supabase.client.table('weekly_contexts')\
             .delete()\
             .eq('user_id', user_id)\
-            .eq('week_start_date', str(week_start))\
-            .execute()
+            .eq('week_start_date', str(week_start)))
+        manager.invalidate(user_id, week_start)
         
         print(f"✅ Deleted old cache for this week")
         
@@ -177,11 +183,11 @@ async def rebuild_date_range(
         
         # Clear cache for all these weeks first
         for week_start, week_end, _ in weeks_to_rebuild:
-            supabase.client.table('weekly_contexts')\
+            await supabase.execute(supabase.client.table('weekly_contexts')\
                 .delete()\
                 .eq('user_id', user_id)\
-                .eq('week_start_date', str(week_start))\
-                .execute()
+                .eq('week_start_date', str(week_start)))
+            manager.invalidate(user_id, week_start)
         
         print(f"✅ Cleared cache for all {len(weeks_to_rebuild)} weeks")
         
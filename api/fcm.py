@@ -69,12 +69,12 @@ async def save_fcm_token(user_id: str, fcm_token: str, platform: str):
     
     try:
         # Upsert token (insert or update if exists)
-        result = supabase.client.table('fcm_tokens').upsert({
+        result = await supabase.execute(supabase.client.table('fcm_tokens').upsert({
             'user_id': user_id,
             'fcm_token': fcm_token,
             'platform': platform,
             'updated_at': datetime.utcnow().isoformat()
-        }, on_conflict='user_id').execute()
+        }, on_conflict='user_id'))
         
         return result.data[0] if result.data else None
     except Exception as e:
@@ -86,11 +86,10 @@ async def get_user_fcm_token(user_id: str) -> Optional[str]:
     supabase = get_supabase_service()
     
     try:
-        result = supabase.client.table('fcm_tokens')\
+        result = await supabase.execute(supabase.client.table('fcm_tokens')\
             .select('fcm_token')\
             .eq('user_id', user_id)\
-            .single()\
-            .execute()
+            .single())
         
         return result.data['fcm_token'] if result.data else None
     except Exception as e:
@@ -102,9 +101,8 @@ async def get_all_subscribed_users() -> List[dict]:
     supabase = get_supabase_service()
     
     try:
-        result = supabase.client.table('fcm_tokens')\
-            .select('user_id, fcm_token, platform')\
-            .execute()
+        result = await supabase.execute(supabase.client.table('fcm_tokens')\
+            .select('user_id, fcm_token, platform'))
         
         return result.data if result.data else []
     except Exception as e:
@@ -191,13 +189,13 @@ async def log_notification_sent(user_id: str, title: str, body: str, notificatio
         
         db_type = type_mapping.get(notification_type, 'reminder')
         
-        supabase.client.table('notifications').insert({
+        await supabase.execute(supabase.client.table('notifications').insert({
             'user_id': user_id,
             'title': title,
             'message': body,
             'type': db_type,
             'created_at': datetime.utcnow().isoformat()
-        }).execute()
+        }))
         
         print(f"✅ Logged notification: {db_type}")
     except Exception as e:
@@ -252,10 +250,9 @@ async def subscribe_to_notifications(data: FCMSubscribe):
         
         # Mark user as subscribed in database
         supabase = get_supabase_service()
-        supabase.client.table('fcm_tokens')\
+        await supabase.execute(supabase.client.table('fcm_tokens')\
             .update({'subscribed': True})\
-            .eq('user_id', data.user_id)\
-            .execute()
+            .eq('user_id', data.user_id))
         
         return {
             "success": True,
@@ -271,10 +268,9 @@ async def unsubscribe_from_notifications(data: FCMSubscribe):
         print(f"🔕 Unsubscribing user from notifications: {data.user_id}")
         
         supabase = get_supabase_service()
-        supabase.client.table('fcm_tokens')\
+        await supabase.execute(supabase.client.table('fcm_tokens')\
             .update({'subscribed': False})\
-            .eq('user_id', data.user_id)\
-            .execute()
+            .eq('user_id', data.user_id))
         
         return {
             "success": True,
@@ -3,8 +3,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel
 from datetime import datetime, timedelta
+from collections import Counter
 import uuid
-from api.meals import update_daily_nutrition
 from services.chat_context_manager import get_context_manager
 
 from models.water_schemas import WaterEntryCreate
@@ -181,6 +181,7 @@ async def create_health_user(user_profile: HealthUserCreate, tz_offset: int = De
             )
         
         # Convert Flutter model to our backend format
+        now_iso = get_user_now(tz_offset).isoformat()
         user_dict = {
             'id': str(uuid.uuid4()),
             'name': user_profile.name,
@@ -236,8 +237,8 @@ async def create_health_user(user_profile: HealthUserCreate, tz_offset: int = De
             'has_trainer': user_profile.hasTrainer,
             
             'preferences': {},
-            'created_at': get_user_now(tz_offset).isoformat(),
-            'updated_at': get_user_now(tz_offset).isoformat()
+            'created_at': now_iso,
+            'updated_at': now_iso
         }
         
         # Create user in Supabase
@@ -291,6 +292,7 @@ async def complete_flutter_onboarding(
         current_weight = basic_info.get('weight')
         
         # Create user dictionary directly
+        now_iso = get_user_now(tz_offset).isoformat()
         user_dict = {
             'id': str(uuid.uuid4()),
             'name': basic_info.get('name'),
@@ -346,8 +348,8 @@ async def complete_flutter_onboarding(
             'has_trainer': exercise_setup.get('hasTrainer', False),
             
             'preferences': {},
-            'created_at': get_user_now(tz_offset).isoformat(),
-            'updated_at': get_user_now(tz_offset).isoformat()
+            'created_at': now_iso,
+            'updated_at': now_iso
         }
         
         # Check if user already exists
@@ -1184,11 +1186,9 @@ async def save_weight_entry(weight_data: WeightEntryCreate, tz_offset: int = Dep
         weight_entry_data['id'] = str(uuid.uuid4())
         weight_entry_data['created_at'] = get_user_now(tz_offset).isoformat()
 
+        # Also initializes starting weight if this is the user's first entry
         created_entry = await supabase_service.create_weight_entry(weight_entry_data)
         
-        # ✅ NEW: Initialize starting weight if this is user's first entry
-        await supabase_service.initialize_starting_weight_for_user(weight_data.user_id)
-        
         # Update chat context (use date only from datetime)
         context_manager = get_context_manager()
         entry_date_only = entry_datetime.date()
@@ -1384,13 +1384,13 @@ async def set_starting_weight_endpoint(user_id: str, weight_data: dict):
             raise HTTPException(status_code=400, detail="Starting weight is required")
         
         # Update starting weight in users table
-        response = supabase_service.client.table('users')\
+        response = await supabase_service.execute(supabase_service.client.table('users')\
             .update({
                 'starting_weight': starting_weight,
                 'starting_weight_date': datetime.utcnow().isoformat()
             })\
-            .eq('id', user_id)\
-            .execute()
+            .eq('id', user_id))
+        supabase_service.invalidate_user_cache(user_id)
         
         if response.data:
             return {
@@ -1718,6 +1718,7 @@ async def save_supplement_preferences(preferences_data: SupplementPreferenceCrea
         
         # Save new preferences
         saved_preferences = []
+        now_iso = get_user_now(tz_offset).isoformat()
         for supplement in preferences_data.supplements:
             preference_data = {
                 'id': str(uuid.uuid4()),
@@ -1728,8 +1729,8 @@ async def save_supplement_preferences(preferences_data: SupplementPreferenceCrea
                 'preferred_time': supplement.get('preferred_time', '9:00 AM'),
                 'notes': supplement.get('notes', ''),
                 'is_active': True,
-                'created_at': get_user_now(tz_offset).isoformat(),
-                'updated_at': get_user_now(tz_offset).isoformat()
+                'created_at': now_iso,
+                'updated_at': now_iso
             }
             
             saved_preference = await supabase_service.create_supplement_preference(preference_data)
@@ -1855,19 +1856,54 @@ async def get_todays_supplement_status(user_id: str, date: Optional[str] = None,
         print(f"❌ Error getting supplement status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/supplements/checklist/{user_id}")
+async def get_supplement_checklist(user_id: str, date: Optional[str] = None, tz_offset: int = Depends(get_timezone_offset)):
+    """Get active supplements with today's taken flag in one call"""
+    try:
+        if date:
+            target_date = get_user_date(date, tz_offset)
+        else:
+            target_date = get_user_today(tz_offset)
+        
+        supabase_service = get_supabase_service()
+        supplements = await supabase_service.get_supplements_with_status(user_id, target_date)
+        
+        return {
+            "success": True,
+            "supplements": supplements,
+            "taken_count": sum(1 for supplement in supplements if supplement.get('taken')),
+            "date": str(target_date)
+        }
+        
+    except Exception as e:
+        print(f"❌ Error getting supplement checklist: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/supplements/history/{user_id}")
-async def get_supplement_history(user_id: str, supplement_name: Optional[str] = None, days: int = 30):
-    """Get supplement intake history"""
+async def get_supplement_history(
+    user_id: str,
+    supplement_name: Optional[str] = None,
+    days: int = 30,
+    before: Optional[str] = None
+):
+    """Get supplement intake history - pass next_before back as `before` to load the previous window"""
     try:
         print(f"💊 Getting supplement history for user: {user_id}")
         if supplement_name:
             print(f"💊 Filtering by supplement: {supplement_name}")
+        
+        # Keyset cursor: the window ends the day before `before` (default: today)
+        if before:
+            end_date = datetime.strptime(before, '%Y-%m-%d').date() - timedelta(days=1)
+        else:
+            end_date = datetime.now().date()
             
         supabase_service = get_supabase_service()
         history = await supabase_service.get_supplement_history(
             user_id, 
             supplement_name=supplement_name, 
-            days=days
+            days=days,
+            end_date=end_date
         )
         
         print(f"✅ Retrieved {len(history)} supplement history records")
@@ -1875,7 +1911,8 @@ async def get_supplement_history(user_id: str, supplement_name: Optional[str] =
         return {
             "success": True,
             "history": history,
-            "count": len(history)
+            "count": len(history),
+            "next_before": (end_date - timedelta(days=days)).isoformat()
         }
         
     except Exception as e:
@@ -1894,23 +1931,18 @@ async def get_supplement_history_in_range(
         
         start_date = datetime.strptime(start, '%Y-%m-%d').date()
         end_date = datetime.strptime(end, '%Y-%m-%d').date()
-        days = (end_date - start_date).days + 1
         
+        # The window is [end_date - days, end_date] - exactly the requested range
         history = await supabase_service.get_supplement_history(
             user_id, 
-            days=days
+            days=(end_date - start_date).days,
+            end_date=end_date
         )
         
-        # Filter by date range
-        filtered_history = [
-            log for log in history
-            if start_date <= datetime.strptime(log['date'], '%Y-%m-%d').date() <= end_date
-        ]
-        
         return {
             "success": True,
-            "history": filtered_history,
-            "count": len(filtered_history)
+            "history": history,
+            "count": len(history)
         }
     except Exception as e:
         print(f"❌ Error getting supplement history: {e}")
@@ -1939,33 +1971,24 @@ async def get_supplement_stats(user_id: str, days: int = 30):
                 }
             }
         
-        # Calculate statistics
-        supplement_stats = {}
-        for log in history:
-            name = log['supplement_name']
-            if name not in supplement_stats:
-                supplement_stats[name] = {'taken': 0, 'total': 0}
-            
-            supplement_stats[name]['total'] += 1
-            if log['taken']:
-                supplement_stats[name]['taken'] += 1
+        # Calculate statistics - logged doses and taken doses per supplement, one pass each
+        doses = Counter(log['supplement_name'] for log in history)
+        taken = Counter(log['supplement_name'] for log in history if log['taken'])
         
         # Calculate adherence rates
-        adherence_rates = {}
-        for name, stats in supplement_stats.items():
-            adherence_rates[name] = (stats['taken'] / stats['total']) * 100 if stats['total'] > 0 else 0
+        adherence_rates = {name: (taken[name] / total) * 100 for name, total in doses.items()}
         
         # Find most and least consistent
         most_consistent = max(adherence_rates.items(), key=lambda x: x[1]) if adherence_rates else None
         least_consistent = min(adherence_rates.items(), key=lambda x: x[1]) if adherence_rates else None
         
         # Overall adherence rate
-        total_taken = sum(stats['taken'] for stats in supplement_stats.values())
-        total_doses = sum(stats['total'] for stats in supplement_stats.values())
+        total_taken = sum(taken.values())
+        total_doses = len(history)
         overall_adherence = (total_taken / total_doses) * 100 if total_doses > 0 else 0
         
         stats_result = {
-            "total_supplements": len(supplement_stats),
+            "total_supplements": len(doses),
             "adherence_rate": round(overall_adherence, 1),
             "days_tracked": days,
             "most_consistent": most_consistent[0] if most_consistent else None,
@@ -2071,6 +2094,7 @@ async def log_exercise(exercise_data: dict, tz_offset: int = Depends(get_timezon
             print(f"💪 Using provided duration: {exercise_data.get('duration_minutes')} minutes")
         
         # Clean the data - remove null values and ensure proper types
+        now_iso = get_user_now(tz_offset).isoformat()
         exercise_log_data = {
             'id': str(uuid.uuid4()),
             'user_id': exercise_data.get('user_id'),
@@ -2081,8 +2105,8 @@ async def log_exercise(exercise_data: dict, tz_offset: int = Depends(get_timezon
             'intensity': exercise_data.get('intensity'),
             'notes': exercise_data.get('notes'),
             'exercise_date': exercise_date.isoformat(),
-            'created_at': get_user_now(tz_offset).isoformat(),
-            'updated_at': get_user_now(tz_offset).isoformat()
+            'created_at': now_iso,
+            'updated_at': now_iso
         }
         
         # Add type-specific fields only if they have values
@@ -2194,7 +2218,7 @@ async def get_exercise_stats(user_id: str, days: int = 30, tz_offset: int = Depe
             total_workouts = len(logs)
             total_minutes = 0
             total_calories = 0.0
-            type_counts = {}
+            type_counts = Counter()
             
             for log in logs:
                 # Debug each log
@@ -2208,10 +2232,10 @@ async def get_exercise_stats(user_id: str, days: int = 30, tz_offset: int = Depe
                 total_calories += calories
                 
                 # Count exercise types
-                type_counts[exercise_type] = type_counts.get(exercise_type, 0) + 1
+                type_counts[exercise_type] += 1
             
             avg_duration = total_minutes / total_workouts if total_workouts > 0 else 0
-            most_common_type = max(type_counts.items(), key=lambda x: x[1])[0] if type_counts else None
+            most_common_type = type_counts.most_common(1)[0][0] if type_counts else None
             
             stats.update({
                 "total_workouts": total_workouts,
@@ -2219,7 +2243,7 @@ async def get_exercise_stats(user_id: str, days: int = 30, tz_offset: int = Depe
                 "total_calories": round(total_calories, 1),
                 "avg_duration": round(avg_duration, 1),
                 "most_common_type": most_common_type,
-                "type_breakdown": type_counts
+                "type_breakdown": dict(type_counts)
             })
             
             print(f"💪 Calculated stats: {stats}")
@@ -2311,25 +2335,19 @@ async def get_weekly_exercise_summary(user_id: str, tz_offset: int = Depends(get
         }
         
         # Calculate muscle group distribution
-        for ex in exercises:
-            muscle_group = ex.get('muscle_group', 'other')
-            summary["muscle_groups"][muscle_group] = summary["muscle_groups"].get(muscle_group, 0) + 1
+        summary["muscle_groups"] = dict(Counter(ex.get('muscle_group', 'other') for ex in exercises))
         
-        # Calculate weekly breakdown
+        # Calculate weekly breakdown (weeks start on Monday)
+        week_counts = Counter()
         for ex in exercises:
-            date = get_user_now(tz_offset).isoformat(ex['exercise_date'].replace('Z', '+00:00'))
-            week_start = date - timedelta(days=date.weekday())
-            week_key = week_start.strftime('%Y-%m-%d')
-            summary["weekly_breakdown"][week_key] = summary["weekly_breakdown"].get(week_key, 0) + 1
+            date = datetime.fromisoformat(ex['exercise_date'].replace('Z', '+00:00'))
+            week_counts[(date - timedelta(days=date.weekday())).strftime('%Y-%m-%d')] += 1
+        summary["weekly_breakdown"] = dict(week_counts)
         
         # Find most frequent exercise
-        exercise_counts = {}
-        for ex in exercises:
-            name = ex.get('exercise_name', 'Unknown')
-            exercise_counts[name] = exercise_counts.get(name, 0) + 1
-        
+        exercise_counts = Counter(ex.get('exercise_name', 'Unknown') for ex in exercises)
         if exercise_counts:
-            summary["most_frequent_exercise"] = max(exercise_counts.items(), key=lambda x: x[1])[0]
+            summary["most_frequent_exercise"] = exercise_counts.most_common(1)[0][0]
         
         # Calculate total volume for strength exercises
         for ex in exercises:
@@ -2524,6 +2542,7 @@ async def create_custom_period(period_data: PeriodEntryCreate, tz_offset: int =
         if period_data.end_date:
             end_date = get_user_date(period_data.end_date, tz_offset)
         
+        now_iso = get_user_now(tz_offset).isoformat()
         period_entry_data = {
             'id': str(uuid.uuid4()),
             'user_id': period_data.user_id,
@@ -2533,8 +2552,8 @@ async def create_custom_period(period_data: PeriodEntryCreate, tz_offset: int =
             'symptoms': period_data.symptoms or [],
             'mood': period_data.mood,
             'notes': period_data.notes,
-            'created_at': get_user_now(tz_offset).isoformat(),
-            'updated_at': get_user_now(tz_offset).isoformat()
+            'created_at': now_iso,
+            'updated_at': now_iso
         }
         
         created_entry = await supabase_service.create_period_entry(period_entry_data)
@@ -2562,6 +2581,13 @@ async def update_user_profile(user_id: str, user_data: dict):
         print(f"👤 Updating user profile: {user_id}")
         
         supabase_service = get_supabase_service()
+        
+        # Untyped body - a single string for a list field must still reach Postgres as an array
+        for field in ('sleep_issues', 'dietary_preferences', 'preferred_workouts',
+                      'medical_conditions', 'available_equipment'):
+            if isinstance(user_data.get(field), str):
+                user_data[field] = [user_data[field]]
+        
         updated_user = await supabase_service.update_user(user_id, user_data)
         
         return {"success": True, "user": updated_user}
@@ -2767,11 +2793,10 @@ async def get_user_chat_sessions(user_id: str):
     try:
         supabase_service = get_supabase_service()
         
-        response = supabase_service.client.table("chat_sessions")\
+        response = await supabase_service.execute(supabase_service.client.table("chat_sessions")\
             .select("*")\
             .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .execute()
+            .order("created_at", desc=True))
         
         return {
             "success": True,
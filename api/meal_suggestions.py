@@ -82,12 +82,11 @@ async def get_meal_suggestions(
         remaining_calories = calorie_goal - calories_consumed
         
         # Get recent meals for variety
-        recent_meals_response = supabase_service.client.table('meal_entries')\
+        recent_meals_response = await supabase_service.execute(supabase_service.client.table('meal_entries')\
             .select('food_item')\
             .eq('user_id', request.user_id)\
             .order('logged_at', desc=True)\
-            .limit(20)\
-            .execute()
+            .limit(20))
         
         recent_foods = [m['food_item'] for m in (recent_meals_response.data or [])]
         
@@ -266,14 +265,13 @@ async def get_quick_suggestions(
         meal_type_filter = meal_type or _suggest_meal_type()
         
         # Get frequent meals
-        response = supabase_service.client.table('meal_entries')\
+        response = await supabase_service.execute(supabase_service.client.table('meal_entries')\
             .select('food_item, calories, protein_g, carbs_g, fat_g, meal_type')\
             .eq('user_id', user_id)\
             .eq('meal_type', meal_type_filter)\
             .lte('calories', remaining_calories + 100)\
             .order('logged_at', desc=True)\
-            .limit(50)\
-            .execute()
+            .limit(50))
         
         meals = response.data or []
         
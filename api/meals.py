@@ -1,6 +1,7 @@
 # api/meals.py
 from fastapi import APIRouter, HTTPException, Depends
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from datetime import datetime, timedelta
 import uuid
 
@@ -93,7 +94,6 @@ async def analyze_meal(request: MealAnalysisRequest, tz_offset: int = Depends(ge
             'sodium_mg': nutrition_data['sodium_mg'],
             'nutrition_data': nutrition_data,
             'data_source': nutrition_data.get('data_source'),
-            'search_hash': nutrition_data.get('search_hash'),
             'is_cached_source': nutrition_data.get('data_source') == 'cached',
             'confidence_score': nutrition_data.get('confidence_score', 0.8),
             'meal_date': user_date.isoformat(),
@@ -117,15 +117,6 @@ async def analyze_meal(request: MealAnalysisRequest, tz_offset: int = Depends(ge
             user_date
         )
         
-        # Update daily nutrition
-        await update_daily_nutrition(
-            supabase_service, 
-            request.user_id, 
-            user_date.isoformat(),
-            nutrition_data,
-            tz_offset
-        )
-        
         # Return response
         return MealEntryResponse(
             id=saved_meal['id'],
@@ -163,8 +154,7 @@ async def log_meal(meal_entry: dict):
         
         # Add IDs and timestamps
         meal_entry['id'] = str(uuid.uuid4())
-        meal_entry['logged_at'] = datetime.now().isoformat()
-        meal_entry['updated_at'] = datetime.now().isoformat()
+        meal_entry['logged_at'] = meal_entry['updated_at'] = datetime.now().isoformat()
         
         # Save to database
         created_entry = await supabase_service.create_meal_entry(meal_entry)
@@ -178,20 +168,45 @@ async def log_meal(meal_entry: dict):
             meal_date
         )
         
-        # Update daily nutrition
-        await update_daily_nutrition(
-            supabase_service,
-            meal_entry['user_id'],
-            meal_date.isoformat(),
-            created_entry
-        )
-        
         return {"success": True, "meal": created_entry}
         
     except Exception as e:
         print(f"❌ Error logging meal: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/log/bulk", response_model=dict)
+async def log_meals_bulk(meal_entries: List[dict]):
+    """Log several meal entries at once (device sync / imports)"""
+    try:
+        supabase_service = get_supabase_service()
+        context_manager = get_context_manager()
+        
+        # Add IDs and timestamps
+        now = datetime.now().isoformat()
+        for meal_entry in meal_entries:
+            meal_entry.setdefault('id', str(uuid.uuid4()))
+            meal_entry.setdefault('logged_at', now)
+            meal_entry['updated_at'] = now
+        
+        # Save to database in one round-trip
+        created_entries = await supabase_service.create_meal_entries_bulk(meal_entries)
+        
+        # Update chat context
+        for created_entry in created_entries:
+            meal_date = datetime.fromisoformat(created_entry.get('meal_date') or now).date()
+            await context_manager.update_context_activity(
+                created_entry['user_id'],
+                'meal',
+                created_entry,
+                meal_date
+            )
+        
+        return {"success": True, "count": len(created_entries), "meals": created_entries}
+        
+    except Exception as e:
+        print(f"❌ Error logging meals: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{user_id}/history", response_model=MealHistoryResponse)
 async def get_meal_history(user_id: str, limit: int = 20, date_from: Optional[str] = None):
     """Get user's meal history"""
@@ -234,6 +249,15 @@ async def get_meal_history(user_id: str, limit: int = 20, date_from: Optional[st
         print(f"❌ Error getting meal history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
+@router.get("/{user_id}/history/export")
+async def export_meal_history(user_id: str, date_from: Optional[str] = None):
+    """Stream a user's full meal history as NDJSON (one meal per line)"""
+    supabase_service = get_supabase_service()
+    return StreamingResponse(
+        supabase_service.stream_user_meals(user_id, date_from=date_from),
+        media_type="application/x-ndjson"
+    )
+    
 @router.delete("/{meal_id}")
 async def delete_meal(meal_id: str):
     """Delete a meal entry and update context"""
@@ -261,13 +285,6 @@ async def delete_meal(meal_id: str):
                 meal_date
             )
             
-            # Also update daily nutrition totals
-            await recalculate_daily_nutrition(
-                supabase_service,
-                meal['user_id'],
-                meal_date.isoformat()
-            )
-            
             return {"success": True, "message": "Meal deleted successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to delete meal")
@@ -276,40 +293,6 @@ async def delete_meal(meal_id: str):
         print(f"❌ Error deleting meal: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Helper function to recalculate daily nutrition after deletion
-async def recalculate_daily_nutrition(supabase_service, user_id: str, date: str):
-    """Recalculate daily nutrition totals after a meal deletion"""
-    try:
-        # Get all meals for the day
-        meals = await supabase_service.get_user_meals_by_date(user_id, date)
-        
-        # Get existing daily nutrition entry
-        existing = await supabase_service.get_daily_nutrition(user_id, date)
-        
-        if not existing:
-            print(f"⚠️ No daily nutrition entry found for {date}, skipping recalculation")
-            return
-        
-        # Calculate new totals
-        totals = {
-            'calories_consumed': int(sum(m.get('calories', 0) for m in meals)),
-            'protein_g': round(sum(m.get('protein_g', 0) for m in meals), 1),
-            'carbs_g': round(sum(m.get('carbs_g', 0) for m in meals), 1),
-            'fat_g': round(sum(m.get('fat_g', 0) for m in meals), 1),
-            'fiber_g': round(sum(m.get('fiber_g', 0) for m in meals), 1),
-            'sugar_g': round(sum(m.get('sugar_g', 0) for m in meals), 1),
-            'sodium_mg': int(sum(m.get('sodium_mg', 0) for m in meals)),
-            'meals_logged': len(meals),
-            'updated_at': datetime.utcnow().isoformat()
-        }
-        
-        # Update daily nutrition table - use entry_id, not user_id and date
-        await supabase_service.update_daily_nutrition(existing['id'], totals)
-        print(f"✅ Recalculated daily nutrition for {date}")
-        
-    except Exception as e:
-        print(f"Error recalculating daily nutrition: {e}")
-
 @router.get("/")
 async def meals_health_check():
     """Health check for meals API"""
@@ -319,67 +302,12 @@ async def meals_health_check():
         "timestamp": datetime.now()
     }
 
-async def update_daily_nutrition(supabase_service, user_id: str, meal_date: str, nutrition_data: dict, timezone_offset: int = 0):
-    """Update daily nutrition summary in daily_nutrition table"""
-    try:
-        from utils.timezone_utils import get_user_date, get_user_now
-        
-        # Extract date in user's timezone
-        if 'T' in meal_date:
-            # It's a datetime string - convert to user's local date
-            date_only = str(get_user_date(meal_date, timezone_offset))
-        else:
-            # Already a date string
-            date_only = meal_date
-        
-        # Get existing daily nutrition
-        existing = await supabase_service.get_daily_nutrition(user_id, date_only)
-        
-        if existing:
-            # Update existing entry
-            updated_data = {
-                'calories_consumed': int(float(existing.get('calories_consumed', 0)) + float(nutrition_data.get('calories', 0))),
-                'protein_g': round(float(existing.get('protein_g', 0)) + float(nutrition_data.get('protein_g', 0)), 1),
-                'carbs_g': round(float(existing.get('carbs_g', 0)) + float(nutrition_data.get('carbs_g', 0)), 1),
-                'fat_g': round(float(existing.get('fat_g', 0)) + float(nutrition_data.get('fat_g', 0)), 1),
-                'fiber_g': round(float(existing.get('fiber_g', 0)) + float(nutrition_data.get('fiber_g', 0)), 1),
-                'sugar_g': round(float(existing.get('sugar_g', 0)) + float(nutrition_data.get('sugar_g', 0)), 1),
-                'sodium_mg': int(float(existing.get('sodium_mg', 0)) + float(nutrition_data.get('sodium_mg', 0))),
-                'meals_logged': int(existing.get('meals_logged', 0)) + 1,
-                'updated_at': get_user_now(timezone_offset).isoformat()
-            }
-            await supabase_service.update_daily_nutrition(existing['id'], updated_data)
-            print(f"✅ Updated daily nutrition for {user_id} on {date_only}")
-        else:
-            # Create new entry
-            new_data = {
-                'user_id': user_id,
-                'date': date_only,
-                'calories_consumed': int(float(nutrition_data.get('calories', 0))),
-                'protein_g': round(float(nutrition_data.get('protein_g', 0)), 1),
-                'carbs_g': round(float(nutrition_data.get('carbs_g', 0)), 1),
-                'fat_g': round(float(nutrition_data.get('fat_g', 0)), 1),
-                'fiber_g': round(float(nutrition_data.get('fiber_g', 0)), 1),
-                'sugar_g': round(float(nutrition_data.get('sugar_g', 0)), 1),
-                'sodium_mg': int(float(nutrition_data.get('sodium_mg', 0))),
-                'meals_logged': 1,
-                'calorie_goal': 2000,  # Default or calculate based on user profile
-                'created_at': get_user_now(timezone_offset).isoformat(),
-                'updated_at': get_user_now(timezone_offset).isoformat()
-            }
-            await supabase_service.create_daily_nutrition(new_data)
-            print(f"✅ Created daily nutrition for {user_id} on {date_only}")
-            
-    except Exception as e:
-        print(f"❌ Error updating daily nutrition: {e}")
-        import traceback
-        traceback.print_exc()
-
 @router.post("/presets/create")
 async def create_meal_preset(preset_data: dict):
     """Create a meal preset from logged meals"""
     try:
         supabase_service = get_supabase_service()
+        now = datetime.now().isoformat()
         
         preset = {
             'id': str(uuid.uuid4()),
@@ -396,8 +324,8 @@ async def create_meal_preset(preset_data: dict):
             'total_sugar_g': preset_data.get('total_sugar_g', 0),
             'total_sodium_mg': preset_data.get('total_sodium_mg', 0),
             'is_favorite': preset_data.get('is_favorite', False),
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat()
+            'created_at': now,
+            'updated_at': now
         }
         
         created = await supabase_service.create_meal_preset(preset)
@@ -427,10 +355,9 @@ async def use_meal_preset(preset_id: str, data: dict, tz_offset: int = Depends(g
         supabase_service = get_supabase_service()
         
         # Get the preset
-        response = supabase_service.client.table('meal_presets')\
+        response = await supabase_service.execute(supabase_service.client.table('meal_presets')\
             .select('*')\
-            .eq('id', preset_id)\
-            .execute()
+            .eq('id', preset_id))
         
         if not response.data:
             print(f"❌ Preset not found: {preset_id}")
@@ -548,19 +475,17 @@ async def delete_meal_preset(preset_id: str):
         supabase_service = get_supabase_service()
         
         # Get the preset first to verify it exists
-        response = supabase_service.client.table('meal_presets')\
+        response = await supabase_service.execute(supabase_service.client.table('meal_presets')\
             .select('*')\
-            .eq('id', preset_id)\
-            .execute()
+            .eq('id', preset_id))
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Preset not found")
         
         # Delete the preset
-        delete_response = supabase_service.client.table('meal_presets')\
+        delete_response = await supabase_service.execute(supabase_service.client.table('meal_presets')\
             .delete()\
-            .eq('id', preset_id)\
-            .execute()
+            .eq('id', preset_id))
         
         return {"success": True, "message": "Preset deleted successfully"}
         
@@ -834,24 +759,17 @@ async def get_nutrition_trends(
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days)
         
-        # Get all daily nutrition entries in range
-        response = supabase_service.client.table('daily_nutrition')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .gte('date', str(start_date))\
-            .lte('date', str(end_date))\
-            .order('date', desc=False)\
-            .execute()
-        
-        daily_data = response.data or []
+        # Get daily nutrition totals in range
+        daily_data = await supabase_service.get_daily_nutrition_range(
+            user_id, str(start_date), str(end_date)
+        )
         
         # Get exercise data for the same period
-        exercise_response = supabase_service.client.table('exercise_logs')\
+        exercise_response = await supabase_service.execute(supabase_service.client.table('exercise_logs')\
             .select('exercise_date, calories_burned')\
             .eq('user_id', user_id)\
             .gte('exercise_date', str(start_date))\
-            .lte('exercise_date', str(end_date))\
-            .execute()
+            .lte('exercise_date', str(end_date)))
         
         # Aggregate exercise by date
         exercise_by_date = {}
@@ -972,12 +890,11 @@ async def get_macro_breakdown(
         start_date = end_date - timedelta(days=days)
         
         # Get meals in range
-        response = supabase_service.client.table('meal_entries')\
+        response = await supabase_service.execute(supabase_service.client.table('meal_entries')\
             .select('*')\
             .eq('user_id', user_id)\
             .gte('meal_date', str(start_date))\
-            .lte('meal_date', str(end_date))\
-            .execute()
+            .lte('meal_date', str(end_date)))
         
         meals = response.data or []
         
@@ -1056,12 +973,11 @@ async def get_micronutrient_summary(
         target_date = datetime.strptime(date, '%Y-%m-%d').date() if date else get_user_today(tz_offset)
         
         # Get meals for the day
-        response = supabase_service.client.table('meal_entries')\
+        response = await supabase_service.execute(supabase_service.client.table('meal_entries')\
             .select('*')\
             .eq('user_id', user_id)\
-            .gte('meal_date', f"{target_date}T00:00:00")\
-            .lte('meal_date', f"{target_date}T23:59:59")\
-            .execute()
+            .gte('meal_date', str(target_date))\
+            .lt('meal_date', str(target_date + timedelta(days=1))))
         
         meals = response.data or []
         
@@ -35,10 +35,9 @@ async def save_notification_preferences(prefs: NotificationPreferences):
         supabase = get_supabase_service()
         
         # Check if preferences already exist
-        existing = supabase.client.table('notification_preferences')\
+        existing = await supabase.execute(supabase.client.table('notification_preferences')\
             .select('*')\
-            .eq('user_id', prefs.user_id)\
-            .execute()
+            .eq('user_id', prefs.user_id))
         
         data = {
             'user_id': prefs.user_id,
@@ -63,16 +62,14 @@ async def save_notification_preferences(prefs: NotificationPreferences):
         
         if existing.data and len(existing.data) > 0:
             # Update existing
-            response = supabase.client.table('notification_preferences')\
+            response = await supabase.execute(supabase.client.table('notification_preferences')\
                 .update(data)\
-                .eq('user_id', prefs.user_id)\
-                .execute()
+                .eq('user_id', prefs.user_id))
         else:
             # Insert new
             data['created_at'] = datetime.utcnow().isoformat()
-            response = supabase.client.table('notification_preferences')\
-                .insert(data)\
-                .execute()
+            response = await supabase.execute(supabase.client.table('notification_preferences')\
+                .insert(data))
         
         print(f"✅ Notification preferences saved for user {prefs.user_id}")
         
@@ -92,10 +89,9 @@ async def get_notification_preferences(user_id: str):
     try:
         supabase = get_supabase_service()
         
-        response = supabase.client.table('notification_preferences')\
+        response = await supabase.execute(supabase.client.table('notification_preferences')\
             .select('*')\
-            .eq('user_id', user_id)\
-            .execute()
+            .eq('user_id', user_id))
         
         if response.data and len(response.data) > 0:
             return {
@@ -137,10 +133,9 @@ async def delete_notification_preferences(user_id: str):
     try:
         supabase = get_supabase_service()
         
-        response = supabase.client.table('notification_preferences')\
+        response = await supabase.execute(supabase.client.table('notification_preferences')\
             .delete()\
-            .eq('user_id', user_id)\
-            .execute()
+            .eq('user_id', user_id))
         
         return {
             "success": True,
@@ -33,7 +33,7 @@ async def log_notification(notification: LogNotificationRequest):
         
         print(f"📝 Logging notification to DB: {notification.type} for user {notification.user_id}")
         
-        response = supabase.client.table('notifications').insert(data).execute()
+        response = await supabase.execute(supabase.client.table('notifications').insert(data))
         
         print(f"✅ Notification logged with ID: {notification_id}")
         
@@ -54,11 +54,10 @@ async def get_unread_count(user_id: str):
     try:
         supabase = get_supabase_service()
         
-        response = supabase.client.table('notifications')\
+        response = await supabase.execute(supabase.client.table('notifications')\
             .select('id', count='exact')\
             .eq('user_id', user_id)\
-            .eq('is_read', False)\
-            .execute()
+            .eq('is_read', False))
         
         count = len(response.data) if response.data else 0
         
@@ -79,12 +78,11 @@ async def get_notifications(user_id: str, limit: int = 50):
     try:
         supabase = get_supabase_service()
         
-        response = supabase.client.table('notifications')\
+        response = await supabase.execute(supabase.client.table('notifications')\
             .select('*')\
             .eq('user_id', user_id)\
             .order('created_at', desc=True)\
-            .limit(limit)\
-            .execute()
+            .limit(limit))
         
         notifications_count = len(response.data) if response.data else 0
         print(f"📱 Retrieved {notifications_count} notifications for {user_id}")
@@ -106,10 +104,9 @@ async def mark_notification_read(notification_id: str):
     try:
         supabase = get_supabase_service()
         
-        response = supabase.client.table('notifications')\
+        response = await supabase.execute(supabase.client.table('notifications')\
             .update({'is_read': True})\
-            .eq('id', notification_id)\
-            .execute()
+            .eq('id', notification_id))
         
         return {"success": True}
         
@@ -123,11 +120,10 @@ async def mark_all_notifications_read(user_id: str):
     try:
         supabase = get_supabase_service()
         
-        response = supabase.client.table('notifications')\
+        response = await supabase.execute(supabase.client.table('notifications')\
             .update({'is_read': True})\
             .eq('user_id', user_id)\
-            .eq('is_read', False)\
-            .execute()
+            .eq('is_read', False))
         
         return {"success": True}
         
@@ -141,10 +137,9 @@ async def delete_notification(notification_id: str):
     try:
         supabase = get_supabase_service()
         
-        response = supabase.client.table('notifications')\
+        response = await supabase.execute(supabase.client.table('notifications')\
             .delete()\
-            .eq('id', notification_id)\
-            .execute()
+            .eq('id', notification_id))
         
         print(f"🗑️ Notification {notification_id} deleted")
         
@@ -163,10 +158,9 @@ async def clear_all_notifications(user_id: str):
     try:
         supabase = get_supabase_service()
         
-        response = supabase.client.table('notifications')\
+        response = await supabase.execute(supabase.client.table('notifications')\
             .delete()\
-            .eq('user_id', user_id)\
-            .execute()
+            .eq('user_id', user_id))
         
         deleted_count = len(response.data) if response.data else 0
         print(f"🗑️ Cleared {deleted_count} notifications for {user_id}")
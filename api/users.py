@@ -44,8 +44,7 @@ async def register_user(user_data: UserCreate):
         user_dict = user_data.dict()
         user_dict['id'] = str(uuid.uuid4())
         user_dict['password_hash'] = hashed_password
-        user_dict['created_at'] = datetime.utcnow().isoformat()
-        user_dict['updated_at'] = datetime.utcnow().isoformat()
+        user_dict['created_at'] = user_dict['updated_at'] = datetime.utcnow().isoformat()
         
         # Remove plain password - we only store the hash
         del user_dict['password']
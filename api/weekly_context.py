@@ -28,12 +28,13 @@ async def get_weekly_context(
 @router.get("/recent/{user_id}")
 async def get_recent_weeks(
     user_id: str,
-    weeks: int = 4
+    weeks: int = 4,
+    include_context: bool = True
 ):
-    """Get recent weeks' contexts"""
+    """Get recent weeks' contexts (include_context=false returns summaries only)"""
     try:
         manager = get_weekly_context_manager()
-        contexts = await manager.get_recent_weeks_context(user_id, weeks)
+        contexts = await manager.get_recent_weeks_context(user_id, weeks, include_context)
         
         return {
             'success': True,
@@ -74,12 +75,11 @@ async def get_weekly_summaries(
         supabase = get_supabase_service()
         
         # Get last N weeks of summaries
-        response = supabase.client.table('weekly_contexts')\
+        response = await supabase.execute(supabase.client.table('weekly_contexts')\
             .select('week_start_date, week_end_date, week_number, year, summary_data')\
             .eq('user_id', user_id)\
             .order('week_start_date', desc=True)\
-            .limit(weeks)\
-            .execute()
+            .limit(weeks))
         
         summaries = []
         for record in response.data:
@@ -1,11 +1,16 @@
 # main.py
 from fastapi.middleware.cors import CORSMiddleware
+import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Response
-from utils.keep_alive import start_keep_alive
-from services.supabase_service import init_supabase_service
+from fastapi.responses import ORJSONResponse
+from utils.keep_alive import start_keep_alive, stop_keep_alive
+from services.supabase_service import init_supabase_service, close_supabase_service, start_supabase_chat_queue, flush_supabase_chat_queue
+from services.db_pool import init_db_pool, close_db_pool
 from api import users, flutter_compat
 from api import fcm
 from api import chat
@@ -20,6 +25,18 @@ from api.meal_suggestions import router as suggestions_router
 # Load environment variables
 load_dotenv()
 
+# Service modules log through `logging`; debug detail is off unless LOG_LEVEL asks for it.
+# Records go onto a queue and a listener thread writes them, so logging never blocks the event loop
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+_queue_handler = QueueHandler(_log_queue)
+# Only merge args/traceback into the message here - the listener's handler adds the prefix
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper(), handlers=[_queue_handler])
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown - ALL initialization happens here"""
@@ -28,8 +45,12 @@ async def lifespan(app: FastAPI):
     try:
         # Initialize Supabase
         init_supabase_service()
+        start_supabase_chat_queue()
         print("✅ Supabase service initialized")
         
+        # Direct Postgres pool (optional - requires SUPABASE_DB_URL)
+        await init_db_pool()
+        
         # Initialize OpenAI
         from services.openai_service import init_openai_service
         init_openai_service()
@@ -82,6 +103,16 @@ async def lifespan(app: FastAPI):
     yield
     
     print("👋 Shutting down...")
+    await stop_keep_alive()
+    await flush_supabase_chat_queue()
+    try:
+        from services.usda_service import close_usda_service
+        await close_usda_service()
+    except ImportError:
+        pass
+    await close_db_pool()
+    close_supabase_service()
+    _log_listener.stop()
 
 
 # Initialize FastAPI app
@@ -89,7 +120,9 @@ app = FastAPI(
     lifespan=lifespan,
     title="Health AI Backend",
     description="AI-powered health tracking backend with user management",
-    version="2.0.0"
+    version="2.0.0",
+    # Serialize responses with orjson (C) instead of the stdlib json encoder
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware for your Flutter app
@@ -2,9 +2,16 @@
 
 from datetime import datetime, timedelta
 import asyncio
+import logging
 from services.weekly_context_manager import get_weekly_context_manager
 from services.supabase_service import get_supabase_service
 
+logger = logging.getLogger(__name__)
+
+# Weekly builds in flight at once, and rows per upsert_weekly_contexts call
+WEEKLY_BUILD_CONCURRENCY = 10
+WEEKLY_PERSIST_BATCH = 100
+
 async def generate_weekly_contexts_for_all_users():
     """Background task to generate weekly contexts for all active users"""
     try:
@@ -15,28 +22,44 @@ async def generate_weekly_contexts_for_all_users():
         one_week_ago = (datetime.now().date() - timedelta(days=7)).isoformat()
         
         # Get unique user IDs from recent activities
-        response = supabase.client.table('meal_entries')\
+        response = await supabase.execute(supabase.client.table('meal_entries')\
             .select('user_id')\
-            .gte('created_at', one_week_ago)\
-            .execute()
+            .gte('created_at', one_week_ago))
         
         user_ids = set(entry['user_id'] for entry in response.data)
         
-        print(f"🔄 Generating weekly contexts for {len(user_ids)} active users")
+        logger.info("Generating weekly contexts for %s active users", len(user_ids))
+        
+        # Precompute the previous (completed) week for everyone, so reads are a stored-row lookup
+        last_week = datetime.now().date() - timedelta(days=7)
+        week_start, week_end = manager.get_week_boundaries(last_week)
+        week_number, year = manager.get_week_number(last_week)
+        
+        semaphore = asyncio.Semaphore(WEEKLY_BUILD_CONCURRENCY)
+        
+        async def build(user_id):
+            async with semaphore:
+                return await manager.build_weekly_context(user_id, week_start, week_end, week_number, year)
+        
+        user_ids = list(user_ids)
+        results = await asyncio.gather(*[build(user_id) for user_id in user_ids], return_exceptions=True)
+        rows = []
+        for user_id, row in zip(user_ids, results):
+            if isinstance(row, BaseException):
+                logger.error("Error generating context for user %s: %s", user_id, row)
+            else:
+                rows.append(row)
         
-        for user_id in user_ids:
-            try:
-                # Generate context for the previous week (completed week)
-                last_week = datetime.now().date() - timedelta(days=7)
-                await manager.update_weekly_context(user_id, last_week)
-                print(f"✅ Generated weekly context for user {user_id}")
-            except Exception as e:
-                print(f"❌ Error generating context for user {user_id}: {e}")
+        # Batched upserts - unchanged weeks are left untouched by the RPC
+        for offset in range(0, len(rows), WEEKLY_PERSIST_BATCH):
+            await manager.persist_weekly_contexts(rows[offset:offset + WEEKLY_PERSIST_BATCH])
+        for row in rows:
+            manager.invalidate(row['user_id'], week_start)
         
-        print(f"✅ Weekly context generation complete")
+        logger.info("Weekly context generation complete: %s/%s users", len(rows), len(user_ids))
         
-    except Exception as e:
-        print(f"❌ Error in weekly context generation task: {e}")
+    except Exception:
+        logger.exception("Error in weekly context generation task")
 
 # Schedule this to run every Sunday night
 async def schedule_weekly_tasks():
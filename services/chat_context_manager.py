@@ -1,6 +1,7 @@
 # services/chat_context_manager.py
 from typing import Dict, Any, Optional, List
 from datetime import datetime, date, timedelta
+import asyncio
 import json
 from services.supabase_service import get_supabase_service
 
@@ -17,11 +18,10 @@ class ChatContextManager:
         # For specific dates, use the existing logic
         try:
             # Try to get existing context
-            response = self.supabase_service.client.table('chat_contexts')\
+            response = await self.supabase_service.execute(self.supabase_service.client.table('chat_contexts')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             
             if response.data:
                 context_record = response.data[0]
@@ -94,14 +94,13 @@ class ChatContextManager:
             }
             
             # Save to database
-            response = self.supabase_service.client.table('chat_contexts')\
+            response = await self.supabase_service.execute(self.supabase_service.client.table('chat_contexts')\
                 .upsert({
                     'user_id': user_id,
                     'date': str(target_date),
                     'context_data': initial_context,
                     'version': 1
-                })\
-                .execute()
+                }))
             
             return {
                 'context': initial_context,
@@ -230,7 +229,7 @@ class ChatContextManager:
             context['context_metadata']['last_activity_time'] = datetime.now().isoformat()
             
             # Save updated context with optimistic locking
-            response = self.supabase_service.client.table('chat_contexts')\
+            response = await self.supabase_service.execute(self.supabase_service.client.table('chat_contexts')\
                 .update({
                     'context_data': context,
                     'version': version + 1,
@@ -238,8 +237,7 @@ class ChatContextManager:
                 })\
                 .eq('user_id', user_id)\
                 .eq('date', str(target_date))\
-                .eq('version', version)\
-                .execute()
+                .eq('version', version))
             
             if not response.data:
                 # Version conflict, retry with fresh context
@@ -297,7 +295,7 @@ class ChatContextManager:
                 ]
             
             # Save updated context
-            response = self.supabase_service.client.table('chat_contexts')\
+            response = await self.supabase_service.execute(self.supabase_service.client.table('chat_contexts')\
                 .update({
                     'context_data': context,
                     'version': version + 1,
@@ -305,8 +303,7 @@ class ChatContextManager:
                 })\
                 .eq('user_id', user_id)\
                 .eq('date', str(target_date))\
-                .eq('version', version)\
-                .execute()
+                .eq('version', version))
             
             return {
                 'success': True,
@@ -328,40 +325,35 @@ class ChatContextManager:
             
             # ACTUALLY FETCH THE DATA FROM THE DATABASE
             # Get meals for today
-            meals_response = self.supabase_service.client.table('meal_entries')\
+            meals_response = await self.supabase_service.execute(self.supabase_service.client.table('meal_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .gte('meal_date', f"{target_date}T00:00:00")\
-                .lte('meal_date', f"{target_date}T23:59:59")\
-                .execute()
+                .gte('meal_date', str(target_date))\
+                .lt('meal_date', str(target_date + timedelta(days=1))))
             
             meals = meals_response.data if meals_response.data else []
             
             # Get exercises for today  
-            exercise_response = self.supabase_service.client.table('exercise_logs')\
+            exercise_response = await self.supabase_service.execute(self.supabase_service.client.table('exercise_logs')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .gte('exercise_date', f"{target_date}T00:00:00")\
-                .lte('exercise_date', f"{target_date}T23:59:59")\
-                .execute()
+                .eq('exercise_day', str(target_date)))
             
             exercises = exercise_response.data if exercise_response.data else []
             
             # Get water for today
-            water_response = self.supabase_service.client.table('daily_water')\
+            water_response = await self.supabase_service.execute(self.supabase_service.client.table('daily_water')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             
             water = water_response.data[0] if water_response.data else {}
             
             # Get steps for today
-            steps_response = self.supabase_service.client.table('daily_steps')\
+            steps_response = await self.supabase_service.execute(self.supabase_service.client.table('daily_steps')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             
             steps = steps_response.data[0] if steps_response.data else {}
             
@@ -433,15 +425,14 @@ class ChatContextManager:
             }
             
             # Save the POPULATED context
-            self.supabase_service.client.table('chat_contexts')\
+            await self.supabase_service.execute(self.supabase_service.client.table('chat_contexts')\
                 .upsert({
                     'user_id': user_id,
                     'date': str(target_date),
                     'context_data': context,
                     'version': 1,
                     'last_updated': datetime.now().isoformat()
-                })\
-                .execute()
+                }))
             
             print(f"✅ Context rebuilt with {len(meals)} meals and {len(exercises)} exercises")
             
@@ -618,11 +609,10 @@ class ChatContextManager:
         
         try:
             # Get meals - use correct column name 'meal_date'
-            meals_response = self.supabase_service.client.table('meal_entries')\
+            meals_response = await self.supabase_service.execute(self.supabase_service.client.table('meal_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('meal_date', str(target_date))\
-                .execute()
+                .eq('meal_date', str(target_date)))
             activities['meals'] = meals_response.data if meals_response.data else []
             print(f"  📋 Found {len(activities['meals'])} meals")
         except Exception as e:
@@ -631,11 +621,10 @@ class ChatContextManager:
         
         try:
             # Get water intake
-            water_response = self.supabase_service.client.table('daily_water')\
+            water_response = await self.supabase_service.execute(self.supabase_service.client.table('daily_water')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             activities['water'] = water_response.data[0] if water_response.data else {}
             print(f"  💧 Water: {activities['water'].get('glasses_consumed', 0)} glasses")
         except Exception as e:
@@ -644,11 +633,10 @@ class ChatContextManager:
         
         try:
             # Get exercises
-            exercise_response = self.supabase_service.client.table('exercise_logs')\
+            exercise_response = await self.supabase_service.execute(self.supabase_service.client.table('exercise_logs')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('exercise_date', str(target_date))\
-                .execute()
+                .eq('exercise_date', str(target_date)))
             activities['exercise'] = exercise_response.data if exercise_response.data else []
             print(f"  💪 Found {len(activities['exercise'])} exercises")
         except Exception as e:
@@ -657,11 +645,10 @@ class ChatContextManager:
         
         try:
             # Get steps
-            steps_response = self.supabase_service.client.table('daily_steps')\
+            steps_response = await self.supabase_service.execute(self.supabase_service.client.table('daily_steps')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             activities['steps'] = steps_response.data[0] if steps_response.data else {}
             print(f"  👣 Steps: {activities['steps'].get('steps', 0)}")
         except Exception as e:
@@ -670,11 +657,10 @@ class ChatContextManager:
         
         try:
             # Get sleep
-            sleep_response = self.supabase_service.client.table('sleep_entries')\
+            sleep_response = await self.supabase_service.execute(self.supabase_service.client.table('sleep_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             activities['sleep'] = sleep_response.data[0] if sleep_response.data else {}
             print(f"  😴 Sleep: {activities['sleep'].get('total_hours', 0)} hours")
         except Exception as e:
@@ -683,11 +669,10 @@ class ChatContextManager:
         
         try:
             # Get weight
-            weight_response = self.supabase_service.client.table('weight_entries')\
+            weight_response = await self.supabase_service.execute(self.supabase_service.client.table('weight_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             activities['weight'] = weight_response.data[0] if weight_response.data else {}
             print(f"  ⚖️ Weight: {activities['weight'].get('weight', 'Not logged')} kg")
         except Exception as e:
@@ -706,11 +691,10 @@ class ChatContextManager:
         
         try:
             # Get period data (for female users)
-            period_response = self.supabase_service.client.table('period_entries')\
+            period_response = await self.supabase_service.execute(self.supabase_service.client.table('period_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             activities['period'] = period_response.data[0] if period_response.data else {}
         except Exception as e:
             # Silent fail for period data (not all users need this)
@@ -754,53 +738,27 @@ class ChatContextManager:
                 'workout_streak': 0
             }
             
-            # Fetch data for the week
-            total_calories = 0
-            days_with_meals = 0
-            total_sleep = 0
-            days_with_sleep = 0
-            days_with_water = 0
-            workout_days = set()
+            # One range query per table for the whole week, run concurrently;
+            # meal and exercise rows are already summed per day in Postgres
+            nutrition_days, exercise_days, sleep_entries, water_entries, weight_entries = await asyncio.gather(
+                self.supabase_service.get_daily_nutrition_range(user_id, str(start_date), str(end_date)),
+                self.supabase_service.get_daily_exercise_summary(user_id, start_date, end_date),
+                self.supabase_service.get_sleep_in_range(user_id, start_date, end_date),
+                self.supabase_service.get_water_entries_in_range(user_id, str(start_date), str(end_date)),
+                self.supabase_service.get_weight_entries(user_id, str(start_date), str(end_date))
+            )
             
-            for i in range(7):
-                check_date = start_date + timedelta(days=i)
-                
-                # Get meals for calorie average
-                meals = await self.supabase_service.get_meals_by_date(user_id, check_date)
-                if meals:
-                    daily_calories = sum(m.get('calories', 0) for m in meals)
-                    if daily_calories > 0:
-                        total_calories += daily_calories
-                        days_with_meals += 1
-                
-                # Get sleep
-                sleep = await self.supabase_service.get_sleep_by_date(user_id, check_date)
-                if sleep and sleep.get('total_hours'):
-                    total_sleep += sleep['total_hours']
-                    days_with_sleep += 1
-                
-                # Get water
-                water = await self.supabase_service.get_water_by_date(user_id, check_date)
-                if water and water.get('glasses_consumed', 0) > 0:
-                    days_with_water += 1
-                
-                # Get exercise
-                exercises = await self.supabase_service.get_exercises_by_date(user_id, check_date)
-                if exercises:
-                    workout_days.add(str(check_date))
+            calorie_days = [day['calories_consumed'] for day in nutrition_days if (day.get('calories_consumed') or 0) > 0]
+            sleep_hours = [entry['total_hours'] for entry in sleep_entries if entry.get('total_hours')]
+            days_with_water = len({entry['date'] for entry in water_entries if (entry.get('glasses_consumed') or 0) > 0})
             
             # Calculate averages
-            summary['avg_daily_calories'] = round(total_calories / days_with_meals) if days_with_meals > 0 else 0
-            summary['total_workouts'] = len(workout_days)
-            summary['avg_sleep_hours'] = round(total_sleep / days_with_sleep, 1) if days_with_sleep > 0 else 0
+            summary['avg_daily_calories'] = round(sum(calorie_days) / len(calorie_days)) if calorie_days else 0
+            summary['total_workouts'] = len(exercise_days)
+            summary['avg_sleep_hours'] = round(sum(sleep_hours) / len(sleep_hours), 1) if sleep_hours else 0
             summary['hydration_consistency'] = round((days_with_water / 7) * 100)
             
             # Get weight trend
-            weight_entries = await self.supabase_service.get_weight_entries(
-                user_id, 
-                start_date=str(start_date),
-                end_date=str(end_date)
-            )
             summary['weight_trend'] = self._calculate_weight_trend(weight_entries)
             
             return summary
@@ -892,15 +850,14 @@ class ChatContextManager:
     async def _save_context(self, user_id: str, target_date: date, context: Dict, version: int):
         """Save context to database"""
         try:
-            self.supabase_service.client.table('chat_contexts')\
+            await self.supabase_service.execute(self.supabase_service.client.table('chat_contexts')\
                 .upsert({
                     'user_id': user_id,
                     'date': str(target_date),
                     'context_data': context,
                     'version': version,
                     'last_updated': datetime.now().isoformat()
-                })\
-                .execute()
+                }))
         except Exception as e:
             print(f"⚠️ Error saving context: {e}")
 
@@ -909,11 +866,10 @@ class ChatContextManager:
         today = datetime.now().date()
         
         try:
-            response = self.supabase_service.client.table('chat_contexts')\
+            response = await self.supabase_service.execute(self.supabase_service.client.table('chat_contexts')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(today))\
-                .execute()
+                .eq('date', str(today)))
             
             if response.data:
                 context_record = response.data[0]
@@ -153,12 +153,11 @@ class HealthChatService:
         
         try:
             # Get today's meals
-            meals_response = self.supabase_service.client.table('meal_entries')\
+            meals_response = await self.supabase_service.execute(self.supabase_service.client.table('meal_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .gte('meal_date', f"{target_date}T00:00:00")\
-                .lte('meal_date', f"{target_date}T23:59:59")\
-                .execute()
+                .gte('meal_date', str(target_date))\
+                .lt('meal_date', str(target_date + timedelta(days=1))))
             activities['meals'] = meals_response.data if meals_response.data else []
         except Exception as e:
             print(f"⚠️ Error fetching meals: {e}")
@@ -166,11 +165,10 @@ class HealthChatService:
         
         try:
             # Get today's water intake
-            water_response = self.supabase_service.client.table('daily_water')\
+            water_response = await self.supabase_service.execute(self.supabase_service.client.table('daily_water')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             activities['water'] = water_response.data[0] if water_response.data else {}
         except Exception as e:
             print(f"⚠️ Error fetching water: {e}")
@@ -178,11 +176,10 @@ class HealthChatService:
         
         try:
             # Get today's exercise
-            exercise_response = self.supabase_service.client.table('exercise_logs')\
+            exercise_response = await self.supabase_service.execute(self.supabase_service.client.table('exercise_logs')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('exercise_date', str(target_date))\
-                .execute()
+                .eq('exercise_date', str(target_date)))
             activities['exercise'] = exercise_response.data if exercise_response.data else []
         except Exception as e:
             print(f"⚠️ Error fetching exercise: {e}")
@@ -190,11 +187,10 @@ class HealthChatService:
         
         try:
             # Get today's sleep
-            sleep_response = self.supabase_service.client.table('sleep_entries')\
+            sleep_response = await self.supabase_service.execute(self.supabase_service.client.table('sleep_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             activities['sleep'] = sleep_response.data[0] if sleep_response.data else {}
         except Exception as e:
             print(f"⚠️ Error fetching sleep: {e}")
@@ -209,11 +205,10 @@ class HealthChatService:
         
         try:
             # Get today's weight
-            weight_response = self.supabase_service.client.table('weight_entries')\
+            weight_response = await self.supabase_service.execute(self.supabase_service.client.table('weight_entries')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             activities['weight'] = weight_response.data[0] if weight_response.data else {}
         except Exception as e:
             print(f"⚠️ Error fetching weight: {e}")
@@ -221,11 +216,10 @@ class HealthChatService:
         
         try:
             # Get today's steps
-            steps_response = self.supabase_service.client.table('daily_steps')\
+            steps_response = await self.supabase_service.execute(self.supabase_service.client.table('daily_steps')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('date', str(target_date))\
-                .execute()
+                .eq('date', str(target_date)))
             activities['steps'] = steps_response.data[0] if steps_response.data else {}
         except Exception as e:
             print(f"⚠️ Error fetching steps: {e}")
@@ -690,7 +684,16 @@ Exercise: {exercise_minutes} minutes ({exercises_done} exercises completed)
                 return redirect_msg
             # ================================================
             
-            # Save user message
+            # Today's session + recent messages in one round trip, read before this
+            # message is saved so it isn't sent to the model twice
+            recent_messages = []
+            try:
+                _, recent_messages = await self.supabase_service.get_chat_bootstrap(user_id, limit=10)
+                print(f"💬 Retrieved {len(recent_messages)} recent messages")
+            except Exception as e:
+                print(f"⚠️ Error getting recent chat context: {e}")
+            
+            # Save user message (session id is cached by the bootstrap above)
             try:
                 await self.supabase_service.save_chat_message(user_id, message, is_user=True)
             except Exception as e:
@@ -704,14 +707,6 @@ Exercise: {exercise_minutes} minutes ({exercises_done} exercises completed)
                 print(f"⚠️ Falling back to basic context: {e}")
                 user_context = await self.get_enhanced_context(user_id)
             
-            # Get recent messages
-            recent_messages = []
-            try:
-                recent_messages = await self.supabase_service.get_recent_chat_context(user_id, limit=10)
-                print(f"💬 Retrieved {len(recent_messages)} recent messages")
-            except Exception as e:
-                print(f"⚠️ Error getting recent chat context: {e}")
-            
             # Create enhanced system prompt
             system_prompt = self._create_enhanced_system_prompt(user_context)
             print(f"📝 System prompt created: {len(system_prompt)} characters")
@@ -768,7 +763,9 @@ Exercise: {exercise_minutes} minutes ({exercises_done} exercises completed)
             if self.weekly_manager:
                 try:
                     current_week = await self.weekly_manager.get_or_create_weekly_context(user_id)
-                    previous_weeks = await self.weekly_manager.get_recent_weeks_context(user_id, weeks_count=include_weeks)
+                    previous_weeks = await self.weekly_manager.get_recent_weeks_context(
+                        user_id, weeks_count=include_weeks, include_context=False
+                    )
                     
                     # Add weekly data to context
                     basic_context['current_week'] = current_week.get('summary', {})
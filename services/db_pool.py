@@ -0,0 +1,130 @@
+# services/db_pool.py
+"""
+Optional direct Postgres access (asyncpg) alongside the PostgREST client.
+
+SupabaseService uses this pool for the handful of queries that have a SQL
+fast path when SUPABASE_DB_URL is set; everything else, and everything when
+it is unset, goes through PostgREST over HTTP. SUPABASE_DB_URL may point at
+Supavisor's transaction pooler (port 6543), so the pool is configured to be
+safe there: no server-side prepared statements survive a transaction.
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Global pool - created in main.py lifespan when SUPABASE_DB_URL is set
+_db_pool: Optional[asyncpg.Pool] = None
+_pool_health_task: Optional[asyncio.Task] = None
+
+# Size the pool from observed load (Little's law): connections busy at peak
+# = avg query seconds * peak queries/sec, e.g. 20 ms * 1000 qps = 20. Keep
+# min near 3/4 of that so bursts don't wait on new TLS connections.
+POOL_MAX_SIZE = int(os.getenv("SUPABASE_POOL_MAX", "50"))
+POOL_MIN_SIZE = min(int(os.getenv("SUPABASE_POOL_MIN", "10")), POOL_MAX_SIZE)
+POOL_HEALTH_INTERVAL = 60
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Decode json/jsonb columns into Python objects, the same as PostgREST returns them"""
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema='pg_catalog'
+        )
+
+
+async def _pool_health(pool: asyncpg.Pool) -> None:
+    """
+    Ping the database every POOL_HEALTH_INTERVAL seconds. If the ping fails the
+    server side has probably dropped us (pooler restart, network blip), so expire
+    every idle connection and let the next acquire reconnect instead of failing.
+    """
+    while True:
+        await asyncio.sleep(POOL_HEALTH_INTERVAL)
+        try:
+            await pool.fetchval('SELECT 1', timeout=5)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Postgres pool health check failed, recycling connections: %s", e)
+            await pool.expire_connections()
+
+
+async def init_db_pool() -> Optional[asyncpg.Pool]:
+    """
+    Create the direct Postgres connection pool.
+    Returns None when SUPABASE_DB_URL is not configured - callers then use PostgREST.
+    """
+    global _db_pool, _pool_health_task
+    dsn = os.getenv("SUPABASE_DB_URL")
+    if not dsn:
+        logger.info("SUPABASE_DB_URL not set - using PostgREST for all queries")
+        return None
+
+    if _db_pool is None:
+        _db_pool = await asyncpg.create_pool(
+            dsn,
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=300,
+            # Replace connections periodically so a dead or bloated backend doesn't linger
+            # (asyncpg has no time-based recycle; release already resets session state)
+            max_queries=50_000,
+            command_timeout=60,
+            # Supavisor's transaction pooler does not keep prepared statements between transactions:
+            # no statement cache, so asyncpg uses unnamed statements that die with the transaction
+            statement_cache_size=0,
+            max_cached_statement_lifetime=0,
+            server_settings={'search_path': 'public'},
+            init=_init_connection
+        )
+        _pool_health_task = asyncio.create_task(_pool_health(_db_pool))
+        logger.info("Postgres connection pool initialized (%s-%s connections)", POOL_MIN_SIZE, POOL_MAX_SIZE)
+    return _db_pool
+
+
+def get_db_pool() -> Optional[asyncpg.Pool]:
+    """Get the global pool, or None if direct Postgres access is disabled"""
+    return _db_pool
+
+
+async def close_db_pool() -> None:
+    """Close the global pool on shutdown"""
+    global _db_pool, _pool_health_task
+    if _pool_health_task is not None:
+        _pool_health_task.cancel()
+        _pool_health_task = None
+    if _db_pool is not None:
+        await _db_pool.close()
+        _db_pool = None
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def record_to_dict(record: asyncpg.Record) -> Dict[str, Any]:
+    """Convert an asyncpg record to the JSON-shaped dict PostgREST would have returned"""
+    return {key: _to_json_value(value) for key, value in record.items()}
+
+
+def quote_ident(name: str) -> str:
+    """Quote a column/table name for safe interpolation into SQL"""
+    return '"' + name.replace('"', '""') + '"'
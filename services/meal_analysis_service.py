@@ -73,17 +73,10 @@ class MealAnalysisService:
         
         # Not cached, proceed with normal analysis
         print(f"🔍 No cache found, analyzing {food_item}")
-        nutrition_data = await self.analyze_meal(
+        # The meal's search_hash is generated by Postgres when it is saved
+        return await self.analyze_meal(
             food_item, quantity, user_context, preparation
         )
-        
-        # Generate search hash for future lookups
-        import hashlib
-        nutrition_data['search_hash'] = hashlib.md5(
-            f"{food_item.lower().strip()}::{quantity.lower().strip()}".encode()
-        ).hexdigest()
-        
-        return nutrition_data
     
     def _is_complex_food(self, food_item: str, preparation: Optional[str]) -> bool:
         """Determine if food requires ChatGPT analysis"""
@@ -1,3 +1,4 @@
+import asyncio
 import re
 from typing import List, Dict, Any, Tuple
 from services.meal_analysis_service import get_meal_analysis_service
@@ -367,15 +368,18 @@ class MealParserService:
             'fat_g': 0, 'fiber_g': 0, 'sugar_g': 0, 'sodium_mg': 0
         }
         
-        for food, quantity in food_items:
-            # Each component can use cache
-            component_nutrition = await self.meal_service.analyze_meal_with_cache(
+        # Each component can use cache - analyze them concurrently, not one round trip after another
+        analyses = await asyncio.gather(*[
+            self.meal_service.analyze_meal_with_cache(
                 food_item=food,
                 quantity=quantity,
                 user_context=user_context,
                 user_id=user_id
             )
-            
+            for food, quantity in food_items
+        ])
+        
+        for (food, quantity), component_nutrition in zip(food_items, analyses):
             components.append({
                 'food': food,
                 'quantity': quantity,
@@ -387,18 +391,11 @@ class MealParserService:
                 if key in component_nutrition:
                     total_nutrition[key] += component_nutrition[key]
         
-        # Generate hash for the complete meal
-        import hashlib
-        search_hash = hashlib.md5(
-            f"{meal_input.lower().strip()}::{default_quantity.lower().strip()}".encode()
-        ).hexdigest()
-        
         # Return aggregated result
         result = {
             **total_nutrition,
             'components': components,
             'data_source': 'multi-food-parser',
-            'search_hash': search_hash,
             'healthiness_score': 7,  # Calculate based on components
             'suggestions': 'Balanced meal with multiple components',
             'nutrition_notes': f'Analyzed {len(components)} food items'
@@ -1,11 +1,152 @@
 # services/supabase_service.py
 from supabase import create_client, Client
+from postgrest.types import ReturnMethod
+from postgrest.utils import SyncClient
+import httpx
 import os
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any, Tuple, TypedDict
 import uuid
+import asyncio
+import copy
+import functools
+import hashlib
+import random
+import logging
+import threading
+import orjson
 from datetime import datetime, date, timezone, timedelta
+from services.db_pool import get_db_pool, record_to_dict, quote_ident
+from utils.ttl_cache import AsyncTTLCache
+
+logger = logging.getLogger(__name__)
+
+def db_safe(default: Any = None):
+    """
+    Log and swallow any error from the wrapped query method, returning default instead -
+    for reads and best-effort writes whose callers treat "nothing" and "failed" alike
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                logger.exception("%s failed", fn.__name__)
+                # Fresh copy so a caller appending to a [] default can't leak into the next call
+                return copy.copy(default)
+        return wrapper
+    return decorator
+
+def _first(response, default: Any = None) -> Any:
+    """First row of a PostgREST response, or default when it returned none"""
+    return response.data[0] if response.data else default
+
+def _first_or_raise(response) -> Dict[str, Any]:
+    """First row of a write's returned representation - an empty one means the write didn't land"""
+    if not response.data:
+        raise Exception("No data returned from Supabase")
+    return response.data[0]
+
+# Connection-level failures: the request never reached PostgREST, so any query is safe to resend
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+QUERY_ATTEMPTS = 3
+
+def meal_search_hash(food_item: str, quantity: str) -> str:
+    """Cache key for identical meals - mirrors the generated meal_entries.search_hash column"""
+    # strip(' ') like SQL btrim(): only spaces, not tabs/newlines/NBSP
+    return hashlib.md5(
+        f"{food_item.strip(' ').lower()}::{quantity.strip(' ').lower()}".encode()
+    ).hexdigest()
+
+# History rows - PostgREST renames and casts columns so rows come back in response shape,
+# the TypedDicts only describe that shape (no per-row object is built)
+class WaterHistoryEntry(TypedDict):
+    id: str
+    user_id: str
+    date: str
+    glasses_consumed: int
+    total_ml: float
+    target_ml: float
+    notes: Optional[str]
+    created_at: str
+    updated_at: str
+
+class StepHistoryEntry(TypedDict):
+    id: str
+    userId: str
+    date: str
+    steps: int
+    goal: int
+    caloriesBurned: float
+    distanceKm: float
+    activeMinutes: int
+    sourceType: str
+    lastSynced: Optional[str]
+    createdAt: str
+    updatedAt: str
+
+class WeightEntry(TypedDict):
+    id: str
+    user_id: str
+    date: str
+    weight: float
+    notes: Optional[str]
+    body_fat_percentage: Optional[float]
+    muscle_mass_kg: Optional[float]
+    created_at: str
+    updated_at: str
+
+WATER_HISTORY_COLUMNS = (
+    'id,user_id,date,glasses_consumed,total_ml::float8,target_ml::float8,'
+    'notes,created_at,updated_at'
+)
+STEP_HISTORY_COLUMNS = (
+    'id,userId:user_id,date,steps,goal,caloriesBurned:calories_burned::float8,'
+    'distanceKm:distance_km::float8,activeMinutes:active_minutes,sourceType:source_type,'
+    'lastSynced:last_synced,createdAt:created_at,updatedAt:updated_at'
+)
+WEIGHT_COLUMNS = (
+    'id,user_id,date,weight::float8,notes,body_fat_percentage::float8,'
+    'muscle_mass_kg::float8,created_at,updated_at'
+)
+# Only the columns the sleep list/stats endpoints read
+SLEEP_HISTORY_COLUMNS = (
+    'id,user_id,date,bedtime,wake_time,total_hours,quality_score,deep_sleep_hours,'
+    'sleep_issues,notes,created_at,updated_at'
+)
+
+# Rows fetched per round-trip when streaming exports
+STREAM_PAGE_SIZE = 500
+
+# Most chat rows written per INSERT by the batching flusher
+CHAT_FLUSH_BATCH = 100
+
+class _ORJSONResponse(httpx.Response):
+    """httpx response whose .json() - what postgrest-py decodes every body with - runs orjson"""
+
+    def json(self, **kwargs: Any) -> Any:
+        return orjson.loads(self.content)
+
+class _ORJSONSyncClient(SyncClient):
+    """PostgREST session that encodes request bodies and decodes responses with orjson"""
+
+    def request(self, method: str, url: Any, *, json: Any = None, **kwargs: Any) -> httpx.Response:
+        if json is not None:
+            kwargs['content'] = orjson.dumps(json)
+            headers = httpx.Headers(kwargs.get('headers'))
+            headers.setdefault('Content-Type', 'application/json')
+            kwargs['headers'] = headers
+        response = super().request(method, url, **kwargs)
+        response.__class__ = _ORJSONResponse
+        return response
 
 class SupabaseService:
+    __slots__ = (
+        'client', '_user_cache', '_cached_meal_cache', '_latest_weight_cache', '_supplement_pref_cache',
+        '_supplement_history_cache', '_chat_session_cache', '_chat_session_day', '_chat_queue', '_chat_flusher',
+        '_background_writes', '_log_write_listeners'
+    )
+
     def __init__(self):
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_SERVICE_KEY")
@@ -14,67 +155,234 @@ class SupabaseService:
             raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in environment variables")
         
         self.client: Client = create_client(url, key)
-        print("✅ Supabase client initialized")
+        self._configure_http_session()
+        # Profiles are re-read several times per request chain; keep them for a minute
+        self._user_cache = AsyncTTLCache(maxsize=10_000, ttl=60)
+        # Rapid re-logging of the same food looks up the same (user, search_hash) repeatedly
+        self._cached_meal_cache = AsyncTTLCache(maxsize=10_000, ttl=300)
+        # Read on nearly every dashboard render
+        self._latest_weight_cache = AsyncTTLCache(maxsize=10_000, ttl=30)
+        self._supplement_pref_cache = AsyncTTLCache(maxsize=10_000, ttl=60)
+        # Dashboard refreshes repeat the same history window; invalidated per user on log writes
+        self._supplement_history_cache = AsyncTTLCache(maxsize=1_000, ttl=60)
+        # Today's chat session id per user - emptied when the UTC date changes
+        self._chat_session_cache = AsyncTTLCache(maxsize=10_000, ttl=24 * 60 * 60)
+        self._chat_session_day: Optional[date] = None
+        # Chat messages are written in batches by a background task (started from the app lifespan)
+        self._chat_queue: Optional[asyncio.Queue] = None
+        self._chat_flusher: Optional[asyncio.Task] = None
+        # Fire-and-forget inserts still running - referenced here so they aren't garbage collected
+        self._background_writes: set = set()
+        # Called with the user id after each health-log write (see add_log_write_listener)
+        self._log_write_listeners: List[Callable[[str], None]] = []
+        self._warm_up()
+        logger.info("Supabase client initialized")
+
+    def _configure_http_session(self) -> None:
+        """
+        Swap PostgREST's default httpx session for one sized for the worker threads
+        that run queries concurrently: HTTP/2, pooled keep-alive connections, fast connect timeout,
+        orjson for request and response bodies
+        """
+        postgrest = self.client.postgrest
+        default_session = postgrest.session
+        postgrest.session = _ORJSONSyncClient(
+            base_url=default_session.base_url,
+            headers=default_session.headers,
+            timeout=httpx.Timeout(60.0, connect=2.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30),
+            follow_redirects=True,
+            http2=True
+        )
+        default_session.close()
+
+    def close(self) -> None:
+        """Close the pooled PostgREST connections"""
+        self.client.postgrest.session.close()
+
+    def _warm_up(self) -> None:
+        """Prime the PostgREST connection so the first request skips the TCP/TLS handshake"""
+        try:
+            self.client.table('chat_messages').select('id').limit(0).execute()
+        except Exception as e:
+            logger.warning("Supabase warm-up query failed: %s", e)
+
+    async def _execute(self, query):
+        """
+        Run a PostgREST query in a worker thread so the event loop keeps serving other requests,
+        retrying with jittered backoff when the connection could not be made
+        """
+        for attempt in range(1, QUERY_ATTEMPTS + 1):
+            try:
+                return await asyncio.to_thread(query.execute)
+            except RETRYABLE_ERRORS as e:
+                if attempt == QUERY_ATTEMPTS:
+                    raise
+                delay = random.uniform(0, 0.1 * 2 ** attempt)
+                logger.warning("Supabase connection failed (%s), retry %d in %.2fs", e, attempt, delay)
+                await asyncio.sleep(delay)
+
+    async def execute(self, query):
+        """Run a query built by another module on self.client without blocking the event loop"""
+        return await self._execute(query)
+
+    async def fetch_daily_bundle(self, user_id: str, entry_date: date) -> Dict[str, Any]:
+        """Fetch the user profile and one day's meals, water and steps concurrently"""
+        user, meals, water, steps = await asyncio.gather(
+            self.get_user_by_id(user_id),
+            self.get_meals_by_date(user_id, entry_date),
+            self.get_water_entry_by_date(user_id, entry_date),
+            self.get_step_entry_by_date(user_id, entry_date)
+        )
+        return {
+            'user': user,
+            'meals': meals,
+            'water': water,
+            'steps': steps
+        }
     
+    # Multi-user batch reads - one round-trip for a whole dashboard instead of one per user
+    @db_safe(default={})
+    async def get_step_entries_for_users(self, user_ids: List[str], entry_date: date) -> Dict[str, Dict[str, Any]]:
+        """Get each user's step entry for a date, keyed by user_id (users without one are absent)"""
+        response = await self._execute(
+            self.client.table('daily_steps')
+            .select('*')
+            .in_('user_id', user_ids)
+            .eq('date', str(entry_date))
+        )
+        return {row['user_id']: row for row in response.data or []}
+
+    @db_safe(default={})
+    async def get_water_entries_for_users(self, user_ids: List[str], entry_date: date) -> Dict[str, Dict[str, Any]]:
+        """Get each user's water entry for a date, keyed by user_id (users without one are absent)"""
+        response = await self._execute(
+            self.client.table('daily_water')
+            .select('*')
+            .in_('user_id', user_ids)
+            .eq('date', str(entry_date))
+        )
+        return {row['user_id']: row for row in response.data or []}
+
+    @db_safe(default={})
+    async def get_meals_for_users(self, user_ids: List[str], entry_date: date) -> Dict[str, List[Dict[str, Any]]]:
+        """Get each user's meals for a date, keyed by user_id (every requested user is present)"""
+        response = await self._execute(
+            self.client.table('meal_entries')
+            .select('*')
+            .in_('user_id', user_ids)
+            .gte('meal_date', str(entry_date))
+            .lt('meal_date', str(entry_date + timedelta(days=1)))
+            .order('meal_date', desc=True)
+        )
+        meals_by_user: Dict[str, List[Dict[str, Any]]] = {user_id: [] for user_id in user_ids}
+        for row in response.data or []:
+            meals_by_user.setdefault(row['user_id'], []).append(row)
+        return meals_by_user
+
+    @db_safe(default={})
+    async def get_daily_nutrition_for_users(self, user_ids: List[str], entry_date: date) -> Dict[str, Dict[str, Any]]:
+        """Get each user's nutrition totals for a date, keyed by user_id (users without meals are absent)"""
+        response = await self._execute(
+            self.client.rpc('get_daily_nutrition_for_users', {
+                'p_user_ids': user_ids,
+                'p_date': str(entry_date)
+            })
+        )
+        return {row['user_id']: row for row in response.data or []}
+
     # User Management Operations
     async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user in the database"""
         try:
-            print(f"🔍 Creating user in Supabase: {user_data.get('email')}")
+            logger.debug("Creating user in Supabase: %s", user_data.get('email'))
             
-            if 'water_intake_glasses' not in user_data:
-                water_intake = user_data.get('water_intake', 2.0)
-                user_data['water_intake_glasses'] = round(water_intake * 4)
-
             # Ensure we have an ID
             if 'id' not in user_data:
                 user_data['id'] = str(uuid.uuid4())
             
             # Insert user into Supabase
-            response = self.client.table('users').insert(user_data).execute()
+            response = await self._execute(self.client.table('users').insert(user_data))
             
             if response.data:
-                print(f"✅ User created successfully: {response.data[0]['id']}")
+                logger.debug("User created successfully: %s", response.data[0]['id'])
                 return response.data[0]
             else:
                 raise Exception("No data returned from Supabase")
                 
         except Exception as e:
-            print(f"❌ Error creating user in Supabase: {e}")
+            logger.error("Error creating user in Supabase: %s", e)
             raise Exception(f"Failed to create user: {str(e)}")
     
     async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get user by ID (served from the in-process cache when fresh)"""
+        return await self._user_cache.get_or_load(user_id, lambda: self._fetch_user_by_id(user_id))
+
+    def invalidate_user_cache(self, user_id: str) -> None:
+        """Drop a cached profile - call after writing to the users row directly"""
+        self._user_cache.pop(user_id)
+
+    def invalidate_daily_session(self, user_id: str) -> None:
+        """Forget a user's cached chat session id - call after deleting or replacing their sessions"""
+        self._chat_session_cache.pop(user_id)
+
+    def add_log_write_listener(self, listener: Callable[[str], None]) -> None:
+        """Call listener(user_id) after a meal, water, steps, weight, sleep, exercise or supplement log write - for caches built on those logs"""
+        self._log_write_listeners.append(listener)
+
+    def _log_written(self, rows: List[Dict[str, Any]]) -> None:
+        for user_id in {row['user_id'] for row in rows if row.get('user_id')}:
+            for listener in self._log_write_listeners:
+                listener(user_id)
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Hit rates of the in-process caches"""
+        return {
+            'users': self._user_cache.cache_info(),
+            'cached_meals': self._cached_meal_cache.cache_info(),
+            'latest_weight': self._latest_weight_cache.cache_info(),
+            'supplement_preferences': self._supplement_pref_cache.cache_info(),
+            'supplement_history': self._supplement_history_cache.cache_info(),
+            'chat_sessions': self._chat_session_cache.cache_info()
+        }
+
+    @db_safe()
+    async def _fetch_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user by ID from database"""
-        try:
-            response = self.client.table('users') \
-                .select("*") \
-                .eq('id', user_id) \
-                .single() \
-                .execute()
-            
-            return response.data if response.data else None
-            
-        except Exception as e:
-            print(f"❌ Supabase fetch error: {str(e)}")
-            return None
+        pool = get_db_pool()
+        if pool is not None:
+            async with pool.acquire() as con:
+                row = await con.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
+            return record_to_dict(row) if row else None
+            
+        response = await self._execute(
+            self.client.table('users')
+            .select("*")
+            .eq('id', user_id)
+            .maybe_single()
+        )
+            
+        return response.data if response else None
     
+    @db_safe()
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Get user by email"""
-        try:
-            print(f"🔍 Getting user by email: {email}")
-            
-            response = self.client.table('users').select('*').eq('email', email).execute()
-            
-            if response.data:
-                print(f"✅ User found by email: {email}")
-                return response.data[0]
-            else:
-                print(f"❌ User not found by email: {email}")
-                return None
-                
-        except Exception as e:
-            print(f"❌ Error getting user by email: {e}")
-            return None
+        logger.debug("Getting user by email: %s", email)
+            
+        pool = get_db_pool()
+        if pool is not None:
+            async with pool.acquire() as con:
+                row = await con.fetchrow("SELECT * FROM get_user_by_email($1)", email)
+            user = record_to_dict(row) if row else None
+        else:
+            # Unique lower(email) index lookup
+            response = await self._execute(
+                self.client.rpc('get_user_by_email', {'p_email': email})
+            )
+            user = _first(response)
+            
+        logger.debug("User %s by email: %s", "found" if user else "not found", email)
+        return user
     
     async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -82,26 +390,20 @@ class SupabaseService:
         Handles all Phase 1-3 fields
         """
         try:
-            # Add timestamp
-            update_data['updated_at'] = datetime.utcnow().isoformat()
-            
-            # Handle array fields properly for PostgreSQL
-            array_fields = ['sleep_issues', 'dietary_preferences', 'preferred_workouts', 
-                          'medical_conditions', 'available_equipment']
+            # Drop the profile before and after the write: before so a load already in
+            # flight isn't cached, after so a reload racing the write can't keep the old row
+            self._user_cache.pop(user_id)
             
-            for field in array_fields:
-                if field in update_data:
-                    # Ensure it's a list and not None
-                    if update_data[field] is None:
-                        update_data[field] = []
-                    elif not isinstance(update_data[field], list):
-                        update_data[field] = [update_data[field]]
+            # updated_at is set by the set_updated_at trigger; NULL array fields are
+            # turned into '{}' by the users_normalize_arrays trigger
             
             # Execute update query
-            response = self.client.table('users') \
-                .update(update_data) \
-                .eq('id', user_id) \
-                .execute()
+            response = await self._execute(
+                self.client.table('users')
+                .update(update_data)
+                .eq('id', user_id)
+            )
+            self._user_cache.pop(user_id)
             
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -109,296 +411,294 @@ class SupabaseService:
                 return None
                 
         except Exception as e:
-            print(f"❌ Supabase update error: {str(e)}")
+            logger.error("Supabase update error: %s", e)
             raise
 
     async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user profile including step goal"""
-        try:
-            response = self.client.table('users').select('*').eq('id', user_id).execute()
-            if response.data:
-                return response.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ Error getting user: {e}")
-            return None
+        return await self.get_user_by_id(user_id)
     
     # Meal Operations (we'll expand this later)
     async def create_meal_entry(self, meal_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new meal entry"""
         try:
-            print(f"🔍 Creating meal entry with data: {meal_data}")
-            
-            # Ensure all nutrition fields are present
-            required_fields = ['fiber_g', 'sugar_g', 'sodium_mg']
-            for field in required_fields:
-                if field not in meal_data:
-                    print(f"⚠️ Missing {field} in meal_data, setting to 0")
-                    meal_data[field] = 0
+            logger.debug("Creating meal entry with data: %s", meal_data)
+            
+            # fiber_g/sugar_g/sodium_mg default to 0 in the schema when omitted;
+            # search_hash is a generated column - Postgres computes it from food_item/quantity
+            meal_data.pop('search_hash', None)
+            
+            pool = get_db_pool()
+            if pool is not None:
+                # Let Postgres coerce the JSON values to the column types, like PostgREST does
+                columns = ', '.join(quote_ident(column) for column in meal_data)
+                async with pool.acquire() as con:
+                    row = await con.fetchrow(
+                        f"INSERT INTO meal_entries ({columns}) "
+                        f"SELECT {columns} FROM jsonb_populate_record(NULL::meal_entries, $1::jsonb) "
+                        "RETURNING *",
+                        meal_data
+                    )
+                if row:
+                    created_meal = record_to_dict(row)
+                    self._invalidate_cached_meals([created_meal])
+                    self._log_written([created_meal])
+                    return created_meal
+                raise Exception("No data returned from insert")
             
-            response = self.client.table('meal_entries').insert(meal_data).execute()
+            response = await self._execute(self.client.table('meal_entries').insert(meal_data))
             
             if response.data:
                 created_meal = response.data[0]
+                self._invalidate_cached_meals([created_meal])
+                self._log_written([created_meal])
                 return created_meal
             else:
                 raise Exception("No data returned from insert")
                 
         except Exception as e:
-            print(f"❌ Error creating meal entry: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error creating meal entry: %s", e)
             raise e
         
-    async def get_meal_by_id(self, meal_id: str):
-        """Get meal by ID"""
+    async def create_meal_entries_bulk(self, meals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several meal entries in one round-trip"""
+        if not meals:
+            return []
         try:
-            response = self.client.table('meal_entries')\
-                .select('*')\
-                .eq('id', meal_id)\
-                .execute()
+            logger.debug("Creating %s meal entries", len(meals))
+            
+            # search_hash is generated by Postgres
+            rows = []
+            for meal in meals:
+                row = dict(meal)
+                row.pop('search_hash', None)
+                rows.append(row)
+            
+            pool = get_db_pool()
+            if pool is not None:
+                # Rows sharing a column set go in one statement so omitted columns keep their defaults
+                batches: Dict[tuple, List[Dict[str, Any]]] = {}
+                for row in rows:
+                    batches.setdefault(tuple(row), []).append(row)
+                
+                created = []
+                async with pool.acquire() as con:
+                    async with con.transaction():
+                        for keys, batch in batches.items():
+                            columns = ', '.join(quote_ident(column) for column in keys)
+                            records = await con.fetch(
+                                f"INSERT INTO meal_entries ({columns}) "
+                                f"SELECT {columns} FROM jsonb_populate_recordset(NULL::meal_entries, $1::jsonb) "
+                                "RETURNING *",
+                                batch
+                            )
+                            created.extend(record_to_dict(record) for record in records)
+                self._invalidate_cached_meals(created)
+                self._log_written(created)
+                return created
+            
+            response = await self._execute(
+                self.client.table('meal_entries').insert(rows, default_to_null=False)
+            )
+            self._invalidate_cached_meals(response.data or [])
+            self._log_written(response.data or [])
+            return response.data or []
             
-            return response.data[0] if response.data else None
         except Exception as e:
-            print(f"Error getting meal: {e}")
-            return None
+            logger.error("Error creating meal entries: %s", e)
+            raise e
+        
+    @db_safe()
+    async def get_meal_by_id(self, meal_id: str):
+        """Get meal by ID"""
+        response = await self._execute(
+            self.client.table('meal_entries')
+            .select('*')
+            .eq('id', meal_id)
+        )
+            
+        return _first(response)
         
     async def update_meal(self, meal_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a meal entry"""
         try:
-            response = self.client.table('meal_entries').update(update_data).eq('id', meal_id).execute()
-            return response.data[0] if response.data else {}
+            response = await self._execute(
+                self.client.table('meal_entries').update(update_data).eq('id', meal_id)
+            )
+            if response.data:
+                # The edit may have changed food_item/quantity, so the old hash is unknown - drop the user's entries
+                user_id = response.data[0]['user_id']
+                self._cached_meal_cache.pop_where(lambda key: key[0] == user_id)
+                self._log_written(response.data)
+            return _first(response, {})
         except Exception as e:
-            print(f"❌ Error updating meal: {e}")
+            logger.error("Error updating meal: %s", e)
             raise
 
+    @db_safe(default=False)
     async def delete_meal(self, meal_id: str):
         """Delete meal entry"""
-        try:
-            response = self.client.table('meal_entries')\
-                .delete()\
-                .eq('id', meal_id)\
-                .execute()
-            
-            return True
-        except Exception as e:
-            print(f"Error deleting meal: {e}")
-            return False
+        response = await self._execute(
+            self.client.table('meal_entries')
+            .delete()
+            .eq('id', meal_id)
+        )
+            
+        self._invalidate_cached_meals(response.data or [])
+        self._log_written(response.data or [])
+        return True
 
+    @db_safe()
     async def get_daily_nutrition(self, user_id: str, date: str) -> Optional[Dict[str, Any]]:
-        """Get daily nutrition summary for a specific date"""
-        try:
-            response = self.client.table('daily_nutrition')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .eq('date', date)\
-                .execute()
-            
-            if response.data and len(response.data) > 0:
-                return response.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ Error getting daily nutrition: {e}")
-            return None
-
-    async def create_daily_nutrition(self, nutrition_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new daily nutrition entry"""
-        try:
-            # Add timestamps
-            nutrition_data['created_at'] = datetime.now().isoformat()
-            nutrition_data['updated_at'] = datetime.now().isoformat()
-            
-            response = self.client.table('daily_nutrition').insert(nutrition_data).execute()
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
-        except Exception as e:
-            print(f"❌ Error creating daily nutrition: {e}")
-            raise Exception(f"Failed to create daily nutrition: {str(e)}")
-
-    async def update_daily_nutrition(self, entry_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Update an existing daily nutrition entry"""
-        try:
-            # Add timestamp
-            update_data['updated_at'] = datetime.now().isoformat()
-            
-            response = self.client.table('daily_nutrition')\
-                .update(update_data)\
-                .eq('id', entry_id)\
-                .execute()
-            
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
-        except Exception as e:
-            print(f"❌ Error updating daily nutrition: {e}")
-            raise Exception(f"Failed to update daily nutrition: {str(e)}")
+        """Get daily nutrition totals for a specific date (summed from meal_entries)"""
+        days = await self.get_daily_nutrition_range(user_id, date, date)
+        return days[0] if days else None
 
+    @db_safe(default=[])
     async def get_daily_nutrition_range(self, user_id: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
-        """Get daily nutrition summaries for a date range"""
-        try:
-            response = self.client.table('daily_nutrition')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .gte('date', start_date)\
-                .lte('date', end_date)\
-                .order('date', desc=True)\
-                .execute()
-            
-            return response.data or []
-        except Exception as e:
-            print(f"❌ Error getting daily nutrition range: {e}")
-            return []
+        """Get daily nutrition totals for a date range, one row per day with meals logged"""
+        pool = get_db_pool()
+        if pool is not None:
+            async with pool.acquire() as con:
+                rows = await con.fetch(
+                    "SELECT * FROM get_daily_nutrition_range($1, $2::text::date, $3::text::date)",
+                    user_id, start_date[:10], end_date[:10]
+                )
+            return [record_to_dict(row) for row in rows]
+
+        response = await self._execute(
+            self.client.rpc('get_daily_nutrition_range', {
+                'p_user_id': user_id,
+                'p_start_date': start_date[:10],
+                'p_end_date': end_date[:10]
+            })
+        )
+        return response.data or []
         
+    @db_safe(default=[])
     async def get_meals_by_date(self, user_id: str, date: date) -> List[Dict[str, Any]]:
         """Get all meals for a specific date"""
-        try:
-            next_day = date + timedelta(days=1)
-            
-            response = self.client.table('meal_entries')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .gte('meal_date', str(date))\
-                .lt('meal_date', str(next_day))\
-                .execute()
-            
-            meals = response.data if response.data else []
-            print(f"✅ Found {len(meals)} meals for {date}")
+        next_day = date + timedelta(days=1)
+            
+        pool = get_db_pool()
+        if pool is not None:
+            async with pool.acquire() as con:
+                rows = await con.fetch(
+                    "SELECT * FROM meal_entries "
+                    "WHERE user_id = $1 AND meal_date >= $2::date AND meal_date < $3::date",
+                    user_id, date, next_day
+                )
+            meals = [record_to_dict(row) for row in rows]
+            logger.debug("Found %s meals for %s", len(meals), date)
             return meals
-        except Exception as e:
-            print(f"❌ Error getting meals by date: {e}")
-            return []
+            
+        response = await self._execute(
+            self.client.table('meal_entries')
+            .select('*')
+            .eq('user_id', user_id)
+            .gte('meal_date', str(date))
+            .lt('meal_date', str(next_day))
+        )
+            
+        meals = response.data if response.data else []
+        logger.debug("Found %s meals for %s", len(meals), date)
+        return meals
         
     async def create_meal_preset(self, preset_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new meal preset"""
         try:
-            response = self.client.table('meal_presets').insert(preset_data).execute()
-            return response.data[0] if response.data else None
+            response = await self._execute(self.client.table('meal_presets').insert(preset_data))
+            return _first(response)
         except Exception as e:
-            print(f"❌ Error creating meal preset: {e}")
+            logger.error("Error creating meal preset: %s", e)
             raise
 
+    @db_safe(default=[])
     async def get_user_meal_presets(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all meal presets for a user"""
-        try:
-            response = self.client.table('meal_presets')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('usage_count', desc=True)\
-                .execute()
-            return response.data or []
-        except Exception as e:
-            print(f"❌ Error getting meal presets: {e}")
-            return []
+        response = await self._execute(
+            self.client.table('meal_presets')
+            .select('*')
+            .eq('user_id', user_id)
+            .order('usage_count', desc=True)
+        )
+        return response.data or []
 
     async def update_preset_usage(self, preset_id: str) -> None:
         """Increment usage count when preset is used"""
         try:
-            # Get current count
-            response = self.client.table('meal_presets')\
-                .select('usage_count')\
-                .eq('id', preset_id)\
-                .execute()
-            
-            if response.data:
-                current_count = response.data[0].get('usage_count', 0)
-                
-                # Update count and last used timestamp
-                self.client.table('meal_presets')\
-                    .update({
-                        'usage_count': current_count + 1,
-                        'last_used_at': datetime.now().isoformat()
-                    })\
-                    .eq('id', preset_id)\
-                    .execute()
+            # Atomic server-side increment (see supabase/migrations/*_increment_preset_usage.sql)
+            await self._execute(self.client.rpc('increment_preset_usage', {'p_id': preset_id}))
         except Exception as e:
-            print(f"⚠️ Error updating preset usage: {e}")
+            logger.warning("Error updating preset usage: %s", e)
 
     async def search_cached_meal(self, user_id: str, food_item: str, quantity: str) -> Optional[Dict[str, Any]]:
         """Search for previously logged identical meal"""
-        try:
-            import hashlib
-            # Generate consistent hash for this meal
-            search_hash = hashlib.md5(
-                f"{food_item.lower().strip()}::{quantity.lower().strip()}".encode()
-            ).hexdigest()
-            
-            # Look for recent identical meal (last 30 days)
-            thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
-            
-            response = self.client.table('meal_entries')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .eq('search_hash', search_hash)\
-                .gte('logged_at', thirty_days_ago)\
-                .order('logged_at', desc=True)\
-                .limit(1)\
-                .execute()
-            
-            if response.data:
-                print(f"✅ Found cached meal: {food_item}")
-                return response.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ Error searching cached meal: {e}")
-            return None
+        search_hash = meal_search_hash(food_item, quantity)
+        meal = await self._cached_meal_cache.get_or_load(
+            (user_id, search_hash),
+            lambda: self._fetch_cached_meal(user_id, search_hash)
+        )
+        if meal:
+            logger.debug("Found cached meal: %s", food_item)
+        return meal
+
+    @db_safe()
+    async def _fetch_cached_meal(self, user_id: str, search_hash: str) -> Optional[Dict[str, Any]]:
+        # Look for recent identical meal (last 30 days)
+        thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
+            
+        response = await self._execute(
+            self.client.table('meal_entries')
+            .select('*')
+            .eq('user_id', user_id)
+            .eq('search_hash', search_hash)
+            .gte('logged_at', thirty_days_ago)
+            .order('logged_at', desc=True)
+            .limit(1)
+            .maybe_single()
+        )
+        return response.data if response else None
+
+    def _invalidate_cached_meals(self, meals: List[Dict[str, Any]]) -> None:
+        """Drop search_cached_meal results a write may have changed"""
+        for meal in meals:
+            if meal.get('search_hash'):
+                self._cached_meal_cache.pop((meal['user_id'], meal['search_hash']))
 
+    @db_safe(default=[])
     async def get_recent_unique_meals(self, user_id: str, limit: int = 15) -> List[Dict[str, Any]]:
-        """Get recent unique meals for suggestions"""
-        try:
-            # Get more meals initially to ensure we have enough unique ones after deduplication
-            response = self.client.table('meal_entries')\
-                .select('food_item, quantity, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg, meal_type, logged_at, nutrition_data')\
-                .eq('user_id', user_id)\
-                .order('logged_at', desc=True)\
-                .limit(100)\
-                .execute()
-            
-            # Deduplicate by food_item only (not quantity) for more variety
-            seen = set()
-            unique_meals = []
-            
-            for meal in response.data or []:
-                # Create a normalized key from food_item
-                food_item = meal['food_item'].lower().strip()
-                
-                # Skip if we've already seen this exact food item
-                if food_item not in seen:
-                    seen.add(food_item)
-                    unique_meals.append(meal)
-                    
-                    # Stop once we have enough unique meals
-                    if len(unique_meals) >= limit:
-                        break
-            
-            print(f"✅ Found {len(unique_meals)} unique meals from {len(response.data or [])} total meals")
-            return unique_meals
-            
-        except Exception as e:
-            print(f"❌ Error getting recent meals: {e}")
-            return []
+        """Get recent unique meals for suggestions (deduplicated by food_item in Postgres)"""
+        response = await self._execute(
+            self.client.rpc('get_recent_unique_meals', {
+                'p_user_id': user_id,
+                'p_limit': limit
+            })
+        )
+            
+        unique_meals = response.data or []
+        logger.debug("Found %s unique meals", len(unique_meals))
+        return unique_meals
     
     # Chat/Conversation Operations (placeholder for later)
     async def create_conversation(self, conversation_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a conversation entry (placeholder for later)"""
         try:
-            print(f"🔍 Creating conversation for user: {conversation_data.get('user_id')}")
+            logger.debug("Creating conversation for user: %s", conversation_data.get('user_id'))
             
             if 'id' not in conversation_data:
                 conversation_data['id'] = str(uuid.uuid4())
             
-            response = self.client.table('conversations').insert(conversation_data).execute()
+            response = await self._execute(self.client.table('conversations').insert(conversation_data))
             
             if response.data:
-                print(f"✅ Conversation created: {response.data[0]['id']}")
+                logger.debug("Conversation created: %s", response.data[0]['id'])
                 return response.data[0]
             else:
                 raise Exception("No data returned from Supabase")
                 
         except Exception as e:
-            print(f"❌ Error creating conversation: {e}")
+            logger.error("Error creating conversation: %s", e)
             raise Exception(f"Failed to create conversation: {str(e)}")
     
     # Health check method
@@ -406,7 +706,7 @@ class SupabaseService:
         """Check if Supabase connection is working"""
         try:
             # Simple query to test connection
-            response = self.client.table('users').select('count').execute()
+            response = await self._execute(self.client.table('users').select('count'))
             
             return {
                 "status": "healthy",
@@ -421,338 +721,305 @@ class SupabaseService:
                 "timestamp": datetime.utcnow().isoformat()
             }
 
+    @db_safe(default=[])
     async def get_user_meals(self, user_id: str, limit: int = 20, date_from: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get user meals for date range"""
-        try:
-            print(f"🔍 Getting meals for user: {user_id}")
-        
-            query = self.client.table('meal_entries').select('*').eq('user_id', user_id)
+        logger.debug("Getting meals for user: %s", user_id)
         
-            if date_from:
-                query = query.gte('meal_date', date_from)
+        query = self.client.table('meal_entries').select('*').eq('user_id', user_id)
         
-            response = query.order('meal_date', desc=True).limit(limit).execute()
+        if date_from:
+            query = query.gte('meal_date', date_from)
         
-            print(f"✅ Found {len(response.data)} meals")
-            return response.data or []
+        response = await self._execute(query.order('meal_date', desc=True).limit(limit))
         
-        except Exception as e:
-            print(f"❌ Error getting user meals: {e}")
-            return []
+        meals = response.data or []
+        logger.debug("Found %s meals", len(meals))
+        return meals
         
+    async def stream_user_meals(self, user_id: str, date_from: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Yield a user's meals newest first as NDJSON lines, without buffering the full history"""
+        pool = get_db_pool()
+        if pool is not None:
+            sql = "SELECT * FROM meal_entries WHERE user_id = $1"
+            args = [user_id]
+            if date_from:
+                sql += " AND meal_date >= $2::text::timestamptz"
+                args.append(date_from)
+            # Same order as the PostgREST pages below
+            sql += " ORDER BY meal_date DESC, id DESC"
+
+            async with pool.acquire() as con:
+                # Server-side cursors only live inside a transaction
+                async with con.transaction():
+                    async for record in con.cursor(sql, *args, prefetch=STREAM_PAGE_SIZE):
+                        yield orjson.dumps(record_to_dict(record)) + b"\n"
+            return
+
+        # PostgREST fallback - keyset pages on (meal_date, id). A day's meals share one
+        # meal_date, so offset pages would repeat or skip rows at page edges
+        last = None
+        while True:
+            query = self.client.table('meal_entries').select('*').eq('user_id', user_id)
+            if date_from:
+                query = query.gte('meal_date', date_from)
+            if last is not None:
+                query = query.or_(
+                    f'meal_date.lt."{last["meal_date"]}",'
+                    f'and(meal_date.eq."{last["meal_date"]}",id.lt.{last["id"]})'
+                )
+            response = await self._execute(
+                query.order('meal_date', desc=True).order('id', desc=True).limit(STREAM_PAGE_SIZE)
+            )
+            rows = response.data or []
+            for row in rows:
+                yield orjson.dumps(row) + b"\n"
+            if len(rows) < STREAM_PAGE_SIZE:
+                return
+            last = rows[-1]
+
+    @db_safe(default=[])
     async def get_user_meals_by_date(self, user_id: str, date: str) -> List[Dict[str, Any]]:
         """Get user meals for a specific date"""
-        try:
-            print(f"🔍 Getting meals for user: {user_id}, date: {date}")
-    
-            # Handle different date formats
-            if 'T' in date:
-                date = date.split('T')[0]  # Extract just the date part
+        logger.debug("Getting meals for user: %s, date: %s", user_id, date)
     
-            # Query meals for the specific date - explicitly select all fields
-            start_date = f"{date}T00:00:00"
-            end_date = f"{date}T23:59:59"
+        # Half-open [day, next day) range on meal_date - walks the (user_id, meal_date) index
+        day = date[:10]
+        next_day = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).date().isoformat()
     
-            response = self.client.table('meal_entries').select(
+        response = await self._execute(
+            self.client.table('meal_entries')
+            .select(
                 'id, user_id, food_item, quantity, meal_type, calories, '
                 'protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg, '
                 'meal_date, logged_at, nutrition_data, preparation'
-            ).eq(
-                'user_id', user_id
-            ).gte(
-                'meal_date', start_date
-            ).lte(
-                'meal_date', end_date
-            ).order('meal_date', desc=True).execute()
+            )
+            .eq('user_id', user_id)
+            .gte('meal_date', day)
+            .lt('meal_date', next_day)
+            .order('meal_date', desc=True)
+        )
     
-            meals = response.data or []
+        meals = response.data or []
         
-            # Debug: Check what we're getting
-            print(f"✅ Found {len(meals)} meals for {date}")
-            for meal in meals:
-                print(f"   Meal: {meal.get('food_item')} - fiber: {meal.get('fiber_g')}, sugar: {meal.get('sugar_g')}, sodium: {meal.get('sodium_mg')}")
+        logger.debug("Found %s meals for %s", len(meals), date)
         
-            return meals
-    
-        except Exception as e:
-            print(f"❌ Error getting meals by date: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+        return meals
         
     # water functions
+    @db_safe()
     async def get_water_entry_by_date(self, user_id: str, entry_date: date) -> Optional[Dict[str, Any]]:
         """Get water entry for a specific date"""
-        try:
-            response = self.client.table('daily_water')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .eq('date', str(entry_date))\
-                .execute()
-            
-            if response.data:
-                return response.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ Error getting water entry by date: {e}")
-            return None
+        response = await self._execute(
+            self.client.table('daily_water')
+            .select('*')
+            .eq('user_id', user_id)
+            .eq('date', str(entry_date))
+        )
+            
+        return _first(response)
         
+    @db_safe()
     async def get_water_by_date(self, user_id: str, date: date) -> Optional[Dict[str, Any]]:
         """Get water intake for a specific date - FIXED VERSION"""
-        try:
-            print(f"🔍 Getting water for user: {user_id}, date: {date}")
-            
-            # ✅ FIX: Check if your table uses 'date' or 'log_date' column
-            # I'll provide both versions:
-            
-            # VERSION A: If column is called 'date'
-            response = self.client.table('daily_water')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .eq('date', str(date))\
-                .execute()
-            
-            # VERSION B: If column is called 'log_date' (uncomment if needed)
-            # response = self.client.table('daily_water')\
-            #     .select('*')\
-            #     .eq('user_id', user_id)\
-            #     .eq('log_date', str(date))\
-            #     .execute()
-            
-            if response.data:
-                entry = response.data[0]
-                print(f"✅ Found water entry for {date}: {entry.get('glasses_consumed')} glasses")
-                return entry
-            
-            print(f"ℹ️ No water entry found for {date}")
-            return None
-        except Exception as e:
-            print(f"❌ Error getting water by date: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+        logger.debug("Getting water for user: %s, date: %s", user_id, date)
+            
+        # ✅ FIX: Check if your table uses 'date' or 'log_date' column
+        # I'll provide both versions:
+            
+        # VERSION A: If column is called 'date'
+        response = await self._execute(
+            self.client.table('daily_water')
+            .select('*')
+            .eq('user_id', user_id)
+            .eq('date', str(date))
+        )
+            
+        # VERSION B: If column is called 'log_date' (uncomment if needed)
+        # response = self.client.table('daily_water')\
+        #     .select('*')\
+        #     .eq('user_id', user_id)\
+        #     .eq('log_date', str(date))\
+        #     .execute()
+            
+        if response.data:
+            entry = response.data[0]
+            logger.debug("Found water entry for %s: %s glasses", date, entry.get('glasses_consumed'))
+            return entry
+            
+        logger.debug("No water entry found for %s", date)
+        return None
 
+    @db_safe(default=False)
     async def delete_water_entry(self, entry_id: str):
         """Delete water entry"""
-        try:
-            response = self.client.table('daily_water')\
-                .delete()\
-                .eq('id', entry_id)\
-                .execute()
-            
-            return True
-        except Exception as e:
-            print(f"Error deleting water entry: {e}")
-            return False
+        response = await self._execute(
+            self.client.table('daily_water')
+            .delete()
+            .eq('id', entry_id)
+        )
+            
+        self._log_written(response.data or [])
+        return True
 
     async def create_water_entry(self, water_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new water entry"""
         try:
-            response = self.client.table('daily_water').insert(water_data).execute()
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
+            response = await self._execute(self.client.table('daily_water').insert(water_data))
+            entry = _first_or_raise(response)
+            self._log_written([entry])
+            return entry
         except Exception as e:
-            print(f"❌ Error creating water entry: {e}")
+            logger.error("Error creating water entry: %s", e)
             raise Exception(f"Failed to create water entry: {str(e)}")
 
     async def update_water_entry(self, entry_id: str, water_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing water entry"""
         try:
-            response = self.client.table('daily_water').update(water_data).eq('id', entry_id).execute()
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
+            response = await self._execute(
+                self.client.table('daily_water').update(water_data).eq('id', entry_id)
+            )
+            entry = _first_or_raise(response)
+            self._log_written([entry])
+            return entry
         except Exception as e:
-            print(f"❌ Error updating water entry: {e}")
+            logger.error("Error updating water entry: %s", e)
             raise Exception(f"Failed to update water entry: {str(e)}")
 
-    async def get_water_history(self, user_id: str, limit: int = 30) -> List[Dict[str, Any]]:
+    @db_safe(default=[])
+    async def get_water_history(self, user_id: str, limit: int = 30) -> List[WaterHistoryEntry]:
         """Get water intake history for a user"""
-        try:
-            print(f"🔍 Getting {limit} water entries for user: {user_id}")
-            
-            response = self.client.table('daily_water')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('date', desc=True)\
-                .limit(limit)\
-                .execute()
-            
-            if response.data:
-                # Format the data to ensure consistency
-                formatted_entries = []
-                for entry in response.data:
-                    formatted_entry = {
-                        'id': entry['id'],
-                        'user_id': entry['user_id'],
-                        'date': entry['date'],
-                        'glasses_consumed': entry.get('glasses_consumed', 0),
-                        'total_ml': float(entry.get('total_ml', 0.0)),
-                        'target_ml': float(entry.get('target_ml', 2000.0)),
-                        'notes': entry.get('notes'),
-                        'created_at': entry.get('created_at'),
-                        'updated_at': entry.get('updated_at')
-                    }
-                    formatted_entries.append(formatted_entry)
-                
-                print(f"✅ Retrieved {len(formatted_entries)} water entries")
-                return formatted_entries
-            
-            return []
-        except Exception as e:
-            print(f"❌ Error getting water history: {e}")
-            return []
+        logger.debug("Getting %s water entries for user: %s", limit, user_id)
+            
+        # Numeric columns are cast in the select so rows need no per-row rebuild here
+        response = await self._execute(
+            self.client.table('daily_water')
+            .select(WATER_HISTORY_COLUMNS)
+            .eq('user_id', user_id)
+            .order('date', desc=True)
+            .limit(limit)
+        )
+            
+        entries = response.data or []
+        logger.debug("Retrieved %s water entries", len(entries))
+        return entries
 
+    @db_safe(default=[])
     async def get_water_entries_in_range(self, user_id: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """Get water entries within a date range"""
-        try:
-            response = self.client.table('daily_water')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .gte('date', start_date)\
-                .lte('date', end_date)\
-                .order('date', desc=True)\
-                .execute()
-            
-            return response.data or []
-        except Exception as e:
-            print(f"❌ Error getting water entries in range: {e}")
-            return []
+        response = await self._execute(
+            self.client.table('daily_water')
+            .select('*')
+            .eq('user_id', user_id)
+            .gte('date', start_date)
+            .lte('date', end_date)
+            .order('date', desc=True)
+        )
+            
+        return response.data or []
         
     # Step functions
     async def create_step_entry(self, step_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new step entry"""
         try:
-            response = self.client.table('daily_steps').insert(step_data).execute()
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
+            response = await self._execute(self.client.table('daily_steps').insert(step_data))
+            entry = _first_or_raise(response)
+            self._log_written([entry])
+            return entry
         except Exception as e:
-            print(f"❌ Error creating step entry: {e}")
+            logger.error("Error creating step entry: %s", e)
             raise Exception(f"Failed to create step entry: {str(e)}")
 
     async def update_step_entry(self, entry_id: str, step_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing step entry"""
         try:
-            response = self.client.table('daily_steps').update(step_data).eq('id', entry_id).execute()
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
+            response = await self._execute(
+                self.client.table('daily_steps').update(step_data).eq('id', entry_id)
+            )
+            entry = _first_or_raise(response)
+            self._log_written([entry])
+            return entry
         except Exception as e:
-            print(f"❌ Error updating step entry: {e}")
+            logger.error("Error updating step entry: %s", e)
             raise Exception(f"Failed to update step entry: {str(e)}")
 
+    @db_safe()
     async def get_step_entry_by_date(self, user_id: str, entry_date: date) -> Optional[Dict[str, Any]]:
         """Get step entry for a specific date"""
-        try:
-            response = self.client.table('daily_steps')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .eq('date', str(entry_date))\
-                .execute()
-            
-            if response.data:
-                return response.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ Error getting step entry by date: {e}")
-            return None
+        response = await self._execute(
+            self.client.table('daily_steps')
+            .select('*')
+            .eq('user_id', user_id)
+            .eq('date', str(entry_date))
+        )
+            
+        return _first(response)
 
-    async def get_step_history(self, user_id: str, limit: int = 30) -> List[Dict[str, Any]]:
+    @db_safe(default=[])
+    async def get_step_history(self, user_id: str, limit: int = 30) -> List[StepHistoryEntry]:
         """Get step history for a user"""
-        try:
-            print(f"🔍 Getting {limit} step entries for user: {user_id}")
-            
-            response = self.client.table('daily_steps')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('date', desc=True)\
-                .limit(limit)\
-                .execute()
-            
-            if response.data:
-                # Format the data to ensure consistency
-                formatted_entries = []
-                for entry in response.data:
-                    formatted_entry = {
-                        'id': entry['id'],
-                        'userId': entry['user_id'],  # Convert to Flutter format
-                        'date': entry['date'],
-                        'steps': entry.get('steps', 0),
-                        'goal': entry.get('goal', 10000),
-                        'caloriesBurned': float(entry.get('calories_burned', 0.0)),
-                        'distanceKm': float(entry.get('distance_km', 0.0)),
-                        'activeMinutes': entry.get('active_minutes', 0),
-                        'sourceType': entry.get('source_type', 'manual'),
-                        'lastSynced': entry.get('last_synced'),
-                        'createdAt': entry.get('created_at'),
-                        'updatedAt': entry.get('updated_at')
-                    }
-                    formatted_entries.append(formatted_entry)
-                
-                print(f"✅ Retrieved {len(formatted_entries)} step entries")
-                return formatted_entries
-            
-            return []
-        except Exception as e:
-            print(f"❌ Error getting step history: {e}")
-            return []
+        logger.debug("Getting %s step entries for user: %s", limit, user_id)
+            
+        # Flutter's camelCase keys and float casts are done by PostgREST aliases
+        response = await self._execute(
+            self.client.table('daily_steps')
+            .select(STEP_HISTORY_COLUMNS)
+            .eq('user_id', user_id)
+            .order('date', desc=True)
+            .limit(limit)
+        )
+            
+        entries = response.data or []
+        logger.debug("Retrieved %s step entries", len(entries))
+        return entries
 
+    @db_safe(default=[])
     async def get_step_entries_in_range(self, user_id: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """Get step entries within a date range"""
-        try:
-            response = self.client.table('daily_steps')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .gte('date', start_date)\
-                .lte('date', end_date)\
-                .order('date', desc=True)\
-                .execute()
-            
-            if response.data:
-                # Format for Flutter
-                formatted_entries = []
-                for entry in response.data:
-                    formatted_entry = {
-                        'id': entry['id'],
-                        'userId': entry['user_id'],
-                        'date': entry['date'],
-                        'steps': entry.get('steps', 0),
-                        'goal': entry.get('goal', 10000),
-                        'caloriesBurned': float(entry.get('calories_burned', 0.0)),
-                        'distanceKm': float(entry.get('distance_km', 0.0)),
-                        'activeMinutes': entry.get('active_minutes', 0),
-                        'sourceType': entry.get('source_type', 'manual'),
-                        'lastSynced': entry.get('last_synced'),
-                        'createdAt': entry.get('created_at'),
-                        'updatedAt': entry.get('updated_at')
-                    }
-                    formatted_entries.append(formatted_entry)
-                return formatted_entries
+        response = await self._execute(
+            self.client.table('daily_steps')
+            .select('*')
+            .eq('user_id', user_id)
+            .gte('date', start_date)
+            .lte('date', end_date)
+            .order('date', desc=True)
+        )
+            
+        if response.data:
+            # Format for Flutter
+            formatted_entries = []
+            for entry in response.data:
+                formatted_entry = {
+                    'id': entry['id'],
+                    'userId': entry['user_id'],
+                    'date': entry['date'],
+                    'steps': entry.get('steps', 0),
+                    'goal': entry.get('goal', 10000),
+                    'caloriesBurned': float(entry.get('calories_burned', 0.0)),
+                    'distanceKm': float(entry.get('distance_km', 0.0)),
+                    'activeMinutes': entry.get('active_minutes', 0),
+                    'sourceType': entry.get('source_type', 'manual'),
+                    'lastSynced': entry.get('last_synced'),
+                    'createdAt': entry.get('created_at'),
+                    'updatedAt': entry.get('updated_at')
+                }
+                formatted_entries.append(formatted_entry)
+            return formatted_entries
             
-            return []
-        except Exception as e:
-            print(f"❌ Error getting step entries in range: {e}")
-            return []
+        return []
 
+    @db_safe(default=False)
     async def delete_step_entry_by_date(self, user_id: str, entry_date: date) -> bool:
         """Delete step entry for a specific date"""
-        try:
-            response = self.client.table('daily_steps')\
-                .delete()\
-                .eq('user_id', user_id)\
-                .eq('date', str(entry_date))\
-                .execute()
-            
-            return True
-        except Exception as e:
-            print(f"❌ Error deleting step entry: {e}")
-            return False
+        response = await self._execute(
+            self.client.table('daily_steps')
+            .delete()
+            .eq('user_id', user_id)
+            .eq('date', str(entry_date))
+        )
+            
+        self._log_written([{'user_id': user_id}])
+        return True
         
     async def get_steps_in_range(
         self, 
@@ -762,588 +1029,507 @@ class SupabaseService:
     ) -> List[Dict[str, Any]]:
         """Get step entries for a date range"""
         try:
-            response = self.client.table('daily_steps')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .gte('date', str(start_date))\
-                .lte('date', str(end_date))\
-                .order('date', desc=False)\
-                .execute()
+            response = await self._execute(
+                self.client.table('daily_steps')
+                .select('*')
+                .eq('user_id', user_id)
+                .gte('date', str(start_date))
+                .lte('date', str(end_date))
+                .order('date', desc=False)
+            )
             
             if response.data:
                 return response.data
             return []
         except Exception as e:
-            print(f"❌ Error getting steps in range: {e}")
+            logger.error("Error getting steps in range: %s", e)
             return []
         
+    @db_safe()
     async def get_steps_by_date(self, user_id: str, date: date) -> Optional[Dict[str, Any]]:
         """Get step count for a specific date - FIXED VERSION"""
-        try:
-            print(f"🔍 Getting steps for user: {user_id}, date: {date}")
-            
-            response = self.client.table('daily_steps')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .eq('date', str(date))\
-                .execute()
-            
-            if response.data:
-                entry = response.data[0]
-                print(f"✅ Found step entry for {date}: {entry.get('steps')} steps")
-                return entry
-            
-            print(f"ℹ️ No step entry found for {date}")
-            return None
-        except Exception as e:
-            print(f"❌ Error getting steps by date: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+        logger.debug("Getting steps for user: %s, date: %s", user_id, date)
+            
+        response = await self._execute(
+            self.client.table('daily_steps')
+            .select('*')
+            .eq('user_id', user_id)
+            .eq('date', str(date))
+            .limit(1)
+            .maybe_single()
+        )
+            
+        if response:
+            entry = response.data
+            logger.debug("Found step entry for %s: %s steps", date, entry.get('steps'))
+            return entry
+            
+        logger.debug("No step entry found for %s", date)
+        return None
     
     
     # Weight functions
     async def create_weight_entry(self, weight_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new weight entry"""
+        """Create a new weight entry, initializing the user's starting weight on their first one"""
         try:
-            response = self.client.table('weight_entries').insert(weight_data).execute()
+            # Insert + starting-weight init in one transaction, one round trip
+            response = await self._execute(self.client.rpc('log_weight', {'p_entry': weight_data}))
             if response.data:
-                return response.data[0]
+                self._latest_weight_cache.pop(response.data['user_id'])
+                self._user_cache.pop(response.data['user_id'])
+                self._log_written([response.data])
+                return response.data
             else:
                 raise Exception("No data returned from Supabase")
         except Exception as e:
-            print(f"❌ Error creating weight entry: {e}")
+            logger.error("Error creating weight entry: %s", e)
             raise Exception(f"Failed to create weight entry: {str(e)}")
 
-    async def get_weight_history(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+    @db_safe(default=[])
+    async def get_weight_history(self, user_id: str, limit: int = 50) -> List[WeightEntry]:
         """Get weight history for a user"""
-        try:
-            print(f"🔍 Getting {limit} weight entries for user: {user_id}")
-            
-            response = self.client.table('weight_entries')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('date', desc=True)\
-                .limit(limit)\
-                .execute()
-            
-            if response.data:
-                # Format the data to ensure consistency
-                formatted_entries = []
-                for entry in response.data:
-                    formatted_entry = {
-                        'id': entry['id'],
-                        'user_id': entry['user_id'],
-                        'date': entry['date'],
-                        'weight': float(entry.get('weight', 0.0)),
-                        'notes': entry.get('notes'),
-                        'body_fat_percentage': float(entry['body_fat_percentage']) if entry.get('body_fat_percentage') else None,
-                        'muscle_mass_kg': float(entry['muscle_mass_kg']) if entry.get('muscle_mass_kg') else None,
-                        'created_at': entry.get('created_at'),
-                        'updated_at': entry.get('updated_at')
-                    }
-                    formatted_entries.append(formatted_entry)
-                
-                print(f"✅ Retrieved {len(formatted_entries)} weight entries")
-                return formatted_entries
-            
-            return []
-        except Exception as e:
-            print(f"❌ Error getting weight history: {e}")
-            return []
+        logger.debug("Getting %s weight entries for user: %s", limit, user_id)
+            
+        response = await self._execute(
+            self.client.table('weight_entries')
+            .select(WEIGHT_COLUMNS)
+            .eq('user_id', user_id)
+            .order('date', desc=True)
+            .limit(limit)
+        )
+            
+        entries = response.data or []
+        logger.debug("Retrieved %s weight entries", len(entries))
+        return entries
 
-    async def get_latest_weight(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get the latest weight entry for a user"""
-        try:
-            response = self.client.table('weight_entries')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('date', desc=True)\
-                .limit(1)\
-                .execute()
-            
-            if response.data:
-                entry = response.data[0]
-                return {
-                    'id': entry['id'],
-                    'user_id': entry['user_id'],
-                    'date': entry['date'],
-                    'weight': float(entry.get('weight', 0.0)),
-                    'notes': entry.get('notes'),
-                    'body_fat_percentage': float(entry['body_fat_percentage']) if entry.get('body_fat_percentage') else None,
-                    'muscle_mass_kg': float(entry['muscle_mass_kg']) if entry.get('muscle_mass_kg') else None,
-                    'created_at': entry.get('created_at'),
-                    'updated_at': entry.get('updated_at')
-                }
-            return None
-        except Exception as e:
-            print(f"❌ Error getting latest weight: {e}")
-            return None
+    @db_safe(default=[])
+    async def get_weight_entries(self, user_id: str, start_date: str, end_date: str) -> List[WeightEntry]:
+        """Weight entries from start_date through end_date (inclusive), oldest first"""
+        response = await self._execute(
+            self.client.table('weight_entries')
+            .select(WEIGHT_COLUMNS)
+            .eq('user_id', user_id)
+            .gte('date', start_date)
+            .lte('date', end_date)
+            .order('date', desc=False)
+        )
+        return response.data or []
+
+    async def get_latest_weight(self, user_id: str) -> Optional[WeightEntry]:
+        """Get the latest weight entry for a user (served from the in-process cache when fresh)"""
+        return await self._latest_weight_cache.get_or_load(user_id, lambda: self._fetch_latest_weight(user_id))
 
+    @db_safe()
+    async def _fetch_latest_weight(self, user_id: str) -> Optional[WeightEntry]:
+        response = await self._execute(
+            self.client.table('weight_entries')
+            .select(WEIGHT_COLUMNS)
+            .eq('user_id', user_id)
+            .order('date', desc=True)
+            .limit(1)
+        )
+            
+        return _first(response)
+
+    @db_safe(default=False)
     async def delete_weight_entry(self, entry_id: str) -> bool:
         """Delete a weight entry"""
-        try:
-            response = self.client.table('weight_entries')\
-                .delete()\
-                .eq('id', entry_id)\
-                .execute()
-            
-            return True
-        except Exception as e:
-            print(f"❌ Error deleting weight entry: {e}")
-            return False
+        response = await self._execute(
+            self.client.table('weight_entries')
+            .delete()
+            .eq('id', entry_id)
+        )
+            
+        for entry in response.data or []:
+            self._latest_weight_cache.pop(entry['user_id'])
+        self._log_written(response.data or [])
+        return True
         
+    @db_safe()
     async def get_weight_entry_by_id(self, entry_id: str) -> Optional[Dict[str, Any]]:
         """Get a weight entry by ID"""
-        try:
-            response = self.client.table('weight_entries')\
-                .select('*')\
-                .eq('id', entry_id)\
-                .limit(1)\
-                .execute()
-            
-            if response.data:
-                return response.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ Error getting weight entry by ID: {e}")
-            return None
+        response = await self._execute(
+            self.client.table('weight_entries')
+            .select('*')
+            .eq('id', entry_id)
+            .maybe_single()
+        )
+            
+        return response.data if response else None
         
-    async def get_weight_by_date(self, user_id: str, date: date) -> Optional[Dict[str, Any]]:
+    @db_safe()
+    async def get_weight_by_date(self, user_id: str, date: date) -> Optional[WeightEntry]:
         """Get weight entry for a specific date - FIXED VERSION"""
-        try:
-            print(f"🔍 Getting weight for user: {user_id}, date: {date}")
-            
-            response = self.client.table('weight_entries')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .eq('date', str(date))\
-                .order('date', desc=True)\
-                .limit(1)\
-                .execute()
-            
-            if response.data:
-                entry = response.data[0]
-                print(f"✅ Found weight entry for {date}: {entry.get('weight')}kg")
-                return {
-                    'id': entry['id'],
-                    'user_id': entry['user_id'],
-                    'date': entry['date'],
-                    'weight': float(entry.get('weight', 0.0)),
-                    'notes': entry.get('notes'),
-                    'body_fat_percentage': float(entry['body_fat_percentage']) if entry.get('body_fat_percentage') else None,
-                    'muscle_mass_kg': float(entry['muscle_mass_kg']) if entry.get('muscle_mass_kg') else None,
-                    'created_at': entry.get('created_at'),
-                    'updated_at': entry.get('updated_at')
-                }
-            
-            print(f"ℹ️ No weight entry found for {date}")
-            return None
-        except Exception as e:
-            print(f"❌ Error getting weight by date: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+        logger.debug("Getting weight for user: %s, date: %s", user_id, date)
+            
+        response = await self._execute(
+            self.client.table('weight_entries')
+            .select(WEIGHT_COLUMNS)
+            .eq('user_id', user_id)
+            .eq('date', str(date))
+            .limit(1)
+            .maybe_single()
+        )
+            
+        if response:
+            entry = response.data
+            logger.debug("Found weight entry for %s: %skg", date, entry.get('weight'))
+            return entry
+            
+        logger.debug("No weight entry found for %s", date)
+        return None
         
+    @db_safe(default=False)
     async def update_user_weight(self, user_id: str, weight: float) -> bool:
         """Update user's current weight in the users table"""
-        try:
-            response = self.client.table('users')\
-                .update({'weight': weight})\
-                .eq('id', user_id)\
-                .execute()
-            
-            print(f"✅ Updated user's weight to {weight} kg in profile")
-            return True
-        except Exception as e:
-            print(f"❌ Error updating user weight: {e}")
-            return False
+        # Before and after the write, as in update_user
+        self._user_cache.pop(user_id)
+        await self._execute(
+            self.client.table('users')
+            .update({'weight': weight}, returning=ReturnMethod.minimal)
+            .eq('id', user_id)
+        )
+        self._user_cache.pop(user_id)
+            
+        logger.debug("Updated user's weight to %s kg in profile", weight)
+        return True
 
-    async def initialize_starting_weight(self, user_id: str) -> bool:
-        """Initialize starting weight if not set (for new or existing users)"""
-        try:
-            user = await self.get_user_by_id(user_id)
-            
-            # Only initialize if starting_weight is not set
-            if user and not user.get('starting_weight'):
-                # Try to get the oldest weight entry
-                oldest_entry_response = self.client.table('weight_entries')\
-                    .select('weight, date')\
-                    .eq('user_id', user_id)\
-                    .order('date', desc=False)\
-                    .limit(1)\
-                    .execute()
-                
-                if oldest_entry_response.data:
-                    # Use oldest entry
-                    starting_weight = oldest_entry_response.data[0]['weight']
-                    starting_date = oldest_entry_response.data[0]['date']
-                else:
-                    # Use current weight as starting weight
-                    starting_weight = user.get('weight')
-                    starting_date = user.get('created_at')
-                
-                if starting_weight:
-                    self.client.table('users')\
-                        .update({
-                            'starting_weight': starting_weight,
-                            'starting_weight_date': starting_date
-                        })\
-                        .eq('id', user_id)\
-                        .execute()
-                    
-                    print(f"✅ Initialized starting weight to {starting_weight} kg for user {user_id}")
-                    return True
-            
-            return False
-        except Exception as e:
-            print(f"❌ Error initializing starting weight: {e}")
-            return False
-        
+    @db_safe(default=False)
     async def initialize_starting_weight_for_user(self, user_id: str) -> bool:
         """Initialize starting weight for a user who doesn't have it set"""
-        try:
-            user = await self.get_user_by_id(user_id)
-            
-            # Only initialize if starting_weight is not set
-            if user and not user.get('starting_weight'):
-                # Try to get the oldest weight entry
-                oldest_entry_response = self.client.table('weight_entries')\
-                    .select('weight, date')\
-                    .eq('user_id', user_id)\
-                    .order('date', desc=False)\
-                    .limit(1)\
-                    .execute()
-                
-                if oldest_entry_response.data:
-                    # Use oldest entry - most accurate
-                    starting_weight = oldest_entry_response.data[0]['weight']
-                    starting_date = oldest_entry_response.data[0]['date']
-                    print(f"📊 Using oldest weight entry: {starting_weight} kg from {starting_date}")
-                else:
-                    # Use current weight as starting weight
-                    starting_weight = user.get('weight')
-                    starting_date = user.get('created_at')
-                    print(f"📊 Using profile weight as starting weight: {starting_weight} kg")
-                
-                if starting_weight:
-                    self.client.table('users')\
-                        .update({
-                            'starting_weight': starting_weight,
-                            'starting_weight_date': starting_date
-                        })\
-                        .eq('id', user_id)\
-                        .execute()
-                    
-                    print(f"✅ Initialized starting weight to {starting_weight} kg for user {user_id}")
-                    return True
+        # Oldest weight entry (else profile weight), set atomically in one round trip
+        response = await self._execute(
+            self.client.rpc('init_starting_weight', {'p_user_id': user_id})
+        )
+        initialized = bool(response.data)
             
-            return False
-        except Exception as e:
-            print(f"❌ Error initializing starting weight: {e}")
-            return False
+        if initialized:
+            self._user_cache.pop(user_id)
+            logger.debug("Initialized starting weight for user %s", user_id)
+            
+        return initialized
 
     async def migrate_all_users_starting_weights(self) -> dict:
         """Migrate starting weights for all users who don't have it set"""
         try:
-            # Get all users without starting_weight
-            response = self.client.table('users')\
-                .select('id, weight, created_at')\
-                .is_('starting_weight', 'null')\
-                .execute()
-            
-            users_to_migrate = response.data
-            migrated_count = 0
-            failed_count = 0
-            
-            print(f"📊 Found {len(users_to_migrate)} users to migrate")
-            
-            for user in users_to_migrate:
-                try:
-                    success = await self.initialize_starting_weight_for_user(user['id'])
-                    if success:
-                        migrated_count += 1
-                    else:
-                        failed_count += 1
-                except Exception as e:
-                    print(f"❌ Failed to migrate user {user['id']}: {e}")
-                    failed_count += 1
+            # Set-based backfill in Postgres - one round trip however many users are pending
+            response = await self._execute(self.client.rpc('migrate_starting_weights', {}))
+            counts = _first(response, {'total': 0, 'migrated': 0})
+            
+            # Profiles changed underneath the cache
+            self._user_cache.clear()
+            
+            logger.debug("Migrated %s of %s users", counts['migrated'], counts['total'])
             
             return {
-                'total': len(users_to_migrate),
-                'migrated': migrated_count,
-                'failed': failed_count
+                'total': counts['total'],
+                'migrated': counts['migrated'],
+                'failed': counts['total'] - counts['migrated']
             }
         except Exception as e:
-            print(f"❌ Error in migration: {e}")
+            logger.error("Error in migration: %s", e)
             return {'error': str(e)}
         
     # sleep functions
     async def create_sleep_entry(self, sleep_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new sleep entry"""
         try:
-            response = self.client.table('sleep_entries').insert(sleep_data).execute()
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
+            response = await self._execute(self.client.table('sleep_entries').insert(sleep_data))
+            entry = _first_or_raise(response)
+            self._log_written([entry])
+            return entry
         except Exception as e:
-            print(f"❌ Error creating sleep entry: {e}")
+            logger.error("Error creating sleep entry: %s", e)
             raise Exception(f"Failed to create sleep entry: {str(e)}")
 
     async def update_sleep_entry(self, entry_id: str, sleep_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing sleep entry"""
         try:
-            response = self.client.table('sleep_entries').update(sleep_data).eq('id', entry_id).execute()
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
+            response = await self._execute(
+                self.client.table('sleep_entries').update(sleep_data).eq('id', entry_id)
+            )
+            entry = _first_or_raise(response)
+            self._log_written([entry])
+            return entry
         except Exception as e:
-            print(f"❌ Error updating sleep entry: {e}")
+            logger.error("Error updating sleep entry: %s", e)
             raise Exception(f"Failed to update sleep entry: {str(e)}")
 
+    @db_safe()
     async def get_sleep_entry_by_date(self, user_id: str, entry_date: date) -> Optional[Dict[str, Any]]:
         """Get sleep entry for a specific date"""
-        try:
-            response = self.client.table('sleep_entries')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .eq('date', str(entry_date))\
-                .execute()
-            
-            if response.data:
-                return response.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ Error getting sleep entry by date: {e}")
-            return None
+        response = await self._execute(
+            self.client.table('sleep_entries')
+            .select('*')
+            .eq('user_id', user_id)
+            .eq('date', str(entry_date))
+            .limit(1)
+            .maybe_single()
+        )
+            
+        return response.data if response else None
         
+    @db_safe()
     async def get_sleep_by_date(self, user_id: str, date: date) -> Optional[Dict[str, Any]]:
         """Get sleep entry for a specific date"""
-        try:
-            next_day = date + timedelta(days=1)
-            
-            response = self.client.table('sleep_entries')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .gte('date', str(date))\
-                .lt('date', str(next_day))\
-                .execute()
-            
-            if response.data:
-                print(f"✅ Found sleep entry for {date}: {response.data[0].get('total_hours')}h")
-                return response.data[0]
+        next_day = date + timedelta(days=1)
+            
+        response = await self._execute(
+            self.client.table('sleep_entries')
+            .select('*')
+            .eq('user_id', user_id)
+            .gte('date', str(date))
+            .lt('date', str(next_day))
+        )
+            
+        if response.data:
+            logger.debug("Found sleep entry for %s: %sh", date, response.data[0].get('total_hours'))
+            return response.data[0]
             
-            return None
-        except Exception as e:
-            print(f"❌ Error getting sleep by date: {e}")
-            return None
+        return None
         
+    @db_safe(default=[])
+    async def get_sleep_in_range(self, user_id: str, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Sleep entries from start_date through end_date (inclusive), oldest first"""
+        response = await self._execute(
+            self.client.table('sleep_entries')
+            .select('*')
+            .eq('user_id', user_id)
+            .gte('date', str(start_date))
+            .lt('date', str(end_date + timedelta(days=1)))
+            .order('date', desc=False)
+        )
+        return response.data or []
+
+    @db_safe()
     async def get_sleep_entry_by_id(self, entry_id: str):
         """Get sleep entry by ID"""
-        try:
-            response = self.client.table('sleep_entries')\
-                .select('*')\
-                .eq('id', entry_id)\
-                .execute()
-            
-            return response.data[0] if response.data else None
-        except Exception as e:
-            print(f"Error getting sleep entry: {e}")
-            return None
+        response = await self._execute(
+            self.client.table('sleep_entries')
+            .select('*')
+            .eq('id', entry_id)
+            .maybe_single()
+        )
+            
+        return response.data if response else None
 
+    @db_safe(default=[])
     async def get_sleep_history(self, user_id: str, limit: int = 30) -> List[Dict[str, Any]]:
         """Get sleep history for a user"""
-        try:
-            print(f"🔍 Getting {limit} sleep entries for user: {user_id}")
+        logger.debug("Getting %s sleep entries for user: %s", limit, user_id)
             
-            response = self.client.table('sleep_entries')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('date', desc=True)\
-                .limit(limit)\
-                .execute()
+        response = await self._execute(
+            self.client.table('sleep_entries')
+            .select(SLEEP_HISTORY_COLUMNS)
+            .eq('user_id', user_id)
+            .order('date', desc=True)
+            .limit(limit)
+        )
             
-            if response.data:
-                print(f"✅ Retrieved {len(response.data)} sleep entries")
-                return response.data
+        if response.data:
+            logger.debug("Retrieved %s sleep entries", len(response.data))
+            return response.data
             
-            return []
-        except Exception as e:
-            print(f"❌ Error getting sleep history: {e}")
-            return []
+        return []
 
+    @db_safe(default=False)
     async def delete_sleep_entry(self, entry_id: str) -> bool:
         """Delete a sleep entry"""
-        try:
-            response = self.client.table('sleep_entries')\
-                .delete()\
-                .eq('id', entry_id)\
-                .execute()
-            
-            return True
-        except Exception as e:
-            print(f"❌ Error deleting sleep entry: {e}")
-            return False
+        response = await self._execute(
+            self.client.table('sleep_entries')
+            .delete()
+            .eq('id', entry_id)
+        )
+            
+        self._log_written(response.data or [])
+        return True
         
     # supplements functions
     async def create_supplement_preference(self, preference_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new supplement preference"""
         try:
-            response = self.client.table('supplement_preferences').insert(preference_data).execute()
+            response = await self._execute(
+                self.client.table('supplement_preferences').insert(preference_data)
+            )
             if response.data:
+                self._supplement_pref_cache.pop(response.data[0]['user_id'])
                 return response.data[0]
             else:
                 raise Exception("No data returned from Supabase")
         except Exception as e:
-            print(f"❌ Error creating supplement preference: {e}")
+            logger.error("Error creating supplement preference: %s", e)
             raise Exception(f"Failed to create supplement preference: {str(e)}")
 
     async def get_supplement_preferences(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get supplement preferences for a user"""
+        """Get supplement preferences for a user (served from the in-process cache when fresh)"""
+        preferences = await self._supplement_pref_cache.get_or_load(
+            user_id, lambda: self._fetch_supplement_preferences(user_id)
+        )
+        return preferences if preferences is not None else []
+
+    async def _fetch_supplement_preferences(self, user_id: str) -> Optional[List[Dict[str, Any]]]:
         try:
-            print(f"🔍 Getting supplement preferences for user: {user_id}")
+            logger.debug("Getting supplement preferences for user: %s", user_id)
             
-            response = self.client.table('supplement_preferences')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .eq('is_active', True)\
-                .order('created_at', desc=False)\
-                .execute()
+            response = await self._execute(
+                self.client.table('supplement_preferences')
+                .select('*')
+                .eq('user_id', user_id)
+                .eq('is_active', True)
+                .order('created_at', desc=False)
+            )
             
             if response.data:
-                print(f"✅ Retrieved {len(response.data)} supplement preferences")
+                logger.debug("Retrieved %s supplement preferences", len(response.data))
                 return response.data
             
             return []
         except Exception as e:
-            print(f"❌ Error getting supplement preferences: {e}")
-            return []
+            logger.error("Error getting supplement preferences: %s", e)
+            # None is not cached, so the next read retries
+            return None
 
+    @db_safe(default=False)
     async def clear_supplement_preferences(self, user_id: str) -> bool:
         """Clear all supplement preferences for a user (mark as inactive)"""
-        try:
-            response = self.client.table('supplement_preferences')\
-                .update({'is_active': False, 'updated_at': datetime.now().isoformat()})\
-                .eq('user_id', user_id)\
-                .execute()
-            
-            return True
-        except Exception as e:
-            print(f"❌ Error clearing supplement preferences: {e}")
-            return False
+        await self._execute(
+            self.client.table('supplement_preferences')
+            .update({'is_active': False}, returning=ReturnMethod.minimal)
+            .eq('user_id', user_id)
+        )
+            
+        self._supplement_pref_cache.pop(user_id)
+        return True
 
     async def create_supplement_log(self, log_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new supplement log entry"""
         try:
-            response = self.client.table('supplement_logs').insert(log_data).execute()
+            response = await self._execute(self.client.table('supplement_logs').insert(log_data))
             if response.data:
+                self._invalidate_supplement_history(response.data[0]['user_id'])
+                self._log_written(response.data)
                 return response.data[0]
             else:
                 raise Exception("No data returned from Supabase")
         except Exception as e:
-            print(f"❌ Error creating supplement log: {e}")
+            logger.error("Error creating supplement log: %s", e)
             raise Exception(f"Failed to create supplement log: {str(e)}")
 
     async def update_supplement_log(self, log_id: str, log_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing supplement log entry"""
         try:
-            response = self.client.table('supplement_logs').update(log_data).eq('id', log_id).execute()
+            response = await self._execute(
+                self.client.table('supplement_logs').update(log_data).eq('id', log_id)
+            )
             if response.data:
+                self._invalidate_supplement_history(response.data[0]['user_id'])
+                self._log_written(response.data)
                 return response.data[0]
             else:
                 raise Exception("No data returned from Supabase")
         except Exception as e:
-            print(f"❌ Error updating supplement log: {e}")
+            logger.error("Error updating supplement log: %s", e)
             raise Exception(f"Failed to update supplement log: {str(e)}")
 
+    @db_safe()
     async def get_supplement_log_by_date(self, user_id: str, supplement_name: str, entry_date: date) -> Optional[Dict[str, Any]]:
         """Get supplement log for a specific supplement and date"""
-        try:
-            response = self.client.table('supplement_logs')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .eq('supplement_name', supplement_name)\
-                .eq('date', str(entry_date))\
-                .execute()
-            
-            if response.data:
-                return response.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ Error getting supplement log by date: {e}")
-            return None
+        response = await self._execute(
+            self.client.table('supplement_logs')
+            .select('*')
+            .eq('user_id', user_id)
+            .eq('supplement_name', supplement_name)
+            .eq('date', str(entry_date))
+            .limit(1)
+            .maybe_single()
+        )
+            
+        return response.data if response else None
 
+    @db_safe(default={})
     async def get_supplement_status_by_date(self, user_id: str, entry_date: date) -> Dict[str, Any]:
         """Get supplement status for all supplements on a specific date - FIXED VERSION"""
-        try:
-            print(f"🔍 Getting supplements for user: {user_id}, date: {entry_date}")
-            
-            response = self.client.table('supplement_logs')\
-                .select('supplement_name, taken')\
-                .eq('user_id', user_id)\
-                .eq('date', str(entry_date))\
-                .execute()
-            
-            status = {}
-            if response.data:
-                for log in response.data:
-                    status[log['supplement_name']] = {
-                        'taken': log['taken'],
-                        'supplement_name': log['supplement_name']
-                    }
-                print(f"✅ Found {len(status)} supplement logs for {entry_date}")
-            else:
-                print(f"ℹ️ No supplement logs found for {entry_date}")
-            
-            return status
-        except Exception as e:
-            print(f"❌ Error getting supplement status by date: {e}")
-            return {}
+        logger.debug("Getting supplements for user: %s, date: %s", user_id, entry_date)
+            
+        response = await self._execute(
+            self.client.table('supplement_logs')
+            .select('supplement_name,taken')
+            .eq('user_id', user_id)
+            .eq('date', str(entry_date))
+        )
+            
+        # Selected rows are already {'supplement_name', 'taken'} - key them as they are
+        status = {log['supplement_name']: log for log in response.data}
+        logger.debug("Found %s supplement logs for %s", len(status), entry_date)
+        return status
 
-    async def get_supplement_history(self, user_id: str, supplement_name: Optional[str] = None, days: int = 30) -> List[Dict[str, Any]]:
-        """Get supplement history for a user"""
-        try:
-            print(f"🔍 Getting supplement history for user: {user_id}")
-            
-            # Calculate date range
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=days)
-            
-            query = self.client.table('supplement_logs')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .gte('date', str(start_date))\
-                .lte('date', str(end_date))\
-                .order('date', desc=True)
-            
-            if supplement_name:
-                query = query.eq('supplement_name', supplement_name)
-            
-            response = query.execute()
-            
-            if response.data:
-                print(f"✅ Retrieved {len(response.data)} supplement history records")
-                return response.data
-            
-            return []
-        except Exception as e:
-            print(f"❌ Error getting supplement history: {e}")
-            return []
+    @db_safe(default=[])
+    async def get_supplements_with_status(self, user_id: str, entry_date: date) -> List[Dict[str, Any]]:
+        """Get active supplement preferences, each with whether it was taken on a date - one round trip"""
+        response = await self._execute(
+            self.client.rpc('get_supplements_with_status', {
+                'p_user_id': user_id,
+                'p_date': str(entry_date)
+            })
+        )
+        return response.data or []
+
+    async def get_supplement_history(
+        self,
+        user_id: str,
+        supplement_name: Optional[str] = None,
+        days: int = 30,
+        end_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get supplement logs from end_date back `days` days, newest first.
+        end_date defaults to today; pass an earlier one to page back window by window.
+        """
+        end_date = end_date or datetime.now().date()
+        key = (user_id, supplement_name, end_date, days)
+        history = await self._supplement_history_cache.get_or_load(
+            key, lambda: self._fetch_supplement_history(user_id, supplement_name, days, end_date)
+        )
+        # None means the query failed - not cached, retried next call
+        return history or []
+
+    @db_safe()
+    async def _fetch_supplement_history(
+        self, user_id: str, supplement_name: Optional[str], days: int, end_date: date
+    ) -> Optional[List[Dict[str, Any]]]:
+        logger.debug("Getting supplement history for user: %s", user_id)
+        start_date = end_date - timedelta(days=days)
+        
+        query = self.client.table('supplement_logs')\
+            .select('*')\
+            .eq('user_id', user_id)\
+            .gte('date', start_date.isoformat())\
+            .lte('date', end_date.isoformat())\
+            .order('date', desc=True)
+        
+        if supplement_name:
+            query = query.eq('supplement_name', supplement_name)
+        
+        response = await self._execute(query)
+        history = response.data or []
+        logger.debug("Retrieved %s supplement history records", len(history))
+        return history
+
+    def _invalidate_supplement_history(self, user_id: str) -> None:
+        self._supplement_history_cache.pop_where(lambda key: key[0] == user_id)
 
+    @db_safe(default=False)
     async def delete_supplement_preference(self, preference_id: str) -> bool:
         """Delete a supplement preference"""
-        try:
-            response = self.client.table('supplement_preferences')\
-                .update({'is_active': False, 'updated_at': datetime.now().isoformat()})\
-                .eq('id', preference_id)\
-                .execute()
-            
-            return True
-        except Exception as e:
-            print(f"❌ Error deleting supplement preference: {e}")
-            return False
+        response = await self._execute(
+            self.client.table('supplement_preferences')
+            .update({'is_active': False})
+            .eq('id', preference_id)
+        )
+            
+        for preference in response.data or []:
+            self._supplement_pref_cache.pop(preference['user_id'])
+        return True
     
     # Exercise methods
     async def create_exercise_log(self, exercise_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -1353,314 +1539,436 @@ class SupabaseService:
             if 'muscle_group' not in exercise_data and 'exercise_type' in exercise_data:
                 exercise_data['muscle_group'] = 'general'
                 
-            response = self.client.table('exercise_logs').insert(exercise_data).execute()
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
+            response = await self._execute(self.client.table('exercise_logs').insert(exercise_data))
+            entry = _first_or_raise(response)
+            self._log_written([entry])
+            return entry
         except Exception as e:
-            print(f"❌ Error creating exercise log: {e}")
+            logger.error("Error creating exercise log: %s", e)
             raise Exception(f"Failed to create exercise log: {str(e)}")
 
+    @db_safe(default=[])
     async def get_exercise_logs(self, user_id: str, exercise_type: Optional[str] = None, start_date: Optional[str] = None, end_date: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
         """Get exercise logs for a user"""
-        try:
-            print(f"🔍 Getting exercise logs for user: {user_id}")
-            print(f"🔍 Filters - type: {exercise_type}, start: {start_date}, end: {end_date}, limit: {limit}")
-            
-            query = self.client.table('exercise_logs')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('exercise_date', desc=True)\
-                .limit(limit)
-            
-            # Apply date filters if provided
-            if start_date and end_date:
-                if start_date == end_date:
-                    # ✅ For same day filtering, use date range for the entire day
-                    start_datetime = f"{start_date}T00:00:00"
-                    end_datetime = f"{end_date}T23:59:59"
-                    query = query.gte('exercise_date', start_datetime).lte('exercise_date', end_datetime)
-                    print(f"🔍 Same day filter: {start_datetime} to {end_datetime}")
-                else:
-                    # Different start and end dates
-                    query = query.gte('exercise_date', start_date).lte('exercise_date', end_date)
-                    print(f"🔍 Date range filter: {start_date} to {end_date}")
-            elif start_date:
-                query = query.gte('exercise_date', start_date)
-                print(f"🔍 Start date filter: >= {start_date}")
-            elif end_date:
-                query = query.lte('exercise_date', end_date)
-                print(f"🔍 End date filter: <= {end_date}")
+        logger.debug("Getting exercise logs for user: %s", user_id)
+        logger.debug("Filters - type: %s, start: %s, end: %s, limit: %s", exercise_type, start_date, end_date, limit)
+            
+        query = self.client.table('exercise_logs')\
+            .select('*')\
+            .eq('user_id', user_id)\
+            .order('exercise_date', desc=True)\
+            .limit(limit)
+            
+        # Filter on the stored exercise_day column (a plain date) - only the day part
+        # of the bounds matters, and both ends are whole days
+        start_day = start_date[:10] if start_date else None
+        end_day = end_date[:10] if end_date else None
+        if start_day and start_day == end_day:
+            query = query.eq('exercise_day', start_day)
+        else:
+            if start_day:
+                query = query.gte('exercise_day', start_day)
+            if end_day:
+                query = query.lte('exercise_day', end_day)
+        logger.debug("Exercise day filter: %s to %s", start_day, end_day)
                 
-            if exercise_type:
-                query = query.eq('exercise_type', exercise_type)
-                print(f"🔍 Exercise type filter: {exercise_type}")
+        if exercise_type:
+            query = query.eq('exercise_type', exercise_type)
+            logger.debug("Exercise type filter: %s", exercise_type)
             
-            response = query.execute()
+        response = await self._execute(query)
             
-            logs = response.data or []
-            print(f"✅ Retrieved {len(logs)} exercise logs")
+        logs = response.data or []
+        logger.debug("Retrieved %s exercise logs", len(logs))
 
-            for log in logs:
-                if log.get('duration_minutes') is None or log.get('duration_minutes') == 0:
-                    print(f"⚠️ Warning: Exercise {log.get('exercise_name')} has no duration, calculating...")
-                    # Calculate on the fly for old/corrupted records
-                    if log.get('exercise_type') == 'strength' and log.get('sets'):
-                        log['duration_minutes'] = log['sets'] * 2
-                    else:
-                        log['duration_minutes'] = 5
-            
-            # Debug the logs
-            for i, log in enumerate(logs):
-                print(f"🔍 Log {i+1}: {log.get('exercise_name')} - {log.get('duration_minutes')}min on {log.get('exercise_date')}")
+        for log in logs:
+            if log.get('duration_minutes') is None or log.get('duration_minutes') == 0:
+                logger.warning("Exercise %s has no duration, calculating...", log.get('exercise_name'))
+                # Calculate on the fly for old/corrupted records
+                if log.get('exercise_type') == 'strength' and log.get('sets'):
+                    log['duration_minutes'] = log['sets'] * 2
+                else:
+                    log['duration_minutes'] = 5
             
-            return logs
-        except Exception as e:
-            print(f"❌ Error getting exercise logs: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+        return logs
 
+    @db_safe(default=False)
     async def delete_exercise_log(self, exercise_id: str) -> bool:
         """Delete an exercise log"""
-        try:
-            response = self.client.table('exercise_logs')\
-                .delete()\
-                .eq('id', exercise_id)\
-                .execute()
-            
-            return True
-        except Exception as e:
-            print(f"❌ Error deleting exercise log: {e}")
-            return False
+        response = await self._execute(
+            self.client.table('exercise_logs')
+            .delete()
+            .eq('id', exercise_id)
+        )
+            
+        self._log_written(response.data or [])
+        return True
         
+    @db_safe()
     async def get_exercise_by_id(self, exercise_id: str):
         """Get exercise by ID"""
-        try:
-            response = self.client.table('exercise_logs')\
-                .select('*')\
-                .eq('id', exercise_id)\
-                .execute()
-            
-            return response.data[0] if response.data else None
-        except Exception as e:
-            print(f"Error getting exercise: {e}")
-            return None
+        response = await self._execute(
+            self.client.table('exercise_logs')
+            .select('*')
+            .eq('id', exercise_id)
+            .maybe_single()
+        )
+            
+        return response.data if response else None
         
+    @db_safe(default=[])
     async def get_exercises_by_date(self, user_id: str, date: date) -> List[Dict[str, Any]]:
         """Get all exercises for a specific date"""
-        try:
-            next_day = date + timedelta(days=1)
-            
-            response = self.client.table('exercise_logs')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .gte('exercise_date', str(date))\
-                .lt('exercise_date', str(next_day))\
-                .execute()
-            
-            exercises = response.data or []
-            print(f"✅ Found {len(exercises)} exercises for {date}")
-            return exercises
-        except Exception as e:
-            print(f"❌ Error getting exercises by date: {e}")
-            return []
+        next_day = date + timedelta(days=1)
+            
+        response = await self._execute(
+            self.client.table('exercise_logs')
+            .select('*')
+            .eq('user_id', user_id)
+            .gte('exercise_date', str(date))
+            .lt('exercise_date', str(next_day))
+        )
+            
+        exercises = response.data or []
+        logger.debug("Found %s exercises for %s", len(exercises), date)
+        return exercises
+
+    @db_safe(default=[])
+    async def get_daily_exercise_summary(self, user_id: str, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Per-day exercise totals (workouts, minutes, calories burned, trimmed exercise list) for a date range"""
+        response = await self._execute(
+            self.client.rpc('get_daily_exercise_summary', {
+                'p_user_id': user_id,
+                'p_start_date': str(start_date),
+                'p_end_date': str(end_date)
+            })
+        )
+        return response.data or []
+
+    @db_safe()
+    async def get_week_raw(self, user_id: str, start_date: date, end_date: date) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Daily nutrition and exercise totals plus sleep, water and step rows for a date range
+        in one RPC: {'nutrition': [...], 'exercise': [...], 'sleep': [...], 'water': [...], 'steps': [...]}
+        """
+        response = await self._execute(
+            self.client.rpc('get_week_raw', {
+                'p_user_id': user_id,
+                'p_start_date': str(start_date),
+                'p_end_date': str(end_date)
+            })
+        )
+        return response.data or None
 
     # Period methods
     async def create_period_entry(self, period_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new period entry"""
         try:
-            response = self.client.table('period_entries').insert(period_data).execute()
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
+            response = await self._execute(self.client.table('period_entries').insert(period_data))
+            return _first_or_raise(response)
         except Exception as e:
-            print(f"❌ Error creating period entry: {e}")
+            logger.error("Error creating period entry: %s", e)
             raise Exception(f"Failed to create period entry: {str(e)}")
 
     async def update_period_entry(self, entry_id: str, period_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing period entry"""
         try:
-            response = self.client.table('period_entries').update(period_data).eq('id', entry_id).execute()
-            if response.data:
-                return response.data[0]
-            else:
-                raise Exception("No data returned from Supabase")
+            response = await self._execute(
+                self.client.table('period_entries').update(period_data).eq('id', entry_id)
+            )
+            return _first_or_raise(response)
         except Exception as e:
-            print(f"❌ Error updating period entry: {e}")
+            logger.error("Error updating period entry: %s", e)
             raise Exception(f"Failed to update period entry: {str(e)}")
 
+    @db_safe(default=[])
     async def get_period_history(self, user_id: str, limit: int = 12) -> List[Dict[str, Any]]:
         """Get period history for a user"""
-        try:
-            response = self.client.table('period_entries')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .order('start_date', desc=True)\
-                .limit(limit)\
-                .execute()
-            
-            return response.data or []
-        except Exception as e:
-            print(f"❌ Error getting period history: {e}")
-            return []
+        response = await self._execute(
+            self.client.table('period_entries')
+            .select('*')
+            .eq('user_id', user_id)
+            .order('start_date', desc=True)
+            .limit(limit)
+        )
+            
+        return response.data or []
 
+    @db_safe()
     async def get_current_period(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get current ongoing period (no end date)"""
-        try:
-            response = self.client.table('period_entries')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .is_('end_date', 'null')\
-                .order('start_date', desc=True)\
-                .limit(1)\
-                .execute()
-            
-            if response.data:
-                return response.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ Error getting current period: {e}")
-            return None
+        response = await self._execute(
+            self.client.table('period_entries')
+            .select('*')
+            .eq('user_id', user_id)
+            .is_('end_date', 'null')
+            .order('start_date', desc=True)
+            .limit(1)
+            .maybe_single()
+        )
+            
+        return response.data if response else None
 
+    @db_safe(default=False)
     async def delete_period_entry(self, entry_id: str) -> bool:
         """Delete a period entry"""
-        try:
-            response = self.client.table('period_entries')\
-                .delete()\
-                .eq('id', entry_id)\
-                .execute()
+        await self._execute(
+            self.client.table('period_entries')
+            .delete(returning=ReturnMethod.minimal)
+            .eq('id', entry_id)
+        )
             
-            return True
-        except Exception as e:
-            print(f"❌ Error deleting period entry: {e}")
-            return False
+        return True
     
+    @db_safe(default=False)
     async def save_chat_message(self, user_id: str, message: str, is_user: bool) -> bool:
-        """Save a chat message"""
-        try:
-            # Get or create today's session
-            session_id = await self.get_or_create_daily_session(user_id)
-            
-            message_data = {
-                "user_id": user_id,
-                "message": message,
-                "is_user": is_user,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            # Add session_id if we have one
-            if session_id:
-                message_data["session_id"] = session_id
+        """Save a chat message - batched with concurrent ones by the background flusher"""
+        # Get or create today's session
+        session_id = await self.get_or_create_daily_session(user_id)
+        if not session_id:
+            logger.warning("No chat session for user %s - message not saved", user_id)
+            return False
             
-            self.client.table("chat_messages").insert(message_data).execute()
+        message_data = {
+            "user_id": user_id,
+            "message": message,
+            "is_user": is_user,
+            # Stamped now, not at flush time, so batched rows keep their order
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "session_id": session_id
+        }
+            
+        loop = asyncio.get_running_loop()
+        if not self._chat_queue_running(loop):
+            # No flusher on this loop (scripts, tests) - write the row directly
+            await self._insert_chat_rows([message_data])
             return True
-        except Exception as e:
-            print(f"Error saving chat message: {e}")
-            return False
+            
+        # Resolved by the flusher once the row's batch is written (or has failed)
+        written = loop.create_future()
+        self._chat_queue.put_nowait((message_data, written))
+        await written
+        return True
+
+    def start_chat_queue(self) -> None:
+        """Start the chat write queue on the running loop - call from the app lifespan"""
+        if self._chat_flusher is not None and not self._chat_flusher.done():
+            return
+        self._chat_queue = asyncio.Queue()
+        self._chat_flusher = asyncio.get_running_loop().create_task(self._flush_chat_messages())
+
+    def _chat_queue_running(self, loop: asyncio.AbstractEventLoop) -> bool:
+        return (
+            self._chat_flusher is not None
+            and not self._chat_flusher.done()
+            and self._chat_flusher.get_loop() is loop
+        )
+
+    async def _flush_chat_messages(self) -> None:
+        """
+        Insert queued chat messages, up to CHAT_FLUSH_BATCH per INSERT. Nothing waits for a
+        batch to fill: a lone message is written at once, and messages queued while an
+        INSERT is in flight go out together in the next one.
+        """
+        queue = self._chat_queue
+        stopping = False
+        while not stopping:
+            batch = [await queue.get()]
+            while len(batch) < CHAT_FLUSH_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+            # None is the shutdown sentinel from close_chat_queue
+            if None in batch:
+                stopping = True
+            items = [item for item in batch if item is not None]
+            try:
+                if items:
+                    await self._insert_chat_batch(items)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _insert_chat_batch(self, items: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Insert a batch and resolve each waiting save_chat_message with the outcome"""
+        try:
+            await self._insert_chat_rows([row for row, _ in items])
+        except Exception as e:
+            # Each waiting save_chat_message raises this and db_safe logs it there
+            for _, written in items:
+                if not written.done():
+                    written.set_exception(e)
+        else:
+            for _, written in items:
+                if not written.done():
+                    written.set_result(None)
+
+    async def _insert_chat_rows(self, rows: List[Dict[str, Any]]) -> None:
+        await self._execute(
+            self.client.table("chat_messages").insert(rows, returning=ReturnMethod.minimal)
+        )
 
+    async def close_chat_queue(self) -> None:
+        """Write out any queued chat messages and stop the flusher - call on shutdown"""
+        if self._chat_flusher is None or self._chat_flusher.done():
+            return
+        self._chat_queue.put_nowait(None)
+        await self._chat_flusher
+        self._chat_flusher = None
+
+    async def wait_for_background_writes(self) -> None:
+        """Wait for fire-and-forget inserts to finish - call on shutdown"""
+        if self._background_writes:
+            await asyncio.gather(*self._background_writes, return_exceptions=True)
+
+    @db_safe(default=[])
     async def get_chat_messages(self, user_id: str, limit: int = 50, session_id: str = None) -> List[Dict]:
         """Get chat messages for a user"""
-        try:
-            query = self.client.table("chat_messages")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .order("created_at", desc=False)\
-                .limit(limit)
+        query = self.client.table("chat_messages")\
+            .select("*")\
+            .eq("user_id", user_id)\
+            .order("created_at", desc=False)\
+            .limit(limit)
             
-            if session_id:
-                query = query.eq("session_id", session_id)
+        if session_id:
+            query = query.eq("session_id", session_id)
             
-            result = query.execute()
-            return result.data if result.data else []
-        except Exception as e:
-            print(f"Error getting chat messages: {e}")
-            return []
+        result = await self._execute(query)
+        return result.data if result.data else []
 
+    @db_safe(default=False)
     async def clear_chat_messages(self, user_id: str) -> bool:
         """Clear all chat messages for a user"""
-        try:
-            self.client.table("chat_messages")\
-                .delete()\
-                .eq("user_id", user_id)\
-                .execute()
-            return True
-        except Exception as e:
-            print(f"Error clearing chat messages: {e}")
-            return False
+        await self._execute(
+            self.client.table("chat_messages")
+            .delete(returning=ReturnMethod.minimal)
+            .eq("user_id", user_id)
+        )
+        return True
 
+    @db_safe(default=[])
     async def get_recent_chat_context(self, user_id: str, limit: int = 10) -> List[Dict]:
         """Get recent messages for AI context"""
-        try:
-            result = self.client.table("chat_messages")\
-                .select("message, is_user, created_at")\
-                .eq("user_id", user_id)\
-                .order("created_at", desc=True)\
-                .limit(limit)\
-                .execute()
-            
-            messages = result.data if result.data else []
-            return list(reversed(messages))  # Return in chronological order
-        except Exception as e:
-            print(f"Error getting recent chat context: {e}")
-            return []
+        # Newest `limit` messages, returned in chronological order by the function
+        result = await self._execute(
+            self.client.rpc('recent_chat_context', {'p_user_id': user_id, 'p_limit': limit})
+        )
+        return result.data or []
     
     async def create_chat_session(self, user_id: str, title: str = None) -> Dict[str, Any]:
         """Create a new chat session"""
         try:
             session_data = {
                 "user_id": user_id,
-                "title": title or "New Chat",
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                "updated_at": datetime.now(timezone.utc).isoformat()
+                "title": title or "New Chat"
             }
             
-            response = self.client.table("chat_sessions").insert(session_data).execute()
+            response = await self._execute(self.client.table("chat_sessions").insert(session_data))
             return response.data[0]
         except Exception as e:
-            print(f"Error creating chat session: {e}")
+            logger.error("Error creating chat session: %s", e)
             raise e
 
+    def create_chat_session_background(self, user_id: str, title: str = None) -> Dict[str, Any]:
+        """
+        Like create_chat_session, but returns a locally generated id straight away and
+        inserts the row in a background task. Use create_chat_session when the caller
+        must know the row exists (e.g. before writing messages that reference it).
+        """
+        session_data = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "title": title or "New Chat"
+        }
+        task = asyncio.get_running_loop().create_task(
+            self._execute(self.client.table("chat_sessions").insert(session_data, returning=ReturnMethod.minimal))
+        )
+        self._background_writes.add(task)
+        task.add_done_callback(self._background_write_done)
+        return session_data
+
+    def _background_write_done(self, task: asyncio.Task) -> None:
+        self._background_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background chat session insert failed: %s", task.exception())
+
+    def _chat_session_today(self) -> date:
+        """Today's UTC date, emptying the session id cache when it changes"""
+        today = datetime.now(timezone.utc).date()
+        if today != self._chat_session_day:
+            # New day: yesterday's session ids can never be hit again
+            self._chat_session_cache.clear()
+            self._chat_session_day = today
+        return today
+
     async def get_or_create_daily_session(self, user_id: str) -> str:
-        """Get today's session or create a new one"""
+        """Get today's (UTC) session or create a new one - cached per user until UTC midnight"""
+        today = self._chat_session_today()
+        return await self._chat_session_cache.get_or_load(
+            user_id, lambda: self._fetch_or_create_daily_session(user_id, today)
+        )
+
+    @db_safe()
+    async def _fetch_or_create_daily_session(self, user_id: str, today: date) -> Optional[str]:
+        # Lookup and (on the day's first message) insert happen in one call, under a per-user lock
+        response = await self._execute(
+            self.client.rpc('get_or_create_daily_session', {
+                'p_user_id': user_id,
+                'p_today': today.isoformat()
+            })
+        )
+        return response.data
+
+    async def get_chat_bootstrap(self, user_id: str, limit: int = 10) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """
+        Today's session id and the last `limit` messages (oldest first) in one round trip.
+        Also primes the session cache so the turn's save_chat_message calls skip the lookup.
+        """
         try:
-            today = datetime.now().date()
-            
-            # Look for today's session
-            response = self.client.table("chat_sessions")\
-                .select("id")\
-                .eq("user_id", user_id)\
-                .gte("created_at", f"{today}T00:00:00")\
-                .lte("created_at", f"{today}T23:59:59")\
-                .order("created_at", desc=True)\
-                .limit(1)\
-                .execute()
-            
-            if response.data:
-                return response.data[0]["id"]
-            
-            # Create new session for today
-            session = await self.create_chat_session(user_id, f"Health Chat - {today}")
-            return session["id"]
-        except Exception as e:
-            print(f"Error getting/creating daily session: {e}")
-            # Fallback - continue without session_id
-            return None
+            today = self._chat_session_today()
+            response = await self._execute(
+                self.client.rpc('chat_bootstrap', {
+                    'p_user_id': user_id,
+                    'p_today': today.isoformat(),
+                    'p_limit': limit
+                })
+            )
+            session_id = response.data['session_id']
+            self._chat_session_cache.put(user_id, session_id)
+            return session_id, response.data['messages']
+        except Exception as e:
+            logger.exception("Error bootstrapping chat: %s", e)
+            return None, []
 
 # Global instance - we'll initialize this in main.py
 supabase_service = None
+# APScheduler jobs run on background threads - only one of them may build the client
+_supabase_service_lock = threading.Lock()
 
 def get_supabase_service() -> SupabaseService:
     """Get the global Supabase service instance"""
     global supabase_service
     if supabase_service is None:
-        supabase_service = SupabaseService()
+        with _supabase_service_lock:
+            if supabase_service is None:
+                supabase_service = SupabaseService()
     return supabase_service
 
-def init_supabase_service():
-    """Initialize the global Supabase service"""
+def start_supabase_chat_queue() -> None:
+    """Bind the chat write queue to the app's event loop - call from the lifespan"""
+    get_supabase_service().start_chat_queue()
+
+async def flush_supabase_chat_queue() -> None:
+    """Write out queued chat messages and background inserts before shutdown"""
+    if supabase_service is not None:
+        await supabase_service.close_chat_queue()
+        await supabase_service.wait_for_background_writes()
+
+def close_supabase_service() -> None:
+    """Close the global service's HTTP connections on shutdown"""
     global supabase_service
-    supabase_service = SupabaseService()
-    return supabase_service
\ No newline at end of file
+    if supabase_service is not None:
+        supabase_service.close()
+        supabase_service = None
+
+def init_supabase_service():
+    """Initialize the global Supabase service (called once from the FastAPI lifespan)"""
+    return get_supabase_service()
\ No newline at end of file
@@ -1,19 +1,143 @@
 # services/usda_service.py
-import aiohttp
+import asyncio
+import httpx
+import logging
+import orjson
 import os
-from typing import Dict, Any, Optional, List
+import re
+import tempfile
+from typing import Awaitable, Callable, Dict, Any, Optional, List
 from datetime import datetime
+from utils.sqlite_cache import SQLiteCache
+from utils.ttl_cache import AsyncTTLCache
+
+logger = logging.getLogger(__name__)
+
+# Searches can change as USDA adds foods; food details for an fdc_id never do
+SEARCH_DISK_TTL = 7 * 24 * 3600
+
+_QUERY_TOKEN = re.compile(r"[a-z0-9]+")
+# Question phrasing around the food name - none of it changes what USDA should be searched for.
+# Nutrient names like "protein" stay: they are part of foods ("protein bar", "low fat milk")
+_QUERY_FILLER = frozenset({
+    "a", "an", "the", "of", "in", "for", "is", "are", "there", "how", "much", "many", "what",
+    "whats", "does", "do", "contain", "contains", "content", "amount", "calories", "calorie",
+    "nutrition", "nutritional", "info", "facts", "value", "values"
+})
+
+# (USDA nutrient name, unit) -> (our field, coercion); other nutrients and units are ignored
+NUTRIENT_TABLE = {
+    ("Energy", "kcal"): ("calories", int),
+    ("Protein", "g"): ("protein_g", float),
+    ("Carbohydrate, by difference", "g"): ("carbs_g", float),
+    ("Total lipid (fat)", "g"): ("fat_g", float),
+    ("Fiber, total dietary", "g"): ("fiber_g", float),
+    ("Sugars, total including NLEA", "g"): ("sugar_g", float),
+    ("Sodium, Na", "mg"): ("sodium_mg", int),
+}
+# Every field in our nutrition format with its default; int fields are whole numbers after scaling
+_NUTRIENT_DEFAULTS = {
+    "calories": 0, "protein_g": 0.0, "carbs_g": 0.0, "fat_g": 0.0,
+    "fiber_g": 0.0, "sugar_g": 0.0, "sodium_mg": 0,
+}
+_INT_FIELDS = frozenset({"calories", "sodium_mg"})
+# Shared read-only stand-in for a missing "nutrient" object - never mutated
+_EMPTY: Dict[str, Any] = {}
+
+# Checked in this order before falling back to the first plain number
+_FRACTIONS = (("1/4", 0.25), ("1/3", 0.33), ("1/2", 0.5), ("2/3", 0.67), ("3/4", 0.75))
+_NUMBER = re.compile(r'\d+\.?\d*')
+
+# Household measures in grams (1 cup ≈ 240g, 1 tbsp ≈ 15g, ...)
+UNIT_TO_GRAMS = {
+    "cup": 240, "tbsp": 15, "tablespoon": 15, "tsp": 5, "teaspoon": 5,
+    "oz": 28.35, "ounce": 28.35, "g": 1, "gram": 1,
+}
+SIZE_MULTIPLIER = {"small": 0.75, "medium": 1.0, "large": 1.5}
+# Whole unit words only, so "egg" or "large" never read as grams; "100g" still matches
+_QUANTITY_UNIT = re.compile(
+    r'(?<![a-z])(cups?|tbsps?|tablespoons?|tsps?|teaspoons?|oz|ounces?|g|grams?|small|medium|large)(?![a-z])'
+)
+
+def _scale(field: str, value: float, multiplier: float) -> float:
+    # 1.0 is the common case (default, "medium", "100g") - skip the multiply, and for
+    # int fields (already ints from NUTRIENT_TABLE or the default) the int() as well
+    if field in _INT_FIELDS:
+        return value if multiplier == 1.0 else int(value * multiplier)
+    return round(value if multiplier == 1.0 else value * multiplier, 1)
+
+def canonical_food_query(query: str) -> str:
+    """
+    Cache key and search text shared by rewordings of the same food question:
+    "How much protein is in chicken breast?" and "protein in Chicken  breast" -> "protein chicken breast".
+    Word order is kept - "milk chocolate" and "chocolate milk" are different foods.
+    """
+    tokens = [token for token in _QUERY_TOKEN.findall(query.lower()) if token not in _QUERY_FILLER]
+    # A query made only of filler words keeps its own key rather than collapsing to ""
+    return " ".join(tokens) or query.strip().lower()
 
 class USDAService:
     def __init__(self):
         self.api_key = os.getenv("USDA_API_KEY", "DEMO_KEY") 
         self.base_url = "https://api.nal.usda.gov/fdc/v1"
-        print("✅ USDA FoodData Central service initialized")
+        # One pooled HTTP/2 client for every call - concurrent lookups multiplex over one TLS connection
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60)
+        )
+        # USDA answers are static and the API is rate-limited - keep them for an hour
+        self._search_cache = AsyncTTLCache(maxsize=500, ttl=3600)
+        self._details_cache = AsyncTTLCache(maxsize=500, ttl=3600)
+        # Second tier behind the in-memory caches that survives restarts and deploys
+        self._disk_cache = SQLiteCache(
+            os.getenv("USDA_CACHE_PATH", os.path.join(tempfile.gettempdir(), "usda_cache.sqlite3"))
+        )
+        logger.info("USDA FoodData Central service initialized")
     
-    async def search_food(self, query: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
-        """Search for food items in USDA database"""
+    def cache_info(self) -> Dict[str, Any]:
+        """Hit rates of the response caches (coalesced = callers that shared an in-flight request)"""
+        return {
+            'search': self._search_cache.cache_info(),
+            'details': self._details_cache.cache_info()
+        }
+    
+    async def close(self):
+        """Close the shared HTTP client and the disk cache"""
+        await self._client.aclose()
+        self._disk_cache.close()
+    
+    async def _load_through_disk(self, key: str, ttl: Optional[float], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the disk-cached payload for key, else fetch it from USDA and store it"""
+        value = await self._disk_cache.get(key)
+        if value is None:
+            value = await fetch()
+            if value is not None:
+                await self._disk_cache.set(key, value, ttl)
+        return value
+    
+    async def search_food(self, query: str, limit: int = 5, use_cache: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """
+        Search for food items in USDA database.
+        Searches run with the canonical query and are cached under it, so reworded questions
+        about the same food share one request and one result.
+        """
+        query = canonical_food_query(query)
+        if not use_cache:
+            return await self._fetch_search(query, limit)
+        key = (query, limit)
+        # "search2:" - the old "search:" disk entries were keyed on sorted words
+        return await self._search_cache.get_or_load(key, lambda: self._load_through_disk(
+            f"search2:{query}:{limit}", SEARCH_DISK_TTL, lambda: self._fetch_search(query, limit)
+        ))
+    
+    async def search_foods(self, queries: List[str], limit: int = 5) -> List[Optional[List[Dict[str, Any]]]]:
+        """Search several foods concurrently - results in the same order as queries"""
+        return await asyncio.gather(*[self.search_food(query, limit) for query in queries])
+    
+    async def _fetch_search(self, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
         try:
-            url = f"{self.base_url}/foods/search"
             params = {
                 "query": query,
                 "limit": limit,
@@ -21,33 +145,32 @@ class USDAService:
                 "dataType": ["Foundation", "SR Legacy", "Branded"]  # Include all food types
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get("foods", [])
-                    else:
-                        print(f"⚠️ USDA API returned status {response.status}")
-                        return None
+            response = await self._client.get("/foods/search", params=params)
+            if response.status_code == 200:
+                # Search payloads run to hundreds of KB - parse the raw bytes with orjson
+                return orjson.loads(response.content).get("foods", [])
+            logger.warning("USDA API returned status %s", response.status_code)
+            return None
                         
         except Exception as e:
-            print(f"❌ Error searching USDA database: {e}")
+            logger.exception("Error searching USDA database: %s", e)
             return None
     
     async def get_food_details(self, fdc_id: int) -> Optional[Dict[str, Any]]:
-        """Get detailed nutrition info for a specific food"""
+        """Get detailed nutrition info for a specific food (cached per fdc_id)"""
+        return await self._details_cache.get_or_load(fdc_id, lambda: self._load_through_disk(
+            f"food:{fdc_id}", None, lambda: self._fetch_food_details(fdc_id)
+        ))
+    
+    async def _fetch_food_details(self, fdc_id: int) -> Optional[Dict[str, Any]]:
         try:
-            url = f"{self.base_url}/food/{fdc_id}"
-            params = {"api_key": self.api_key}
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    return None
+            response = await self._client.get(f"/food/{fdc_id}", params={"api_key": self.api_key})
+            if response.status_code == 200:
+                return orjson.loads(response.content)
+            return None
                     
         except Exception as e:
-            print(f"❌ Error getting food details: {e}")
+            logger.exception("Error getting food details: %s", e)
             return None
     
     def parse_nutrition_from_usda(self, food_data: Dict[str, Any], quantity: str) -> Dict[str, Any]:
@@ -55,118 +178,69 @@ class USDAService:
         try:
             # Extract nutrients
             nutrients = {}
-            nutrient_map = {
-                "Energy": "calories",
-                "Protein": "protein_g",
-                "Carbohydrate, by difference": "carbs_g",
-                "Total lipid (fat)": "fat_g",
-                "Fiber, total dietary": "fiber_g",
-                "Sugars, total including NLEA": "sugar_g",
-                "Sodium, Na": "sodium_mg"
-            }
-            
-            # Process food nutrients
-            for nutrient in food_data.get("foodNutrients", []):
-                nutrient_name = nutrient.get("nutrient", {}).get("name", "")
-                if nutrient_name in nutrient_map:
-                    value = nutrient.get("amount", 0)
-                    
-                    # Convert units if needed
-                    unit = nutrient.get("nutrient", {}).get("unitName", "")
-                    if nutrient_name == "Energy" and unit == "kcal":
-                        nutrients["calories"] = int(value)
-                    elif nutrient_name == "Sodium, Na" and unit == "mg":
-                        nutrients["sodium_mg"] = int(value)
-                    elif unit == "g":
-                        nutrients[nutrient_map[nutrient_name]] = float(value)
+            for nutrient in food_data.get("foodNutrients", ()):
+                info = nutrient.get("nutrient") or _EMPTY
+                entry = NUTRIENT_TABLE.get((info.get("name"), info.get("unitName")))
+                if entry:
+                    field, coerce = entry
+                    nutrients[field] = coerce(nutrient.get("amount", 0))
             
             # Calculate serving size multiplier based on quantity
             serving_multiplier = self._calculate_serving_multiplier(quantity, food_data)
             
-            # Apply multiplier to all nutrients
-            for key in nutrients:
-                if key == "calories" or key == "sodium_mg":
-                    nutrients[key] = int(nutrients[key] * serving_multiplier)
-                else:
-                    nutrients[key] = round(nutrients[key] * serving_multiplier, 1)
-            
-            # Ensure all required fields exist
+            # Scale every field (missing ones default) in one pass
             nutrition_data = {
-                "calories": nutrients.get("calories", 0),
-                "protein_g": nutrients.get("protein_g", 0.0),
-                "carbs_g": nutrients.get("carbs_g", 0.0),
-                "fat_g": nutrients.get("fat_g", 0.0),
-                "fiber_g": nutrients.get("fiber_g", 0.0),
-                "sugar_g": nutrients.get("sugar_g", 0.0),
-                "sodium_mg": nutrients.get("sodium_mg", 0),
+                field: _scale(field, nutrients.get(field, default), serving_multiplier)
+                for field, default in _NUTRIENT_DEFAULTS.items()
+            }
+            nutrition_data.update({
                 "serving_description": quantity,
                 "data_source": "USDA",
                 "fdc_id": food_data.get("fdcId"),
                 "food_description": food_data.get("description", ""),
                 "confidence_score": 0.95  # High confidence for USDA data
-            }
+            })
             
             return nutrition_data
             
         except Exception as e:
-            print(f"❌ Error parsing USDA nutrition data: {e}")
+            logger.exception("Error parsing USDA nutrition data: %s", e)
             return None
     
     def _calculate_serving_multiplier(self, quantity: str, food_data: Dict) -> float:
         """Calculate how much to multiply base nutrition by"""
         try:
             quantity_lower = quantity.lower()
+            match = _QUANTITY_UNIT.search(quantity_lower)
+            unit = match.group(1) if match else None
             
-            # Common quantity patterns
-            if "cup" in quantity_lower:
-                cups = self._extract_number(quantity_lower, default=1.0)
-                return cups * 240 / 100  # 1 cup ≈ 240g, USDA base is per 100g
-            elif "tbsp" in quantity_lower or "tablespoon" in quantity_lower:
-                tbsp = self._extract_number(quantity_lower, default=1.0)
-                return tbsp * 15 / 100  # 1 tbsp ≈ 15g
-            elif "tsp" in quantity_lower or "teaspoon" in quantity_lower:
-                tsp = self._extract_number(quantity_lower, default=1.0)
-                return tsp * 5 / 100  # 1 tsp ≈ 5g
-            elif "oz" in quantity_lower or "ounce" in quantity_lower:
-                oz = self._extract_number(quantity_lower, default=1.0)
-                return oz * 28.35 / 100  # 1 oz ≈ 28.35g
-            elif "g" in quantity_lower or "gram" in quantity_lower:
-                grams = self._extract_number(quantity_lower, default=100.0)
-                return grams / 100
-            elif any(size in quantity_lower for size in ["small", "medium", "large"]):
+            if unit in SIZE_MULTIPLIER:
                 # Estimate based on typical serving sizes
-                if "small" in quantity_lower:
-                    return 0.75
-                elif "large" in quantity_lower:
-                    return 1.5
-                else:  # medium
-                    return 1.0
-            else:
-                # Try to extract a number (e.g., "2 apples")
-                number = self._extract_number(quantity_lower, default=1.0)
-                return number
+                return SIZE_MULTIPLIER[unit]
+            if unit:
+                # USDA base is per 100g; a bare gram unit defaults to 100g
+                unit = unit.rstrip('s')
+                grams_per_unit = UNIT_TO_GRAMS[unit]
+                amount = self._extract_number(quantity_lower, default=100.0 if grams_per_unit == 1 else 1.0)
+                return amount * grams_per_unit / 100
+            
+            # Try to extract a number (e.g., "2 apples")
+            return self._extract_number(quantity_lower, default=1.0)
                 
         except Exception:
             return 1.0  # Default to 1 serving if parsing fails
     
     def _extract_number(self, text: str, default: float = 1.0) -> float:
         """Extract numeric value from text"""
-        import re
-        
         # Handle fractions
-        fraction_map = {
-            "1/4": 0.25, "1/3": 0.33, "1/2": 0.5, 
-            "2/3": 0.67, "3/4": 0.75
-        }
-        
-        for fraction, value in fraction_map.items():
-            if fraction in text:
-                return value
+        fraction = next((value for fraction, value in _FRACTIONS if fraction in text), None)
+        if fraction is not None:
+            return fraction
         
         # Extract decimal/integer
-        numbers = re.findall(r'\d+\.?\d*', text)
-        if numbers:
-            return float(numbers[0])
+        match = _NUMBER.search(text)
+        if match:
+            return float(match.group())
         
         return default
 
@@ -183,4 +257,9 @@ def init_usda_service():
     """Initialize USDA service on startup"""
     global _usda_service
     _usda_service = USDAService()
-    return _usda_service
\ No newline at end of file
+    return _usda_service
+
+async def close_usda_service():
+    """Close the USDA HTTP session on shutdown"""
+    if _usda_service is not None:
+        await _usda_service.close()
\ No newline at end of file
@@ -2,12 +2,113 @@
 
 from typing import Dict, Any, List, Optional
 from datetime import datetime, date, timedelta
+import asyncio
 import json
+import logging
+from collections import Counter
 from services.supabase_service import get_supabase_service
+from utils.ttl_cache import AsyncTTLCache
+
+logger = logging.getLogger(__name__)
+
+# (key, column whose first 10 chars are the day) - get_week_raw's keys, in the order _fetch_week's fallback queries them
+DAY_FETCHES = (
+    ('nutrition', 'date'),
+    ('exercise', 'date'),
+    ('sleep', 'date'),
+    ('water', 'date'),
+    ('steps', 'date'),
+    ('weight', 'date'),
+    ('supplements', 'date'),
+)
+
+# Weekly targets the rollup scores against
+WATER_GOAL_GLASSES = 8
+STEP_GOAL = 10000
+WORKOUT_GOAL = 3
+
+def _user_goals(user: Dict[str, Any]) -> Dict[str, Any]:
+    """The user fields the insight rules read, looked up once per week instead of once per rule"""
+    weight_goal = user.get('weight_goal') or ''
+    lowered = weight_goal.lower()
+    return {
+        'weight_goal': weight_goal,
+        'tdee': user.get('tdee') or 2000,
+        'weight': user.get('weight') or 70,
+        'losing': 'lose' in lowered,
+        # 'lose' wins if a goal somehow mentions both
+        'gaining': 'lose' not in lowered and 'gain' in lowered,
+    }
+
+# (insight bucket, condition(weekly_data, goals), message) - evaluated in order by _calculate_weekly_insights,
+# goals being _user_goals(user). Messages are str.format templates: {d[...]} reads weekly_data,
+# {weight_delta} is |weight_change|.
+INSIGHT_RULES = (
+    # Achievements
+    ('achievements', lambda d, g: d['calorie_goal_achievement'] >= 80, "Great calorie tracking consistency!"),
+    ('achievements', lambda d, g: d['total_workouts'] >= WORKOUT_GOAL, "Completed {d[total_workouts]} workouts!"),
+    ('achievements', lambda d, g: d['hydration_consistency'] >= 85, "Excellent hydration habits!"),
+    ('achievements', lambda d, g: d['avg_sleep'] >= 7, "Good sleep average maintained!"),
+    ('achievements', lambda d, g: d['weight_change'] < 0 and g['weight_goal'] == 'lose_weight',
+     "Lost {weight_delta}kg this week!"),
+    ('achievements', lambda d, g: d['weight_change'] > 0 and g['weight_goal'] == 'gain_weight',
+     "Gained {weight_delta}kg this week!"),
+    # Areas for improvement
+    ('improvements', lambda d, g: d['total_workouts'] < 2, "Try to add more workouts next week"),
+    ('improvements', lambda d, g: d['hydration_consistency'] < 60, "Focus on daily water intake"),
+    ('improvements', lambda d, g: d['avg_sleep'] < 6, "Prioritize getting more sleep"),
+    ('improvements', lambda d, g: d['days_with_data'] < 4, "Log your activities more consistently"),
+    # Trends
+    ('trends', lambda d, g: 0 < d['avg_calories'] < g['tdee'] * 0.8, "Calorie intake is below target"),
+    ('trends', lambda d, g: d['avg_calories'] > g['tdee'] * 1.2, "Calorie intake is above target"),
+    # Personalized recommendations
+    ('recommendations', lambda d, g: g['losing'] and d['avg_calories'] > g['tdee'], "Consider reducing portion sizes"),
+    ('recommendations', lambda d, g: g['losing'] and d['total_workouts'] < WORKOUT_GOAL, "Add more cardio sessions"),
+    ('recommendations', lambda d, g: g['gaining'] and d['avg_protein'] < g['weight'] * 1.6, "Increase protein intake"),
+    ('recommendations', lambda d, g: g['gaining'] and d['total_workouts'] < WORKOUT_GOAL,
+     "Add strength training sessions"),
+)
+
+def _num(value: Any) -> float:
+    """Numeric column value as a float, treating NULL/empty as 0"""
+    return float(value) if value not in (None, '') else 0.0
+
+def _supplement_days(logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Supplement logs as one {date, logged, taken} row per day, the shape get_week_raw returns"""
+    days: Dict[str, Dict[str, Any]] = {}
+    for log in logs:
+        day = days.setdefault(log['date'], {'date': log['date'], 'logged': 0, 'taken': []})
+        day['logged'] += 1
+        if log.get('taken'):
+            day['taken'].append(log['supplement_name'])
+    return list(days.values())
+
+def _result(value: Any) -> Any:
+    """Re-raise an exception captured by asyncio.gather(return_exceptions=True)"""
+    if isinstance(value, BaseException):
+        raise value
+    return value
 
 class WeeklyContextManager:
     def __init__(self):
         self.supabase_service = get_supabase_service()
+        # Stored context of finished weeks per (user_id, week_start ISO); the current week
+        # is always read from weekly_contexts, which a trigger clears on every write
+        self._context_cache = AsyncTTLCache(maxsize=2_000, ttl=600)
+        # A backfilled log can change a finished week too - the trigger only clears the stored row
+        self.supabase_service.add_log_write_listener(self.invalidate)
+        # Background cache warm-ups in flight per (user_id, week_start ISO) - also keeps the tasks referenced
+        self._prefetching: Dict[tuple, asyncio.Task] = {}
+    
+    def invalidate(self, user_id: str, week_start: Optional[date] = None) -> None:
+        """Forget the cached context for one week, or for every week of the user"""
+        if week_start is None:
+            self._context_cache.pop_where(lambda key: key[0] == user_id)
+        else:
+            self._context_cache.pop((user_id, str(week_start)))
+    
+    def cache_info(self) -> Dict[str, Any]:
+        return self._context_cache.cache_info()
     
     def get_week_boundaries(self, target_date: date) -> tuple:
         """Get the start and end dates of the week containing target_date"""
@@ -28,38 +129,62 @@ class WeeklyContextManager:
         target_date: date = None
     ) -> Dict[str, Any]:
         """Get or create weekly context for a given date"""
+        today = datetime.now().date()
         if target_date is None:
-            target_date = datetime.now().date()
+            target_date = today
         
         week_start, week_end = self.get_week_boundaries(target_date)
+        if week_end >= today:
+            # In-progress week: the stored row is dropped whenever the user logs something
+            result = await self._load_weekly_context(user_id, target_date, week_start, week_end)
+            if result:
+                # Trend and history views read last week next - have it cached by then
+                self._prefetch_week(user_id, week_start - timedelta(days=7))
+            return result or {'success': False, 'error': 'Weekly context unavailable'}
+        result = await self._context_cache.get_or_load(
+            (user_id, str(week_start)),
+            lambda: self._load_weekly_context(user_id, target_date, week_start, week_end)
+        )
+        return result or {'success': False, 'error': 'Weekly context unavailable'}
+    
+    def _prefetch_week(self, user_id: str, week_start: date) -> None:
+        """Warm the cache for a finished week in the background, at most once at a time per week"""
+        key = (user_id, str(week_start))
+        if key in self._prefetching:
+            return
+        task = asyncio.create_task(self.get_or_create_weekly_context(user_id, week_start))
+        self._prefetching[key] = task
+        task.add_done_callback(lambda _: self._prefetching.pop(key, None))
+    
+    async def _load_weekly_context(
+        self,
+        user_id: str,
+        target_date: date,
+        week_start: date,
+        week_end: date
+    ) -> Optional[Dict[str, Any]]:
+        """Read the stored weekly context or build it - None (not cached) on failure"""
         week_number, year = self.get_week_number(target_date)
         
         try:
             # Check if weekly context exists
-            response = self.supabase_service.client.table('weekly_contexts')\
+            response = await self.supabase_service.execute(self.supabase_service.client.table('weekly_contexts')\
                 .select('*')\
                 .eq('user_id', user_id)\
-                .eq('week_start_date', str(week_start))\
-                .execute()
+                .eq('week_start_date', str(week_start)))
             
             if response.data:
-                return {
-                    'success': True,
-                    'weekly_context': response.data[0]['context_data'],
-                    'summary': response.data[0].get('summary_data', {}),
-                    'week_start': str(week_start),
-                    'week_end': str(week_end),
-                    'version': response.data[0]['version']
-                }
+                return self._context_result(response.data[0], response.data[0]['version'])
             
             # Create new weekly context
-            return await self.create_weekly_context(
+            result = await self.create_weekly_context(
                 user_id, week_start, week_end, week_number, year
             )
+            return result if result.get('success') else None
             
         except Exception as e:
-            print(f"Error getting weekly context: {e}")
-            return {'success': False, 'error': str(e)}
+            logger.exception("Error getting weekly context: %s", e)
+            return None
     
     async def create_weekly_context(
         self, 
@@ -71,137 +196,201 @@ class WeeklyContextManager:
     ) -> Dict[str, Any]:
         """Create a new weekly context by aggregating daily data"""
         try:
-            # Get user profile
-            user = await self.supabase_service.get_user(user_id)
-            if not user:
-                raise ValueError(f"User {user_id} not found")
+            row = await self.build_weekly_context(user_id, week_start, week_end, week_number, year)
+            versions = await self.persist_weekly_contexts([row])
+            version = versions.get((user_id, str(week_start)), 1)
             
-            # Aggregate data for the entire week
-            weekly_data = await self._aggregate_weekly_data(
-                user_id, week_start, week_end
-            )
-            
-            # Calculate weekly insights
-            insights = self._calculate_weekly_insights(weekly_data, user)
+            logger.info("Weekly context saved for week %s/%s (v%s)", week_number, year, version)
             
-            # Build weekly context structure
-            context_data = {
-                'week_info': {
-                    'week_number': week_number,
-                    'year': year,
-                    'start_date': str(week_start),
-                    'end_date': str(week_end),
-                    'days_logged': weekly_data['days_with_data']
-                },
-                'nutrition_summary': {
-                    'total_calories': weekly_data['total_calories'],
-                    'avg_daily_calories': weekly_data['avg_calories'],
-                    'total_protein': weekly_data['total_protein'],
-                    'total_carbs': weekly_data['total_carbs'],
-                    'total_fat': weekly_data['total_fat'],
-                    'avg_daily_protein': weekly_data['avg_protein'],
-                    'avg_daily_carbs': weekly_data['avg_carbs'],
-                    'avg_daily_fat': weekly_data['avg_fat'],
-                    'total_meals_logged': weekly_data['total_meals'],
-                    'daily_breakdown': weekly_data['daily_nutrition']
-                },
-                'exercise_summary': {
-                    'total_workouts': weekly_data['total_workouts'],
-                    'total_minutes': weekly_data['total_exercise_minutes'],
-                    'total_calories_burned': weekly_data['total_calories_burned'],
-                    'workout_types': weekly_data['workout_types'],
-                    'muscle_groups_worked': weekly_data['muscle_groups'],
-                    'workout_days': weekly_data['workout_days'],
-                    'rest_days': 7 - len(weekly_data['workout_days']),
-                    'exercises_performed': weekly_data['exercises_list']
-                },
-                'hydration_summary': {
-                    'total_water_glasses': weekly_data['total_water'],
-                    'avg_daily_glasses': weekly_data['avg_water'],
-                    'days_met_goal': weekly_data['days_water_goal_met'],
-                    'hydration_consistency': weekly_data['hydration_consistency'],
-                    'daily_breakdown': weekly_data['daily_water']
-                },
-                'activity_summary': {
-                    'total_steps': weekly_data['total_steps'],
-                    'avg_daily_steps': weekly_data['avg_steps'],
-                    'days_met_step_goal': weekly_data['days_step_goal_met'],
-                    'most_active_day': weekly_data['most_active_day'],
-                    'least_active_day': weekly_data['least_active_day'],
-                    'daily_breakdown': weekly_data['daily_steps']
-                },
-                'sleep_summary': {
-                    'total_hours': weekly_data['total_sleep'],
-                    'avg_nightly_hours': weekly_data['avg_sleep'],
-                    'best_night': weekly_data['best_sleep_day'],
-                    'worst_night': weekly_data['worst_sleep_day'],
-                    'sleep_consistency': weekly_data['sleep_consistency'],
-                    'daily_breakdown': weekly_data['daily_sleep']
-                },
-                'weight_progress': {
-                    'starting_weight': weekly_data['week_start_weight'],
-                    'ending_weight': weekly_data['week_end_weight'],
-                    'weight_change': weekly_data['weight_change'],
-                    'measurements': weekly_data['weight_measurements']
-                },
-                'supplement_adherence': {
-                    'supplements_tracked': weekly_data['supplements_list'],
-                    'adherence_rate': weekly_data['supplement_adherence'],
-                    'daily_breakdown': weekly_data['daily_supplements']
-                },
-                'insights': insights,
-                'goals_progress': {
-                    'calorie_goal_achievement': weekly_data['calorie_goal_achievement'],
-                    'water_goal_achievement': weekly_data['water_goal_achievement'],
-                    'step_goal_achievement': weekly_data['step_goal_achievement'],
-                    'workout_goal_achievement': weekly_data['workout_goal_achievement']
-                }
-            }
+            return self._context_result(row, version)
             
-            # Create summary for quick reference
-            summary_data = {
+        except Exception as e:
+            logger.exception("Error creating weekly context: %s", e)
+            return {'success': False, 'error': str(e)}
+    
+    async def build_weekly_context(
+        self,
+        user_id: str,
+        week_start: date,
+        week_end: date,
+        week_number: int,
+        year: int
+    ) -> Dict[str, Any]:
+        """Aggregate a week's daily data into a weekly_contexts row, without saving it"""
+        # User profile and the week's data are independent - fetch them concurrently
+        user, weekly_data = await asyncio.gather(
+            self.supabase_service.get_user(user_id),
+            self._aggregate_weekly_data(user_id, week_start, week_end)
+        )
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+        
+        # Calculate weekly insights
+        insights = self._calculate_weekly_insights(weekly_data, user)
+        
+        # Build weekly context structure
+        context_data = {
+            'week_info': {
                 'week_number': week_number,
                 'year': year,
-                'avg_calories': weekly_data['avg_calories'],
+                'start_date': str(week_start),
+                'end_date': str(week_end),
+                'days_logged': weekly_data['days_with_data']
+            },
+            'nutrition_summary': {
+                'total_calories': weekly_data['total_calories'],
+                'avg_daily_calories': weekly_data['avg_calories'],
+                'total_protein': weekly_data['total_protein'],
+                'total_carbs': weekly_data['total_carbs'],
+                'total_fat': weekly_data['total_fat'],
+                'avg_daily_protein': weekly_data['avg_protein'],
+                'avg_daily_carbs': weekly_data['avg_carbs'],
+                'avg_daily_fat': weekly_data['avg_fat'],
+                'total_meals_logged': weekly_data['total_meals'],
+                'daily_breakdown': weekly_data['daily_nutrition']
+            },
+            'exercise_summary': {
                 'total_workouts': weekly_data['total_workouts'],
-                'avg_sleep': weekly_data['avg_sleep'],
+                'total_minutes': weekly_data['total_exercise_minutes'],
+                'total_calories_burned': weekly_data['total_calories_burned'],
+                'workout_types': weekly_data['workout_types'],
+                'muscle_groups_worked': weekly_data['muscle_groups'],
+                'workout_days': weekly_data['workout_days'],
+                'rest_days': 7 - len(weekly_data['workout_days']),
+                'exercises_performed': weekly_data['exercises_list']
+            },
+            'hydration_summary': {
+                'total_water_glasses': weekly_data['total_water'],
+                'avg_daily_glasses': weekly_data['avg_water'],
+                'days_met_goal': weekly_data['days_water_goal_met'],
+                'hydration_consistency': weekly_data['hydration_consistency'],
+                'daily_breakdown': weekly_data['daily_water']
+            },
+            'activity_summary': {
+                'total_steps': weekly_data['total_steps'],
+                'avg_daily_steps': weekly_data['avg_steps'],
+                'days_met_step_goal': weekly_data['days_step_goal_met'],
+                'most_active_day': weekly_data['most_active_day'],
+                'least_active_day': weekly_data['least_active_day'],
+                'daily_breakdown': weekly_data['daily_steps']
+            },
+            'sleep_summary': {
+                'total_hours': weekly_data['total_sleep'],
+                'avg_nightly_hours': weekly_data['avg_sleep'],
+                'best_night': weekly_data['best_sleep_day'],
+                'worst_night': weekly_data['worst_sleep_day'],
+                'sleep_consistency': weekly_data['sleep_consistency'],
+                'daily_breakdown': weekly_data['daily_sleep']
+            },
+            'weight_progress': {
+                'starting_weight': weekly_data['week_start_weight'],
+                'ending_weight': weekly_data['week_end_weight'],
                 'weight_change': weekly_data['weight_change'],
-                'top_achievements': insights.get('achievements', []),
-                'areas_for_improvement': insights.get('improvements', [])
-            }
-            
-            # Save to database
-            response = self.supabase_service.client.table('weekly_contexts')\
-                .upsert({
-                    'user_id': user_id,
-                    'week_start_date': str(week_start),
-                    'week_end_date': str(week_end),
-                    'week_number': week_number,
-                    'year': year,
-                    'context_data': context_data,
-                    'summary_data': summary_data,
-                    'version': 1,
-                    'created_at': datetime.now().isoformat(),
-                    'updated_at': datetime.now().isoformat()
-                })\
-                .execute()
-            
-            print(f"✅ Weekly context created for week {week_number}/{year}")
-            
-            return {
-                'success': True,
-                'weekly_context': context_data,
-                'summary': summary_data,
-                'week_start': str(week_start),
-                'week_end': str(week_end),
-                'version': 1
+                'measurements': weekly_data['weight_measurements']
+            },
+            'supplement_adherence': {
+                'supplements_tracked': weekly_data['supplements_list'],
+                'adherence_rate': weekly_data['supplement_adherence'],
+                'daily_breakdown': weekly_data['daily_supplements']
+            },
+            'insights': insights,
+            'goals_progress': {
+                'calorie_goal_achievement': weekly_data['calorie_goal_achievement'],
+                'water_goal_achievement': weekly_data['water_goal_achievement'],
+                'step_goal_achievement': weekly_data['step_goal_achievement'],
+                'workout_goal_achievement': weekly_data['workout_goal_achievement']
             }
-            
-        except Exception as e:
-            print(f"❌ Error creating weekly context: {e}")
-            import traceback
-            traceback.print_exc()
-            return {'success': False, 'error': str(e)}
+        }
+        
+        # Create summary for quick reference
+        summary_data = {
+            'week_number': week_number,
+            'year': year,
+            'avg_calories': weekly_data['avg_calories'],
+            'total_workouts': weekly_data['total_workouts'],
+            'avg_sleep': weekly_data['avg_sleep'],
+            'weight_change': weekly_data['weight_change'],
+            'top_achievements': insights.get('achievements', []),
+            'areas_for_improvement': insights.get('improvements', [])
+        }
+        
+        return {
+            'user_id': user_id,
+            'week_start_date': str(week_start),
+            'week_end_date': str(week_end),
+            'week_number': week_number,
+            'year': year,
+            'context_data': context_data,
+            'summary_data': summary_data
+        }
+
+    async def persist_weekly_contexts(self, rows: List[Dict[str, Any]]) -> Dict[tuple, int]:
+        """
+        Save built weekly_contexts rows in one round trip - each week is inserted, or replaces
+        the stored row with version + 1 if its content changed (an identical rebuild is not
+        rewritten). Returns {(user_id, week_start ISO): stored version}.
+        """
+        if not rows:
+            return {}
+        response = await self.supabase_service.execute(
+            self.supabase_service.client.rpc('upsert_weekly_contexts', {'p_contexts': rows})
+        )
+        return {
+            (stored['user_id'], stored['week_start_date']): stored['version']
+            for stored in response.data or []
+        }
+    
+    @staticmethod
+    def _context_result(row: Dict[str, Any], version: int) -> Dict[str, Any]:
+        """The get_or_create_weekly_context result for a weekly_contexts row"""
+        return {
+            'success': True,
+            'weekly_context': row.get('context_data'),
+            'summary': row.get('summary_data') or {},
+            'week_start': row['week_start_date'],
+            'week_end': row['week_end_date'],
+            'version': version
+        }
+    
+    async def _fetch_week(self, user_id: str, week_start: date, week_end: date) -> Dict[str, Dict[str, Any]]:
+        """
+        Nutrition and exercise totals, sleep, water, steps, weight and supplements per day
+        (keyed by ISO date). One get_week_raw RPC normally returns all seven; if it fails, fall back to one range
+        query per table run concurrently. A failed query leaves its exception in every day.
+        """
+        raw = await self.supabase_service.get_week_raw(user_id, week_start, week_end)
+        if raw is not None:
+            results = [raw.get(key) or [] for key, _ in DAY_FETCHES]
+        else:
+            results = await asyncio.gather(
+                self.supabase_service.get_daily_nutrition_range(user_id, str(week_start), str(week_end)),
+                self.supabase_service.get_daily_exercise_summary(user_id, week_start, week_end),
+                self.supabase_service.get_sleep_in_range(user_id, week_start, week_end),
+                self.supabase_service.get_water_entries_in_range(user_id, str(week_start), str(week_end)),
+                self.supabase_service.get_steps_in_range(user_id, week_start, week_end),
+                self.supabase_service.get_weight_entries(user_id, str(week_start), str(week_end)),
+                self.supabase_service.get_supplement_history(
+                    user_id, days=(week_end - week_start).days, end_date=week_end
+                ),
+                return_exceptions=True
+            )
+            if not isinstance(results[-1], BaseException):
+                results[-1] = _supplement_days(results[-1])
+        days = {
+            (week_start + timedelta(days=offset)).isoformat(): dict.fromkeys(key for key, _ in DAY_FETCHES)
+            for offset in range((week_end - week_start).days + 1)
+        }
+        for (key, column), rows in zip(DAY_FETCHES, results):
+            if isinstance(rows, BaseException):
+                for day in days.values():
+                    day[key] = rows
+                continue
+            for row in rows:
+                day = days.get(str(row.get(column) or '')[:10])
+                # One row per day; keep the first like the *_by_date getters did
+                if day is not None and day[key] is None:
+                    day[key] = row
+        return days
     
     async def _aggregate_weekly_data(
     self, 
@@ -225,8 +414,8 @@ class WeeklyContextManager:
             'total_workouts': 0,
             'total_exercise_minutes': 0,
             'total_calories_burned': 0,
-            'workout_types': {},
-            'muscle_groups': {},
+            'workout_types': Counter(),
+            'muscle_groups': Counter(),
             'workout_days': [],
             'exercises_list': [],
             
@@ -255,7 +444,9 @@ class WeeklyContextManager:
             'weight_measurements': [],
             
             # Supplements
-            'supplements_list': set(),
+            'supplements_list': Counter(),
+            'supplements_logged': 0,
+            'supplements_taken': 0,
             'daily_supplements': {},
             
             # Tracking
@@ -263,46 +454,34 @@ class WeeklyContextManager:
         }
         
         days_with_any_data = set()
-        max_steps = 0
-        min_steps = float('inf')
-        max_sleep = 0
-        min_sleep = float('inf')
         
-        # CRITICAL: Iterate through each day
-        for day_offset in range(7):
-            current_date = week_start + timedelta(days=day_offset)
-            date_str = str(current_date)
+        # One fetch for the whole week - the loop below only reduces the results in memory
+        week = await self._fetch_week(user_id, week_start, week_start + timedelta(days=6))
+        
+        # CRITICAL: Iterate through each day (week is keyed by ISO date, in order)
+        for day_offset, (date_str, day) in enumerate(week.items()):
             day_has_data = False
             
-            print(f"\n📅 Processing {date_str} (Day {day_offset + 1}/7)")
+            logger.debug("Processing %s (day %s/7)", date_str, day_offset + 1)
             
-            # Fetch meals
+            # Meals - summed per day by get_daily_nutrition_range
             try:
-                meals = await self.supabase_service.get_meals_by_date(user_id, current_date)
-                print(f"   📊 Raw meals returned: {len(meals)}")
+                nutrition = _result(day['nutrition'])
                 
-                if meals and len(meals) > 0:
+                if nutrition and nutrition.get('meals_logged'):
                     day_has_data = True
-                    
-                    # Calculate daily totals
-                    daily_cals = 0
-                    daily_protein = 0
-                    daily_carbs = 0
-                    daily_fat = 0
-                    
-                    for meal in meals:
-                        # ✅ CRITICAL: Use .get() with default 0
-                        daily_cals += float(meal.get('calories', 0) or 0)
-                        daily_protein += float(meal.get('protein_g', 0) or 0)
-                        daily_carbs += float(meal.get('carbs_g', 0) or 0)
-                        daily_fat += float(meal.get('fat_g', 0) or 0)
+                    meals_count = int(nutrition['meals_logged'])
+                    daily_cals = _num(nutrition.get('calories_consumed'))
+                    daily_protein = _num(nutrition.get('protein_g'))
+                    daily_carbs = _num(nutrition.get('carbs_g'))
+                    daily_fat = _num(nutrition.get('fat_g'))
                     
                     # ✅ CRITICAL: Add to weekly totals
                     data['total_calories'] += daily_cals
                     data['total_protein'] += daily_protein
                     data['total_carbs'] += daily_carbs
                     data['total_fat'] += daily_fat
-                    data['total_meals'] += len(meals)
+                    data['total_meals'] += meals_count
                     
                     # ✅ Store daily breakdown
                     data['daily_nutrition'][date_str] = {
@@ -310,73 +489,51 @@ class WeeklyContextManager:
                         'protein': daily_protein,
                         'carbs': daily_carbs,
                         'fat': daily_fat,
-                        'meals_count': len(meals)
+                        'meals_count': meals_count
                     }
                     
-                    print(f"   ✅ Meals processed: {len(meals)} meals, {daily_cals} cals")
+                    logger.debug("Meals: %s meals, %s cals", meals_count, daily_cals)
                 else:
-                    print(f"   ℹ️ No meals found for {date_str}")
+                    logger.debug("No meals found for %s", date_str)
                     
             except Exception as e:
-                print(f"   ❌ Error fetching meals: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error fetching meals: %s", e)
             
-            # Fetch exercises
+            # Exercises - totals per day from get_daily_exercise_summary
             try:
-                exercises = await self.supabase_service.get_exercises_by_date(user_id, current_date)
-                print(f"   📊 Raw exercises returned: {len(exercises)}")
+                exercise = _result(day['exercise'])
                 
-                if exercises and len(exercises) > 0:
+                if exercise and exercise.get('workouts'):
                     day_has_data = True
                     data['workout_days'].append(date_str)
                     
-                    # ✅ CRITICAL: Process each exercise
-                    for ex in exercises:
-                        # Add to total workouts
-                        data['total_workouts'] += 1
-                        
-                        # ✅ CRITICAL: Use .get() with default 0 and handle None
-                        duration = int(ex.get('duration_minutes', 0) or 0)
-                        calories = float(ex.get('calories_burned', 0) or 0)
-                        
-                        data['total_exercise_minutes'] += duration
-                        data['total_calories_burned'] += calories
-                        
-                        # Track exercise types
-                        ex_type = ex.get('exercise_type', 'other') or 'other'
-                        data['workout_types'][ex_type] = data['workout_types'].get(ex_type, 0) + 1
-                        
-                        # Track muscle groups
-                        muscle_group = ex.get('muscle_group') or 'other'
-                        if muscle_group:
-                            data['muscle_groups'][muscle_group] = data['muscle_groups'].get(muscle_group, 0) + 1
-                        
-                        # Add to exercises list
-                        data['exercises_list'].append({
-                            'name': ex.get('exercise_name', 'Unknown'),
-                            'date': date_str,
-                            'type': ex_type,
-                            'duration': duration
-                        })
+                    data['total_workouts'] += int(exercise['workouts'])
+                    data['total_exercise_minutes'] += int(exercise.get('total_minutes') or 0)
+                    data['total_calories_burned'] += _num(exercise.get('calories_burned'))
+                    
+                    # Type and muscle group already default to 'other' in SQL
+                    exercises = exercise.get('exercises') or []
+                    data['workout_types'].update(ex['type'] for ex in exercises)
+                    data['muscle_groups'].update(ex['muscle_group'] for ex in exercises)
+                    data['exercises_list'].extend(
+                        {'name': ex['name'], 'date': date_str, 'type': ex['type'], 'duration': ex['duration']}
+                        for ex in exercises
+                    )
                     
-                    print(f"   ✅ Exercises processed: {len(exercises)} exercises, {data['total_exercise_minutes']} mins")
+                    logger.debug("Exercises: %s exercises, %s mins", exercise['workouts'], data['total_exercise_minutes'])
                 else:
-                    print(f"   ℹ️ No exercises found for {date_str}")
+                    logger.debug("No exercises found for %s", date_str)
                     
             except Exception as e:
-                print(f"   ❌ Error fetching exercises: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error fetching exercises: %s", e)
             
             # Fetch sleep
             try:
-                sleep = await self.supabase_service.get_sleep_by_date(user_id, current_date)
-                print(f"   📊 Sleep returned: {sleep is not None}")
+                sleep = _result(day['sleep'])
                 
                 if sleep and sleep.get('total_hours'):
                     day_has_data = True
-                    hours = float(sleep.get('total_hours', 0) or 0)
+                    hours = _num(sleep.get('total_hours'))
                     data['total_sleep'] += hours
                     
                     data['daily_sleep'][date_str] = {
@@ -384,68 +541,96 @@ class WeeklyContextManager:
                         'quality': sleep.get('quality', 'unknown')
                     }
                     
-                    # Track best/worst sleep
-                    if hours > max_sleep:
-                        max_sleep = hours
-                        data['best_sleep_day'] = {'date': date_str, 'hours': hours}
-                    if hours < min_sleep and hours > 0:
-                        min_sleep = hours
-                        data['worst_sleep_day'] = {'date': date_str, 'hours': hours}
-                    
-                    print(f"   ✅ Sleep processed: {hours}h")
+                    logger.debug("Sleep: %sh", hours)
                 else:
-                    print(f"   ℹ️ No sleep found for {date_str}")
+                    logger.debug("No sleep found for %s", date_str)
                     
             except Exception as e:
-                print(f"   ❌ Error fetching sleep: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error fetching sleep: %s", e)
             
             # Fetch water
             try:
-                water = await self.supabase_service.get_water_by_date(user_id, current_date)
+                water = _result(day['water'])
                 if water and water.get('glasses_consumed'):
                     day_has_data = True
                     glasses = int(water.get('glasses_consumed', 0) or 0)
                     data['total_water'] += glasses
                     data['daily_water'][date_str] = glasses
                     
-                    if glasses >= 8:
+                    if glasses >= WATER_GOAL_GLASSES:
                         data['days_water_goal_met'] += 1
                     
-                    print(f"   ✅ Water processed: {glasses} glasses")
+                    logger.debug("Water: %s glasses", glasses)
             except Exception as e:
-                print(f"   ❌ Error fetching water: {e}")
+                logger.exception("Error fetching water: %s", e)
             
             # Fetch steps
             try:
-                steps = await self.supabase_service.get_steps_by_date(user_id, current_date)
+                steps = _result(day['steps'])
                 if steps and steps.get('steps'):
                     day_has_data = True
                     step_count = int(steps.get('steps', 0) or 0)
                     data['total_steps'] += step_count
                     data['daily_steps'][date_str] = step_count
                     
-                    if step_count > max_steps:
-                        max_steps = step_count
-                        data['most_active_day'] = {'date': date_str, 'steps': step_count}
-                    if step_count < min_steps and step_count > 0:
-                        min_steps = step_count
-                        data['least_active_day'] = {'date': date_str, 'steps': step_count}
-                    
-                    if step_count >= 10000:
+                    if step_count >= STEP_GOAL:
                         data['days_step_goal_met'] += 1
                     
-                    print(f"   ✅ Steps processed: {step_count} steps")
+                    logger.debug("Steps: %s steps", step_count)
+            except Exception as e:
+                logger.exception("Error fetching steps: %s", e)
+            
+            # Weight - first entry of the day
+            try:
+                weight = _result(day['weight'])
+                if weight and weight.get('weight'):
+                    day_has_data = True
+                    data['weight_measurements'].append({'date': date_str, 'weight': _num(weight['weight'])})
+                    logger.debug("Weight: %skg", weight['weight'])
+            except Exception as e:
+                logger.exception("Error fetching weight: %s", e)
+            
+            # Supplements - how many were logged that day and which were taken
+            try:
+                supplements = _result(day['supplements'])
+                if supplements and supplements.get('logged'):
+                    day_has_data = True
+                    logged = int(supplements['logged'])
+                    taken = supplements.get('taken') or []
+                    data['supplements_list'].update(taken)
+                    data['supplements_logged'] += logged
+                    data['supplements_taken'] += len(taken)
+                    data['daily_supplements'][date_str] = {'logged': logged, 'taken': taken}
+                    logger.debug("Supplements: %s/%s taken", len(taken), logged)
             except Exception as e:
-                print(f"   ❌ Error fetching steps: {e}")
+                logger.exception("Error fetching supplements: %s", e)
             
             # Track days with data
             if day_has_data:
                 days_with_any_data.add(date_str)
-                print(f"   ✅ Day has data!")
+                logger.debug("%s has data", date_str)
             else:
-                print(f"   ⚠️ No data found for this day")
+                logger.debug("No data found for %s", date_str)
+        
+        # Best/worst days - one max/min over at most 7 entries, earliest day wins ties
+        slept = {day: night['hours'] for day, night in data['daily_sleep'].items() if night['hours'] > 0}
+        if slept:
+            best = max(slept, key=slept.get)
+            worst = min(slept, key=slept.get)
+            data['best_sleep_day'] = {'date': best, 'hours': slept[best]}
+            data['worst_sleep_day'] = {'date': worst, 'hours': slept[worst]}
+        walked = {day: count for day, count in data['daily_steps'].items() if count > 0}
+        if walked:
+            most = max(walked, key=walked.get)
+            least = min(walked, key=walked.get)
+            data['most_active_day'] = {'date': most, 'steps': walked[most]}
+            data['least_active_day'] = {'date': least, 'steps': walked[least]}
+        
+        measurements = data['weight_measurements']
+        if measurements:
+            data['week_start_weight'] = measurements[0]['weight']
+            data['week_end_weight'] = measurements[-1]['weight']
+            data['weight_change'] = round(data['week_end_weight'] - data['week_start_weight'], 1)
         
         # Calculate final averages
         data['days_with_data'] = len(days_with_any_data)
@@ -463,14 +648,20 @@ class WeeklyContextManager:
         data['hydration_consistency'] = round((len(data['daily_water']) / 7) * 100)
         data['sleep_consistency'] = round((len(data['daily_sleep']) / 7) * 100)
         
-        # Convert supplements set to list
-        data['supplements_list'] = list(data['supplements_list'])
+        # Supplements most-taken first; counters to plain dicts for storage
+        data['supplements_list'] = [name for name, _ in data['supplements_list'].most_common()]
+        data['workout_types'] = dict(data['workout_types'])
+        data['muscle_groups'] = dict(data['muscle_groups'])
         
         data['calorie_goal_achievement'] = 0
         data['water_goal_achievement'] = 0
         data['step_goal_achievement'] = 0
         data['workout_goal_achievement'] = 0
-        data['supplement_adherence'] = 0
+        # Share of logged doses actually taken
+        data['supplement_adherence'] = (
+            round(data['supplements_taken'] / data['supplements_logged'] * 100)
+            if data['supplements_logged'] else 0
+        )
         
         # If we have days with data, calculate achievements
         if data['days_with_data'] > 0:
@@ -483,20 +674,16 @@ class WeeklyContextManager:
             # Step goal achievement  
             data['step_goal_achievement'] = round((data['days_step_goal_met'] / 7) * 100)
             
-            # Workout goal achievement (3+ workouts = 100%)
-            workout_goal = 3
-            data['workout_goal_achievement'] = min(100, round((data['total_workouts'] / workout_goal) * 100))
+            # Workout goal achievement (WORKOUT_GOAL+ workouts = 100%)
+            data['workout_goal_achievement'] = min(100, round((data['total_workouts'] / WORKOUT_GOAL) * 100))
         
-        # Update the final print to show these new fields
-        print(f"\n📊 WEEKLY AGGREGATION COMPLETE:")
-        print(f"   Total Meals: {data['total_meals']}")
-        print(f"   Total Calories: {data['total_calories']}")
-        print(f"   Total Workouts: {data['total_workouts']}")
-        print(f"   Total Exercise Minutes: {data['total_exercise_minutes']}")
-        print(f"   Avg Sleep: {data['avg_sleep']}h")
-        print(f"   Days with data: {data['days_with_data']}/7")
-        print(f"   ✅ Calorie goal achievement: {data['calorie_goal_achievement']}%")
-        print(f"   ✅ Workout goal achievement: {data['workout_goal_achievement']}%")
+        logger.info(
+            "Weekly aggregation complete: %s meals, %s cals, %s workouts (%s mins), avg sleep %sh, "
+            "%s/7 days with data, calorie goal %s%%, workout goal %s%%",
+            data['total_meals'], data['total_calories'], data['total_workouts'],
+            data['total_exercise_minutes'], data['avg_sleep'], data['days_with_data'],
+            data['calorie_goal_achievement'], data['workout_goal_achievement']
+        )
         
         return data
     
@@ -513,81 +700,88 @@ class WeeklyContextManager:
             'recommendations': []
         }
         
-        # Check achievements
-        if weekly_data['calorie_goal_achievement'] >= 80:
-            insights['achievements'].append("Great calorie tracking consistency!")
-        
-        if weekly_data['total_workouts'] >= 3:
-            insights['achievements'].append(f"Completed {weekly_data['total_workouts']} workouts!")
-        
-        if weekly_data['hydration_consistency'] >= 85:
-            insights['achievements'].append("Excellent hydration habits!")
-        
-        if weekly_data['avg_sleep'] >= 7:
-            insights['achievements'].append("Good sleep average maintained!")
-        
-        if weekly_data['weight_change'] < 0 and user.get('weight_goal') == 'lose_weight':
-            insights['achievements'].append(f"Lost {abs(weekly_data['weight_change'])}kg this week!")
-        elif weekly_data['weight_change'] > 0 and user.get('weight_goal') == 'gain_weight':
-            insights['achievements'].append(f"Gained {weekly_data['weight_change']}kg this week!")
-        
-        # Check areas for improvement
-        if weekly_data['total_workouts'] < 2:
-            insights['improvements'].append("Try to add more workouts next week")
-        
-        if weekly_data['hydration_consistency'] < 60:
-            insights['improvements'].append("Focus on daily water intake")
-        
-        if weekly_data['avg_sleep'] < 6:
-            insights['improvements'].append("Prioritize getting more sleep")
-        
-        if weekly_data['days_with_data'] < 4:
-            insights['improvements'].append("Log your activities more consistently")
-        
-        # Identify trends
-        if weekly_data['avg_calories'] > 0:
-            tdee = user.get('tdee', 2000)
-            if weekly_data['avg_calories'] < tdee * 0.8:
-                insights['trends'].append("Calorie intake is below target")
-            elif weekly_data['avg_calories'] > tdee * 1.2:
-                insights['trends'].append("Calorie intake is above target")
-        
-        # Add personalized recommendations
-        weight_goal = user.get('weight_goal', '')
-        
-        if 'lose' in weight_goal.lower():
-            if weekly_data['avg_calories'] > user.get('tdee', 2000):
-                insights['recommendations'].append("Consider reducing portion sizes")
-            if weekly_data['total_workouts'] < 3:
-                insights['recommendations'].append("Add more cardio sessions")
-        elif 'gain' in weight_goal.lower():
-            if weekly_data['avg_protein'] < user.get('weight', 70) * 1.6:
-                insights['recommendations'].append("Increase protein intake")
-            if weekly_data['total_workouts'] < 3:
-                insights['recommendations'].append("Add strength training sessions")
+        # Shared inputs are computed once; each rule is then a single condition call
+        goals = _user_goals(user)
+        fields = {'d': weekly_data, 'weight_delta': abs(weekly_data['weight_change'])}
+        for bucket, condition, message in INSIGHT_RULES:
+            if condition(weekly_data, goals):
+                insights[bucket].append(message.format_map(fields))
         
         return insights
     
     async def get_recent_weeks_context(
         self, 
         user_id: str, 
-        weeks_count: int = 4
+        weeks_count: int = 4,
+        include_context: bool = True
     ) -> List[Dict[str, Any]]:
-        """Get context for recent weeks"""
+        """
+        Get context for recent weeks, newest first.
+        Finished weeks come from the in-process cache when present, the other stored weeks
+        from one query; missing weeks are built concurrently and saved
+        with one batch upsert. include_context=False returns only each week's summary and
+        skips reading the context_data blobs.
+        """
         try:
-            end_date = datetime.now().date()
-            contexts = []
-            
-            for week_offset in range(weeks_count):
-                target_date = end_date - timedelta(weeks=week_offset)
-                week_context = await self.get_or_create_weekly_context(user_id, target_date)
-                if week_context.get('success'):
-                    contexts.append(week_context)
-            
-            return contexts
+            today = datetime.now().date()
+            target_dates = [today - timedelta(weeks=week_offset) for week_offset in range(weeks_count)]
+            boundaries = [self.get_week_boundaries(target_date) for target_date in target_dates]
+            week_starts = [str(week_start) for week_start, _ in boundaries]
+            
+            # Finished weeks rarely change - serve them from the cache get_or_create_weekly_context fills
+            cached = {}
+            for week_start, week_end in boundaries:
+                if week_end < today:
+                    week_context = self._context_cache.get((user_id, str(week_start)))
+                    if week_context is not None:
+                        cached[str(week_start)] = week_context
+            
+            stored = {}
+            uncached = [week_start for week_start in week_starts if week_start not in cached]
+            if uncached:
+                columns = 'week_start_date, week_end_date, summary_data, version'
+                if include_context:
+                    columns += ', context_data'
+                response = await self.supabase_service.execute(self.supabase_service.client.table('weekly_contexts')\
+                    .select(columns)\
+                    .eq('user_id', user_id)\
+                    .in_('week_start_date', uncached))
+                stored = {row['week_start_date']: row for row in response.data or []}
+            
+            missing = [
+                (target_date, week_start, week_end)
+                for target_date, (week_start, week_end) in zip(target_dates, boundaries)
+                if str(week_start) not in cached and str(week_start) not in stored
+            ]
+            built = await asyncio.gather(*[
+                self.build_weekly_context(user_id, week_start, week_end, *self.get_week_number(target_date))
+                for target_date, week_start, week_end in missing
+            ], return_exceptions=True)
+            for row in built:
+                if isinstance(row, BaseException):
+                    logger.error("Error building weekly context: %s", row)
+            built = {row['week_start_date']: row for row in built if not isinstance(row, BaseException)}
+            versions = await self.persist_weekly_contexts(list(built.values()))
+            
+            weeks = []
+            for week_start, (_, week_end) in zip(week_starts, boundaries):
+                if week_start in cached:
+                    week_context = cached[week_start]
+                elif week_start in stored:
+                    week_context = self._context_result(stored[week_start], stored[week_start]['version'])
+                elif week_start in built:
+                    week_context = self._context_result(built[week_start], versions.get((user_id, week_start), 1))
+                else:
+                    continue
+                if not include_context:
+                    del week_context['weekly_context']
+                elif week_end < today:
+                    self._context_cache.put((user_id, week_start), week_context)
+                weeks.append(week_context)
+            return weeks
             
         except Exception as e:
-            print(f"Error getting recent weeks: {e}")
+            logger.exception("Error getting recent weeks: %s", e)
             return []
     
     async def update_weekly_context(
@@ -600,23 +794,17 @@ class WeeklyContextManager:
             date = datetime.now().date()
         
         week_start, week_end = self.get_week_boundaries(date)
+        self.invalidate(user_id, week_start)
         
         try:
-            # Delete existing context
-            self.supabase_service.client.table('weekly_contexts')\
-                .delete()\
-                .eq('user_id', user_id)\
-                .eq('week_start_date', str(week_start))\
-                .execute()
-            
-            # Recreate with fresh data
+            # Rebuild from fresh data - the upsert replaces the stored row in place (no-op if unchanged)
             week_number, year = self.get_week_number(date)
             return await self.create_weekly_context(
                 user_id, week_start, week_end, week_number, year
             )
             
         except Exception as e:
-            print(f"Error updating weekly context: {e}")
+            logger.exception("Error updating weekly context: %s", e)
             return {'success': False, 'error': str(e)}
 
 # Singleton instance
@@ -0,0 +1,12 @@
+-- Atomically bump a meal preset's usage counter in a single round trip.
+-- Replaces the SELECT usage_count + UPDATE pair in SupabaseService.update_preset_usage.
+create or replace function increment_preset_usage(p_id uuid)
+returns integer
+language sql
+as $$
+    update meal_presets
+       set usage_count = coalesce(usage_count, 0) + 1,
+           last_used_at = now()
+     where id = p_id
+    returning usage_count;
+$$;
@@ -0,0 +1,34 @@
+-- Most recent meal per distinct food item, deduplicated in Postgres so only
+-- p_limit rows cross the wire. Used by SupabaseService.get_recent_unique_meals.
+create or replace function get_recent_unique_meals(p_user_id uuid, p_limit integer default 15)
+returns setof jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'food_item', food_item,
+        'quantity', quantity,
+        'calories', calories,
+        'protein_g', protein_g,
+        'carbs_g', carbs_g,
+        'fat_g', fat_g,
+        'fiber_g', fiber_g,
+        'sugar_g', sugar_g,
+        'sodium_mg', sodium_mg,
+        'meal_type', meal_type,
+        'logged_at', logged_at,
+        'nutrition_data', nutrition_data
+    )
+    from (
+        select distinct on (lower(trim(food_item))) *
+          from meal_entries
+         where user_id = p_user_id
+         order by lower(trim(food_item)), logged_at desc
+    ) latest
+    order by logged_at desc
+    limit p_limit;
+$$;
+
+-- Lets the DISTINCT ON walk the index instead of sorting every meal of the user
+create index if not exists meal_entries_user_food_logged_idx
+    on meal_entries (user_id, lower(trim(food_item)), logged_at desc);
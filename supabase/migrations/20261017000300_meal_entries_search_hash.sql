@@ -0,0 +1,18 @@
+-- Compute meal_entries.search_hash in Postgres instead of in every client.
+-- Must stay in sync with meal_search_hash() in services/supabase_service.py
+-- (btrim() trims only spaces, so the Python side strips only ' ').
+--
+-- Dropping and re-adding a stored generated column rewrites all of
+-- meal_entries under an ACCESS EXCLUSIVE lock - meal reads and writes block
+-- until it finishes. On a large production table run this in a quiet window.
+alter table meal_entries drop column if exists search_hash;
+
+alter table meal_entries
+    add column search_hash text
+    generated always as (
+        md5(lower(btrim(food_item)) || '::' || lower(btrim(coalesce(quantity, ''))))
+    ) stored;
+
+-- Cached-meal lookup: user + hash, newest first
+create index if not exists meal_entries_user_search_hash_idx
+    on meal_entries (user_id, search_hash, logged_at desc);
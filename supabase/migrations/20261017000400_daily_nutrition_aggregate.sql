@@ -0,0 +1,41 @@
+-- Daily nutrition totals computed from meal_entries on read, replacing the
+-- daily_nutrition summary table that every meal log had to read-modify-write.
+-- Used by SupabaseService.get_daily_nutrition / get_daily_nutrition_range.
+create or replace function get_daily_nutrition_range(p_user_id uuid, p_start_date date, p_end_date date)
+returns table (
+    user_id uuid,
+    date date,
+    calories_consumed integer,
+    protein_g numeric,
+    carbs_g numeric,
+    fat_g numeric,
+    fiber_g numeric,
+    sugar_g numeric,
+    sodium_mg integer,
+    meals_logged integer
+)
+language sql
+stable
+as $$
+    select p_user_id,
+           meal_date::date,
+           coalesce(sum(calories), 0)::integer,
+           round(coalesce(sum(protein_g), 0)::numeric, 1),
+           round(coalesce(sum(carbs_g), 0)::numeric, 1),
+           round(coalesce(sum(fat_g), 0)::numeric, 1),
+           round(coalesce(sum(fiber_g), 0)::numeric, 1),
+           round(coalesce(sum(sugar_g), 0)::numeric, 1),
+           coalesce(sum(sodium_mg), 0)::integer,
+           count(*)::integer
+      from meal_entries
+     where meal_entries.user_id = p_user_id
+       and meal_date >= p_start_date
+       and meal_date < p_end_date + 1
+     group by meal_date::date
+     order by meal_date::date desc;
+$$;
+
+-- Covering index so the aggregate is an index-only scan over one user's days
+create index if not exists meals_user_date_idx
+    on meal_entries (user_id, meal_date)
+    include (calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg);
@@ -0,0 +1,21 @@
+-- Profile list columns are never NULL: an explicit null from the client is
+-- stored as an empty array. Replaces the per-update loop in
+-- SupabaseService.update_user.
+create or replace function normalize_user_arrays()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.sleep_issues := coalesce(new.sleep_issues, array[]::text[]);
+    new.dietary_preferences := coalesce(new.dietary_preferences, array[]::text[]);
+    new.preferred_workouts := coalesce(new.preferred_workouts, array[]::text[]);
+    new.medical_conditions := coalesce(new.medical_conditions, array[]::text[]);
+    new.available_equipment := coalesce(new.available_equipment, array[]::text[]);
+    return new;
+end;
+$$;
+
+drop trigger if exists users_normalize_arrays on users;
+create trigger users_normalize_arrays
+    before insert or update on users
+    for each row execute function normalize_user_arrays();
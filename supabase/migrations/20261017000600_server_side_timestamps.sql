@@ -0,0 +1,25 @@
+-- Server-authoritative timestamps: created_at/updated_at default to now()
+-- and updated_at is bumped by moddatetime on every UPDATE, so the API no
+-- longer formats and ships its own clock readings.
+create extension if not exists moddatetime schema extensions;
+
+alter table users alter column created_at set default now();
+alter table users alter column updated_at set default now();
+drop trigger if exists set_updated_at on users;
+create trigger set_updated_at
+    before update on users
+    for each row execute function extensions.moddatetime(updated_at);
+
+alter table supplement_preferences alter column created_at set default now();
+alter table supplement_preferences alter column updated_at set default now();
+drop trigger if exists set_updated_at on supplement_preferences;
+create trigger set_updated_at
+    before update on supplement_preferences
+    for each row execute function extensions.moddatetime(updated_at);
+
+alter table chat_sessions alter column created_at set default now();
+alter table chat_sessions alter column updated_at set default now();
+drop trigger if exists set_updated_at on chat_sessions;
+create trigger set_updated_at
+    before update on chat_sessions
+    for each row execute function extensions.moddatetime(updated_at);
@@ -0,0 +1,22 @@
+-- Composite (user_id, date) indexes for the per-user date range reads:
+-- get_meals_by_date, get_user_meals, get_user_meals_by_date,
+-- get_daily_nutrition_range, get_water_entries_in_range and
+-- get_step_entries_in_range.
+--
+-- Plain CREATE INDEX because migrations run inside a transaction; on a large
+-- production table create these by hand with CONCURRENTLY first - the
+-- IF NOT EXISTS makes this file a no-op afterwards.
+
+-- Covers the meal list columns so date reads are index-only scans. Supersedes
+-- the narrower meals_user_date_idx from the daily nutrition aggregate.
+create index if not exists meal_entries_user_date_idx
+    on meal_entries (user_id, meal_date desc)
+    include (food_item, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g,
+             sodium_mg, meal_type, logged_at, nutrition_data, preparation);
+drop index if exists meals_user_date_idx;
+
+create index if not exists daily_water_user_date_idx
+    on daily_water (user_id, date desc);
+
+create index if not exists daily_steps_user_date_idx
+    on daily_steps (user_id, date desc);
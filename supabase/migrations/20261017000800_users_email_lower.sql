@@ -0,0 +1,13 @@
+-- Case-insensitive, unique email lookups. The index fails to build if two
+-- accounts differ only by email case - merge those before applying.
+create unique index if not exists users_email_lower_idx on users (lower(email));
+
+-- PostgREST filters can't target lower(email), so the lookup goes through an
+-- RPC that the expression index can serve. Used by SupabaseService.get_user_by_email.
+create or replace function get_user_by_email(p_email text)
+returns setof users
+language sql
+stable
+as $$
+    select * from users where lower(email) = lower(btrim(p_email)) limit 1;
+$$;
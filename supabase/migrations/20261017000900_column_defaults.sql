@@ -0,0 +1,24 @@
+-- Defaults the API used to fill in Python before every insert.
+
+-- water_intake_glasses stays a plain column because clients may set it
+-- explicitly; when they don't, derive it from water_intake (litres, 4 glasses each).
+create or replace function default_water_intake_glasses()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.water_intake_glasses is null then
+        new.water_intake_glasses := round(coalesce(new.water_intake, 2.0) * 4)::integer;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists users_default_water_intake_glasses on users;
+create trigger users_default_water_intake_glasses
+    before insert on users
+    for each row execute function default_water_intake_glasses();
+
+alter table meal_entries alter column fiber_g set default 0;
+alter table meal_entries alter column sugar_g set default 0;
+alter table meal_entries alter column sodium_mg set default 0;
@@ -0,0 +1,34 @@
+-- One day's nutrition totals for many users in a single call (dashboards).
+-- Same aggregate as get_daily_nutrition_range; served by meal_entries_user_date_idx.
+create or replace function get_daily_nutrition_for_users(p_user_ids uuid[], p_date date)
+returns table (
+    user_id uuid,
+    date date,
+    calories_consumed integer,
+    protein_g numeric,
+    carbs_g numeric,
+    fat_g numeric,
+    fiber_g numeric,
+    sugar_g numeric,
+    sodium_mg integer,
+    meals_logged integer
+)
+language sql
+stable
+as $$
+    select meal_entries.user_id,
+           p_date,
+           coalesce(sum(calories), 0)::integer,
+           round(coalesce(sum(protein_g), 0)::numeric, 1),
+           round(coalesce(sum(carbs_g), 0)::numeric, 1),
+           round(coalesce(sum(fat_g), 0)::numeric, 1),
+           round(coalesce(sum(fiber_g), 0)::numeric, 1),
+           round(coalesce(sum(sugar_g), 0)::numeric, 1),
+           coalesce(sum(sodium_mg), 0)::integer,
+           count(*)::integer
+      from meal_entries
+     where meal_entries.user_id = any(p_user_ids)
+       and meal_date >= p_date
+       and meal_date < p_date + 1
+     group by meal_entries.user_id;
+$$;
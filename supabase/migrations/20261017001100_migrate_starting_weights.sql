@@ -0,0 +1,35 @@
+-- Backfill starting_weight for every user missing it in one statement: the
+-- oldest weight entry when there is one, else the profile weight. Used by
+-- SupabaseService.migrate_all_users_starting_weights.
+create or replace function migrate_starting_weights()
+returns table (total integer, migrated integer)
+language sql
+as $$
+    with pending as (
+        select id, weight, created_at
+          from users
+         where starting_weight is null
+    ),
+    oldest as (
+        select distinct on (w.user_id) w.user_id, w.weight, w.date
+          from weight_entries w
+          join pending p on p.id = w.user_id
+         order by w.user_id, w.date asc
+    ),
+    updated as (
+        update users u
+           set starting_weight = coalesce(o.weight, p.weight),
+               starting_weight_date = coalesce(o.date::timestamptz, p.created_at)
+          from pending p
+          left join oldest o on o.user_id = p.id
+         where u.id = p.id
+           and coalesce(o.weight, p.weight) is not null
+        returning u.id
+    )
+    select (select count(*) from pending)::integer,
+           (select count(*) from updated)::integer;
+$$;
+
+-- DISTINCT ON (user_id) ... ORDER BY user_id, date walks this index
+create index if not exists weight_entries_user_date_idx
+    on weight_entries (user_id, date);
@@ -0,0 +1,18 @@
+-- Active supplement preferences joined with whether each was taken on p_date,
+-- so the checklist needs one round trip instead of preferences + logs.
+-- Used by SupabaseService.get_supplements_with_status.
+create or replace function get_supplements_with_status(p_user_id uuid, p_date date)
+returns setof jsonb
+language sql
+stable
+as $$
+    select to_jsonb(p) || jsonb_build_object('taken', coalesce(l.taken, false))
+      from supplement_preferences p
+      left join supplement_logs l
+        on l.user_id = p.user_id
+       and l.supplement_name = p.supplement_name
+       and l.date = p_date
+     where p.user_id = p_user_id
+       and p.is_active = true
+     order by p.created_at;
+$$;
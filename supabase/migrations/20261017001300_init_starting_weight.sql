@@ -0,0 +1,27 @@
+-- Set one user's starting_weight if it is missing: the oldest weight entry
+-- when there is one, else the profile weight. Single atomic UPDATE, so two
+-- concurrent callers cannot both read "unset" and race on the write.
+-- Returns true when a row was updated. Used by
+-- SupabaseService.initialize_starting_weight_for_user.
+create or replace function init_starting_weight(p_user_id uuid)
+returns boolean
+language sql
+as $$
+    with oldest as (
+        select weight, date
+          from weight_entries
+         where user_id = p_user_id
+         order by date asc
+         limit 1
+    ),
+    updated as (
+        update users u
+           set starting_weight = coalesce((select weight from oldest), u.weight),
+               starting_weight_date = coalesce((select date::timestamptz from oldest), u.created_at)
+         where u.id = p_user_id
+           and u.starting_weight is null
+           and coalesce((select weight from oldest), u.weight) is not null
+        returning u.id
+    )
+    select exists (select 1 from updated);
+$$;
@@ -0,0 +1,21 @@
+-- Last p_limit chat messages for a user, oldest first, ready to hand to the
+-- model. Used by SupabaseService.get_recent_chat_context.
+create or replace function recent_chat_context(p_user_id uuid, p_limit integer)
+returns table (message text, is_user boolean, created_at timestamptz)
+language sql
+stable
+as $$
+    select t.message, t.is_user, t.created_at
+      from (
+        select m.message, m.is_user, m.created_at
+          from chat_messages m
+         where m.user_id = p_user_id
+         order by m.created_at desc
+         limit p_limit
+      ) t
+     order by t.created_at asc;
+$$;
+
+-- The inner ORDER BY ... LIMIT becomes a short backward index scan
+create index if not exists chat_messages_user_created_idx
+    on chat_messages (user_id, created_at desc);
@@ -0,0 +1,25 @@
+-- Insert a weight entry and, for a user's first entry, set starting_weight
+-- in the same transaction. Returns the inserted row. Used by
+-- SupabaseService.create_weight_entry.
+create or replace function log_weight(p_entry jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_entry weight_entries;
+begin
+    insert into weight_entries (
+        id, user_id, date, weight, notes,
+        body_fat_percentage, muscle_mass_kg, created_at, updated_at
+    )
+    select coalesce(e.id, gen_random_uuid()), e.user_id, e.date, e.weight, e.notes,
+           e.body_fat_percentage, e.muscle_mass_kg,
+           coalesce(e.created_at, now()), coalesce(e.updated_at, now())
+      from jsonb_populate_record(null::weight_entries, p_entry) e
+    returning * into v_entry;
+
+    perform init_starting_weight(v_entry.user_id);
+
+    return to_jsonb(v_entry);
+end;
+$$;
@@ -0,0 +1,28 @@
+-- Calendar day (UTC) of each exercise as a stored column, so day and
+-- day-range filters in SupabaseService.get_exercise_logs compare dates on
+-- an index instead of timestamp string bounds.
+do $$
+begin
+    if not exists (
+        select 1 from information_schema.columns
+         where table_name = 'exercise_logs' and column_name = 'exercise_day'
+    ) then
+        -- The cast must be immutable to be a generated column: timestamptz needs
+        -- an explicit zone, a plain timestamp casts directly
+        if (select data_type from information_schema.columns
+             where table_name = 'exercise_logs' and column_name = 'exercise_date')
+           = 'timestamp with time zone' then
+            alter table exercise_logs
+                add column exercise_day date
+                generated always as ((exercise_date at time zone 'UTC')::date) stored;
+        else
+            alter table exercise_logs
+                add column exercise_day date
+                generated always as (exercise_date::date) stored;
+        end if;
+    end if;
+end;
+$$;
+
+create index if not exists exercise_logs_user_day_idx
+    on exercise_logs (user_id, exercise_day desc);
@@ -0,0 +1,36 @@
+-- One chat session per user per UTC day, found or created in a single call.
+-- Used by SupabaseService.get_or_create_daily_session.
+alter table chat_sessions
+    add column if not exists session_date date
+    generated always as ((created_at at time zone 'UTC')::date) stored;
+
+-- Not unique: days from before this migration can already hold several sessions
+create index if not exists chat_sessions_user_session_date_idx
+    on chat_sessions (user_id, session_date, created_at desc);
+
+create or replace function get_or_create_daily_session(p_user_id uuid, p_today date)
+returns uuid
+language plpgsql
+as $$
+declare
+    v_id uuid;
+begin
+    -- Serialize concurrent first messages of the day for this user so only one creates the session
+    perform pg_advisory_xact_lock(hashtext(p_user_id::text || p_today::text));
+
+    select id into v_id
+      from chat_sessions
+     where user_id = p_user_id
+       and session_date = p_today
+     order by created_at desc
+     limit 1;
+
+    if v_id is null then
+        insert into chat_sessions (user_id, title)
+        values (p_user_id, 'Health Chat - ' || p_today)
+        returning id into v_id;
+    end if;
+
+    return v_id;
+end;
+$$;
@@ -0,0 +1,16 @@
+-- Everything a chat turn reads before calling the model, in one round trip:
+-- today's session id (created if needed) and the last p_limit messages,
+-- oldest first. Used by SupabaseService.get_chat_bootstrap.
+create or replace function chat_bootstrap(p_user_id uuid, p_today date, p_limit integer)
+returns json
+language sql
+as $$
+    select json_build_object(
+        'session_id', get_or_create_daily_session(p_user_id, p_today),
+        'messages', coalesce(
+            (select json_agg(r order by r.created_at)
+               from recent_chat_context(p_user_id, p_limit) r),
+            '[]'::json
+        )
+    );
+$$;
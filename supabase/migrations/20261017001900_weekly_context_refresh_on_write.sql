@@ -0,0 +1,54 @@
+-- weekly_contexts is the stored weekly rollup: WeeklyContextManager reads it
+-- and only re-aggregates the raw tables when the row is missing. Keep it
+-- current by dropping the affected week's row whenever a day in it changes,
+-- so the next read rebuilds just that week (including backfilled past weeks,
+-- which were never refreshed before). TG_ARGV[0] names the row's date column.
+create or replace function invalidate_weekly_context()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_row jsonb;
+begin
+    foreach v_row in array array[
+        case when tg_op <> 'INSERT' then to_jsonb(old) end,
+        case when tg_op <> 'DELETE' then to_jsonb(new) end
+    ] loop
+        if v_row is not null and v_row ->> tg_argv[0] is not null then
+            -- Weeks start on Monday, as in WeeklyContextManager.get_week_boundaries
+            delete from weekly_contexts
+             where user_id = (v_row ->> 'user_id')::uuid
+               and week_start_date = date_trunc('week', left(v_row ->> tg_argv[0], 10)::date)::date;
+        end if;
+    end loop;
+    return null;
+end;
+$$;
+
+create index if not exists weekly_contexts_user_week_idx
+    on weekly_contexts (user_id, week_start_date);
+
+drop trigger if exists meal_entries_weekly_context on meal_entries;
+create trigger meal_entries_weekly_context
+    after insert or update or delete on meal_entries
+    for each row execute function invalidate_weekly_context('meal_date');
+
+drop trigger if exists exercise_logs_weekly_context on exercise_logs;
+create trigger exercise_logs_weekly_context
+    after insert or update or delete on exercise_logs
+    for each row execute function invalidate_weekly_context('exercise_day');
+
+drop trigger if exists sleep_entries_weekly_context on sleep_entries;
+create trigger sleep_entries_weekly_context
+    after insert or update or delete on sleep_entries
+    for each row execute function invalidate_weekly_context('date');
+
+drop trigger if exists daily_water_weekly_context on daily_water;
+create trigger daily_water_weekly_context
+    after insert or update or delete on daily_water
+    for each row execute function invalidate_weekly_context('date');
+
+drop trigger if exists daily_steps_weekly_context on daily_steps;
+create trigger daily_steps_weekly_context
+    after insert or update or delete on daily_steps
+    for each row execute function invalidate_weekly_context('date');
@@ -0,0 +1,33 @@
+-- Per-day exercise totals for a date range, with each day's exercises
+-- trimmed to the fields the weekly rollup reports. Pairs with
+-- get_daily_nutrition_range; used by SupabaseService.get_daily_exercise_summary.
+create or replace function get_daily_exercise_summary(p_user_id uuid, p_start_date date, p_end_date date)
+returns table (
+    date date,
+    workouts integer,
+    total_minutes integer,
+    calories_burned numeric,
+    exercises jsonb
+)
+language sql
+stable
+as $$
+    select exercise_day,
+           count(*)::integer,
+           coalesce(sum(duration_minutes), 0)::integer,
+           coalesce(sum(calories_burned), 0)::numeric,
+           jsonb_agg(
+               jsonb_build_object(
+                   'name', coalesce(exercise_name, 'Unknown'),
+                   'type', coalesce(nullif(exercise_type, ''), 'other'),
+                   'muscle_group', coalesce(nullif(muscle_group, ''), 'other'),
+                   'duration', coalesce(duration_minutes, 0)::integer
+               )
+               order by exercise_date
+           )
+      from exercise_logs
+     where exercise_logs.user_id = p_user_id
+       and exercise_day between p_start_date and p_end_date
+     group by exercise_day
+     order by exercise_day;
+$$;
@@ -0,0 +1,38 @@
+-- Store a rebuilt weekly context in one statement: insert, or replace the
+-- week's existing row and bump its version. Returns the stored version.
+-- Used by WeeklyContextManager.create_weekly_context.
+
+-- (user_id, week_start_date) becomes the conflict target, so drop any
+-- duplicate weeks first, keeping the most recently updated row
+delete from weekly_contexts a
+ using weekly_contexts b
+ where a.user_id = b.user_id
+   and a.week_start_date = b.week_start_date
+   and (coalesce(a.updated_at, '-infinity'), a.ctid) < (coalesce(b.updated_at, '-infinity'), b.ctid);
+
+create unique index if not exists weekly_contexts_user_week_key
+    on weekly_contexts (user_id, week_start_date);
+-- Superseded by the unique index above
+drop index if exists weekly_contexts_user_week_idx;
+
+create or replace function upsert_weekly_context(p_context jsonb)
+returns integer
+language sql
+as $$
+    insert into weekly_contexts (
+        user_id, week_start_date, week_end_date, week_number, year,
+        context_data, summary_data, version, created_at, updated_at
+    )
+    select c.user_id, c.week_start_date, c.week_end_date, c.week_number, c.year,
+           c.context_data, c.summary_data, 1, now(), now()
+      from jsonb_populate_record(null::weekly_contexts, p_context) c
+    on conflict (user_id, week_start_date) do update
+       set week_end_date = excluded.week_end_date,
+           week_number = excluded.week_number,
+           year = excluded.year,
+           context_data = excluded.context_data,
+           summary_data = excluded.summary_data,
+           version = weekly_contexts.version + 1,
+           updated_at = now()
+    returning version;
+$$;
@@ -0,0 +1,44 @@
+-- Everything the weekly rollup reads, in one round trip: per-day nutrition
+-- and exercise totals plus the week's sleep, water and step rows, keyed the
+-- way WeeklyContextManager._fetch_week buckets them. Used by
+-- SupabaseService.get_week_raw.
+create or replace function get_week_raw(p_user_id uuid, p_start_date date, p_end_date date)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'nutrition', coalesce(
+            (select jsonb_agg(n order by n.date)
+               from get_daily_nutrition_range(p_user_id, p_start_date, p_end_date) n),
+            '[]'::jsonb
+        ),
+        'exercise', coalesce(
+            (select jsonb_agg(e order by e.date)
+               from get_daily_exercise_summary(p_user_id, p_start_date, p_end_date) e),
+            '[]'::jsonb
+        ),
+        'sleep', coalesce(
+            (select jsonb_agg(s order by s.date)
+               from sleep_entries s
+              where s.user_id = p_user_id
+                and s.date >= p_start_date
+                and s.date < p_end_date + 1),
+            '[]'::jsonb
+        ),
+        'water', coalesce(
+            (select jsonb_agg(w order by w.date)
+               from daily_water w
+              where w.user_id = p_user_id
+                and w.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        ),
+        'steps', coalesce(
+            (select jsonb_agg(st order by st.date)
+               from daily_steps st
+              where st.user_id = p_user_id
+                and st.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        )
+    );
+$$;
@@ -0,0 +1,16 @@
+-- The weekly summary's headline numbers as real columns, so listings and
+-- trend queries can read them without pulling the context_data blob.
+-- Generated from summary_data, so upsert_weekly_context keeps them current.
+alter table weekly_contexts
+    add column if not exists avg_calories numeric
+        generated always as ((summary_data->>'avg_calories')::numeric) stored,
+    add column if not exists total_workouts integer
+        generated always as ((summary_data->>'total_workouts')::integer) stored,
+    add column if not exists avg_sleep numeric
+        generated always as ((summary_data->>'avg_sleep')::numeric) stored,
+    add column if not exists weight_change numeric
+        generated always as ((summary_data->>'weight_change')::numeric) stored;
+
+-- (user_id, week_start_date) is already covered by weekly_contexts_user_week_key
+create index if not exists weekly_contexts_user_year_week_idx
+    on weekly_contexts (user_id, year, week_number);
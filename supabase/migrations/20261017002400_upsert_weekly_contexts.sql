@@ -0,0 +1,32 @@
+-- Batch form of upsert_weekly_context: store several rebuilt weekly
+-- contexts (any users, any weeks) in one statement and return each row's
+-- stored version. Used by WeeklyContextManager.persist_weekly_contexts.
+create or replace function upsert_weekly_contexts(p_contexts jsonb)
+returns table (user_id uuid, week_start_date date, version integer)
+language sql
+as $$
+    insert into weekly_contexts as w (
+        user_id, week_start_date, week_end_date, week_number, year,
+        context_data, summary_data, version, created_at, updated_at
+    )
+    select c.user_id, c.week_start_date, c.week_end_date, c.week_number, c.year,
+           c.context_data, c.summary_data, 1, now(), now()
+      from jsonb_populate_recordset(null::weekly_contexts, p_contexts) c
+    on conflict (user_id, week_start_date) do update
+       set week_end_date = excluded.week_end_date,
+           week_number = excluded.week_number,
+           year = excluded.year,
+           context_data = excluded.context_data,
+           summary_data = excluded.summary_data,
+           version = w.version + 1,
+           updated_at = now()
+    returning w.user_id, w.week_start_date, w.version;
+$$;
+
+-- Keep the single-row function as a thin wrapper over the batch one
+create or replace function upsert_weekly_context(p_context jsonb)
+returns integer
+language sql
+as $$
+    select version from upsert_weekly_contexts(jsonb_build_array(p_context));
+$$;
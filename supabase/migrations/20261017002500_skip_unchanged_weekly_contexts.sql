@@ -0,0 +1,43 @@
+-- Rebuilding a week whose data hasn't changed no longer rewrites its row:
+-- the upsert only updates (and bumps version) when context_data or
+-- summary_data differ. jsonb equality ignores key order, so no separate
+-- content hash is needed. Unchanged weeks still report their stored version.
+create or replace function upsert_weekly_contexts(p_contexts jsonb)
+returns table (user_id uuid, week_start_date date, version integer)
+language sql
+as $$
+    with incoming as (
+        select c.user_id, c.week_start_date, c.week_end_date, c.week_number, c.year,
+               c.context_data, c.summary_data
+          from jsonb_populate_recordset(null::weekly_contexts, p_contexts) c
+    ),
+    written as (
+        insert into weekly_contexts as w (
+            user_id, week_start_date, week_end_date, week_number, year,
+            context_data, summary_data, version, created_at, updated_at
+        )
+        select i.user_id, i.week_start_date, i.week_end_date, i.week_number, i.year,
+               i.context_data, i.summary_data, 1, now(), now()
+          from incoming i
+        on conflict (user_id, week_start_date) do update
+           set week_end_date = excluded.week_end_date,
+               week_number = excluded.week_number,
+               year = excluded.year,
+               context_data = excluded.context_data,
+               summary_data = excluded.summary_data,
+               version = w.version + 1,
+               updated_at = now()
+         where (w.context_data, w.summary_data) is distinct from (excluded.context_data, excluded.summary_data)
+        returning w.user_id, w.week_start_date, w.version
+    )
+    select x.user_id, x.week_start_date, x.version from written x
+    union all
+    -- Skipped (unchanged) rows: the statement snapshot still shows their stored version
+    select w.user_id, w.week_start_date, w.version
+      from weekly_contexts w
+      join incoming i on i.user_id = w.user_id and i.week_start_date = w.week_start_date
+     where not exists (
+         select 1 from written x
+          where x.user_id = w.user_id and x.week_start_date = w.week_start_date
+     );
+$$;
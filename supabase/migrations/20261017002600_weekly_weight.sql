@@ -0,0 +1,56 @@
+-- The weekly rollup never read weight_entries, so week_start_weight,
+-- week_end_weight and weight_change were always empty. Add the week's weight
+-- entries to get_week_raw, and drop the stored week when a weight is logged
+-- like the other tracked tables do.
+create or replace function get_week_raw(p_user_id uuid, p_start_date date, p_end_date date)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'nutrition', coalesce(
+            (select jsonb_agg(n order by n.date)
+               from get_daily_nutrition_range(p_user_id, p_start_date, p_end_date) n),
+            '[]'::jsonb
+        ),
+        'exercise', coalesce(
+            (select jsonb_agg(e order by e.date)
+               from get_daily_exercise_summary(p_user_id, p_start_date, p_end_date) e),
+            '[]'::jsonb
+        ),
+        'sleep', coalesce(
+            (select jsonb_agg(s order by s.date)
+               from sleep_entries s
+              where s.user_id = p_user_id
+                and s.date >= p_start_date
+                and s.date < p_end_date + 1),
+            '[]'::jsonb
+        ),
+        'water', coalesce(
+            (select jsonb_agg(w order by w.date)
+               from daily_water w
+              where w.user_id = p_user_id
+                and w.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        ),
+        'steps', coalesce(
+            (select jsonb_agg(st order by st.date)
+               from daily_steps st
+              where st.user_id = p_user_id
+                and st.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        ),
+        'weight', coalesce(
+            (select jsonb_agg(wt order by wt.date, wt.created_at)
+               from weight_entries wt
+              where wt.user_id = p_user_id
+                and wt.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        )
+    );
+$$;
+
+drop trigger if exists weight_entries_weekly_context on weight_entries;
+create trigger weight_entries_weekly_context
+    after insert or update or delete on weight_entries
+    for each row execute function invalidate_weekly_context('date');
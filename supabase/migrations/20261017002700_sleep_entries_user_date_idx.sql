@@ -0,0 +1,6 @@
+-- sleep_entries was the one table get_week_raw reads without a (user_id, date)
+-- index; with it every source of the weekly rollup is an index range scan
+-- over at most a week of one user's rows. See user_date_covering_indexes for
+-- creating this CONCURRENTLY on a large table.
+create index if not exists sleep_entries_user_date_idx
+    on sleep_entries (user_id, date desc);
@@ -0,0 +1,58 @@
+-- Nutrition and exercise already come back from get_week_raw summed per day;
+-- sleep, water, steps and weight were still whole rows (notes, ids,
+-- timestamps...). Return only the fields the weekly rollup reads.
+create or replace function get_week_raw(p_user_id uuid, p_start_date date, p_end_date date)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'nutrition', coalesce(
+            (select jsonb_agg(n order by n.date)
+               from get_daily_nutrition_range(p_user_id, p_start_date, p_end_date) n),
+            '[]'::jsonb
+        ),
+        'exercise', coalesce(
+            (select jsonb_agg(e order by e.date)
+               from get_daily_exercise_summary(p_user_id, p_start_date, p_end_date) e),
+            '[]'::jsonb
+        ),
+        'sleep', coalesce(
+            (select jsonb_agg(
+                        jsonb_build_object('date', s.date, 'total_hours', s.total_hours, 'quality', s.quality)
+                        order by s.date)
+               from sleep_entries s
+              where s.user_id = p_user_id
+                and s.date >= p_start_date
+                and s.date < p_end_date + 1),
+            '[]'::jsonb
+        ),
+        'water', coalesce(
+            (select jsonb_agg(
+                        jsonb_build_object('date', w.date, 'glasses_consumed', w.glasses_consumed)
+                        order by w.date)
+               from daily_water w
+              where w.user_id = p_user_id
+                and w.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        ),
+        'steps', coalesce(
+            (select jsonb_agg(
+                        jsonb_build_object('date', st.date, 'steps', st.steps)
+                        order by st.date)
+               from daily_steps st
+              where st.user_id = p_user_id
+                and st.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        ),
+        'weight', coalesce(
+            (select jsonb_agg(
+                        jsonb_build_object('date', wt.date, 'weight', wt.weight)
+                        order by wt.date, wt.created_at)
+               from weight_entries wt
+              where wt.user_id = p_user_id
+                and wt.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        )
+    );
+$$;
@@ -0,0 +1,76 @@
+-- The weekly rollup never read supplement_logs, so supplement_adherence was
+-- always empty. Add one row per day to get_week_raw (how many supplements
+-- were logged and which were taken), and drop the stored week when a
+-- supplement log changes, as the other tracked tables do.
+create or replace function get_week_raw(p_user_id uuid, p_start_date date, p_end_date date)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'nutrition', coalesce(
+            (select jsonb_agg(n order by n.date)
+               from get_daily_nutrition_range(p_user_id, p_start_date, p_end_date) n),
+            '[]'::jsonb
+        ),
+        'exercise', coalesce(
+            (select jsonb_agg(e order by e.date)
+               from get_daily_exercise_summary(p_user_id, p_start_date, p_end_date) e),
+            '[]'::jsonb
+        ),
+        'sleep', coalesce(
+            (select jsonb_agg(
+                        jsonb_build_object('date', s.date, 'total_hours', s.total_hours, 'quality', s.quality)
+                        order by s.date)
+               from sleep_entries s
+              where s.user_id = p_user_id
+                and s.date >= p_start_date
+                and s.date < p_end_date + 1),
+            '[]'::jsonb
+        ),
+        'water', coalesce(
+            (select jsonb_agg(
+                        jsonb_build_object('date', w.date, 'glasses_consumed', w.glasses_consumed)
+                        order by w.date)
+               from daily_water w
+              where w.user_id = p_user_id
+                and w.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        ),
+        'steps', coalesce(
+            (select jsonb_agg(
+                        jsonb_build_object('date', st.date, 'steps', st.steps)
+                        order by st.date)
+               from daily_steps st
+              where st.user_id = p_user_id
+                and st.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        ),
+        'weight', coalesce(
+            (select jsonb_agg(
+                        jsonb_build_object('date', wt.date, 'weight', wt.weight)
+                        order by wt.date, wt.created_at)
+               from weight_entries wt
+              where wt.user_id = p_user_id
+                and wt.date between p_start_date and p_end_date),
+            '[]'::jsonb
+        ),
+        'supplements', coalesce(
+            (select jsonb_agg(sd order by sd.date)
+               from (select sl.date,
+                            count(*) as logged,
+                            coalesce(jsonb_agg(sl.supplement_name order by sl.supplement_name)
+                                         filter (where sl.taken), '[]'::jsonb) as taken
+                       from supplement_logs sl
+                      where sl.user_id = p_user_id
+                        and sl.date between p_start_date and p_end_date
+                      group by sl.date) sd),
+            '[]'::jsonb
+        )
+    );
+$$;
+
+drop trigger if exists supplement_logs_weekly_context on supplement_logs;
+create trigger supplement_logs_weekly_context
+    after insert or update or delete on supplement_logs
+    for each row execute function invalidate_weekly_context('date');
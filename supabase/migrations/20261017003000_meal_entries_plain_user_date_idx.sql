@@ -0,0 +1,15 @@
+-- meal_entries_user_date_idx (20261017000700) carried most of the row in its
+-- INCLUDE list, nutrition_data jsonb among them, yet no read is index-only:
+-- get_user_meals_by_date also selects id and quantity, and the other meal
+-- reads select *. It only made every meal insert copy the row into the
+-- index, and a large nutrition_data could exceed the btree row size limit
+-- and fail the insert. Rebuild it as the plain (user_id, meal_date) index
+-- the range reads actually use.
+--
+-- Plain DROP/CREATE INDEX because migrations run inside a transaction; on a
+-- large production table build meal_entries_user_date_plain_idx by hand with
+-- CONCURRENTLY first and drop the wide index CONCURRENTLY - the IF [NOT]
+-- EXISTS clauses make this file a no-op afterwards.
+create index if not exists meal_entries_user_date_plain_idx
+    on meal_entries (user_id, meal_date desc);
+drop index if exists meal_entries_user_date_idx;
@@ -1,27 +1,50 @@
 # utils/keep_alive.py
 import asyncio
+import logging
 import aiohttp
 import os
-from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PING_INTERVAL = 600  # seconds
+
+_keep_alive_task = None
 
 async def ping_self():
     """Ping the service every 10 minutes to keep it awake"""
     url = os.getenv("RENDER_EXTERNAL_URL", "https://health-ai-backend-i28b.onrender.com")
+    loop = asyncio.get_running_loop()
     
-    while True:
-        try:
-            async with aiohttp.ClientSession() as session:
+    # One session for the life of the task so pings reuse the pooled keep-alive connection
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+        next_ping = loop.time()
+        while True:
+            try:
                 async with session.get(f"{url}/health") as response:
                     if response.status == 200:
-                        print(f"✅ Keep-alive ping successful at {datetime.now()}")
+                        logger.debug("Keep-alive ping successful")
                     else:
-                        print(f"⚠️ Keep-alive ping failed: {response.status}")
-        except Exception as e:
-            print(f"❌ Keep-alive ping error: {e}")
-        
-        # Wait 10 minutes (600 seconds)
-        await asyncio.sleep(600)
+                        logger.warning("Keep-alive ping failed: %s", response.status)
+            except Exception as e:
+                logger.warning("Keep-alive ping error: %s", e)
+            
+            # Fixed cadence on the monotonic clock - time spent pinging doesn't push the schedule back
+            next_ping += PING_INTERVAL
+            await asyncio.sleep(max(0, next_ping - loop.time()))
 
 def start_keep_alive():
     """Start the keep-alive task"""
-    asyncio.create_task(ping_self())
\ No newline at end of file
+    global _keep_alive_task
+    if _keep_alive_task is None or _keep_alive_task.done():
+        _keep_alive_task = asyncio.create_task(ping_self())
+
+async def stop_keep_alive():
+    """Cancel the keep-alive task, closing its HTTP session"""
+    global _keep_alive_task
+    if _keep_alive_task is not None:
+        _keep_alive_task.cancel()
+        try:
+            await _keep_alive_task
+        except asyncio.CancelledError:
+            pass
+        _keep_alive_task = None
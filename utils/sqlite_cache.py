@@ -0,0 +1,79 @@
+# utils/sqlite_cache.py
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteCache:
+    """
+    Small persistent key/value cache for JSON payloads that should survive restarts.
+    sqlite3 is blocking, so the async methods run it in a worker thread.
+    Any sqlite error is treated as a miss - this cache must never break a request.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, payload BLOB NOT NULL, expires_at INTEGER)"
+            )
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (int(time.time()),))
+            self._conn = conn
+        except sqlite3.Error as e:
+            logger.warning("Disk cache at %s unavailable: %s", path, e)
+
+    def _get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return orjson.loads(row[0])
+
+    def _set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        expires_at = int(time.time() + ttl) if ttl is not None else None
+        payload = orjson.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, payload, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at)
+            )
+
+    async def get(self, key: str) -> Any:
+        """Cached value for key, or None if missing/expired"""
+        if self._conn is None:
+            return None
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except (sqlite3.Error, orjson.JSONDecodeError) as e:
+            logger.warning("Disk cache read failed: %s", e)
+            return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value for ttl seconds (None = never expires)"""
+        if self._conn is None:
+            return
+        try:
+            await asyncio.to_thread(self._set, key, value, ttl)
+        except (sqlite3.Error, orjson.JSONEncodeError) as e:
+            logger.warning("Disk cache write failed: %s", e)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
@@ -1,5 +1,9 @@
 # api/utils/timezone_utils.py
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
+from functools import lru_cache
+import re
+import sys
+import time
 from typing import Optional, Union, Dict, Any
 from fastapi import Header
 
@@ -10,23 +14,61 @@ def parse_timezone_offset(offset_str: Optional[str]) -> int:
     """
     if not offset_str:
         return 0
-    
-    try:
-        # If it's already in minutes
-        if offset_str.lstrip('-').isdigit():
+    return _parse_timezone_offset_cached(offset_str)
+
+# "+05:00" / "-08:00" / "05:30" (anything after the minutes, like ":00" seconds, is ignored)
+_OFFSET_RE = re.compile(r'([+-]?)(\d+):(\d+)')
+
+# Runs on every request via get_timezone_offset, and clients send the same few header values.
+# Bounded, since the header is client-controlled.
+@lru_cache(maxsize=4096)
+def _parse_timezone_offset_cached(offset_str: str) -> int:
+    # Most clients send plain minutes ("300", "-480"); colon forms skip the raising int() attempt
+    if ':' not in offset_str:
+        try:
             return int(offset_str)
-        
-        # If it's in format "+05:00" or "-08:00"
-        if ':' in offset_str:
-            sign = -1 if offset_str.startswith('-') else 1
-            parts = offset_str.lstrip('+-').split(':')
-            hours = int(parts[0])
-            minutes = int(parts[1]) if len(parts) > 1 else 0
-            return sign * (hours * 60 + minutes)
-    except:
-        pass
+        except ValueError:
+            return 0
+    match = _OFFSET_RE.match(offset_str)
+    if match is None:
+        return 0
+    sign, hours, extra_minutes = match.groups()
+    # "+05:00" / "-08:00"
+    return (-1 if sign == '-' else 1) * (int(hours) * 60 + int(extra_minutes))
+
+# Only a few dozen offsets occur in practice, so the deltas are built once each
+@lru_cache(maxsize=4096)
+def _offset_delta(offset_minutes: int) -> timedelta:
+    return timedelta(minutes=offset_minutes)
+
+def _parse_date(date_str: str) -> date:
+    """YYYY-MM-DD via the C fromisoformat; strptime only for unpadded forms like 2024-1-2"""
+    try:
+        return date.fromisoformat(date_str)
+    except ValueError:
+        return datetime.strptime(date_str, '%Y-%m-%d').date()
+
+if sys.version_info >= (3, 11):
+    # fromisoformat accepts a trailing Z itself from 3.11
+    _parse_datetime = datetime.fromisoformat
+else:
+    def _parse_datetime(datetime_str: str) -> datetime:
+        """ISO datetime, accepting a trailing Z for UTC"""
+        if datetime_str.endswith('Z'):
+            datetime_str = datetime_str[:-1] + '+00:00'
+        return datetime.fromisoformat(datetime_str)
+
+def _parse_date_str(date_str: str, timezone_offset: int) -> date:
+    """A YYYY-MM-DD string as-is, or an ISO datetime shifted into the user's timezone"""
+    # If it's just a date (YYYY-MM-DD), use it directly
+    if 'T' not in date_str:
+        return _parse_date(date_str)
     
-    return 0
+    # If it's a datetime, parse and apply timezone
+    dt = _parse_datetime(date_str)
+    if timezone_offset:
+        dt = dt + _offset_delta(timezone_offset)
+    return dt.date()
 
 def get_user_date(
     date_input: Optional[Union[str, Dict[str, Any]]] = None,
@@ -42,52 +84,52 @@ def get_user_date(
             - Dict: {"date": "YYYY-MM-DD", "timezone_offset": 300}
         timezone_offset: Timezone offset in minutes from UTC
     """
+    # Strings are what the API routes pass - check them first
+    if isinstance(date_input, str):
+        return _parse_date_str(date_input, timezone_offset)
+    
     if date_input is None:
-        # Get current time in user's timezone
-        utc_now = datetime.utcnow()
-        user_now = utc_now + timedelta(minutes=timezone_offset)
-        return user_now.date()
+        # Today in user's timezone
+        return get_user_today(timezone_offset)
     
     if isinstance(date_input, dict):
         # Extract date and optional timezone offset
-        date_str = date_input.get('date', '')
+        date_str = date_input.get('date')
         tz_offset = date_input.get('timezone_offset', timezone_offset)
         
-        if date_str:
-            # If it's just a date (YYYY-MM-DD), use it directly
-            if 'T' not in date_str:
-                return datetime.strptime(date_str, '%Y-%m-%d').date()
-            
-            # If it's a datetime, parse and apply timezone
-            dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            if tz_offset:
-                dt = dt + timedelta(minutes=tz_offset)
-            return dt.date()
-    
-    if isinstance(date_input, str):
-        # Simple date string (YYYY-MM-DD)
-        if 'T' not in date_input:
-            return datetime.strptime(date_input, '%Y-%m-%d').date()
-        
-        # ISO datetime string
-        dt = datetime.fromisoformat(date_input.replace('Z', '+00:00'))
-        if timezone_offset:
-            dt = dt + timedelta(minutes=timezone_offset)
-        return dt.date()
+        # No date given - today in the user's timezone, not UTC
+        if not date_str:
+            return get_user_today(tz_offset)
+        return _parse_date_str(date_str, tz_offset)
     
     # Fallback to UTC today
-    return datetime.utcnow().date()
+    return datetime.now(timezone.utc).date()
+
+@lru_cache(maxsize=4096)
+def _fixed_tz(offset_minutes: int) -> Optional[timezone]:
+    """Cached fixed-offset tzinfo, or None for offsets timezone() rejects (24h or more)"""
+    try:
+        return timezone(_offset_delta(offset_minutes))
+    except ValueError:
+        return None
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
 
 def get_user_now(timezone_offset: int = 0) -> datetime:
-    """Get current datetime in user's timezone."""
-    utc_now = datetime.utcnow()
-    return utc_now + timedelta(minutes=timezone_offset)
+    """Get current datetime in user's timezone (naive)."""
+    # UTC is the default for server-side callers - skip the offset lookup
+    tz = _fixed_tz(timezone_offset) if timezone_offset else timezone.utc
+    if tz is None:
+        return datetime.now(timezone.utc).replace(tzinfo=None) + _offset_delta(timezone_offset)
+    return datetime.now(tz).replace(tzinfo=None)
 
 def get_user_today(timezone_offset: int = 0) -> date:
     """Get today's date in user's timezone."""
-    return get_user_now(timezone_offset).date()
+    # Whole days since the epoch in the user's timezone - no datetime needed just for the date
+    return date.fromordinal(_EPOCH_ORDINAL + int((time.time() + timezone_offset * 60) // 86400))
 
 # FastAPI dependency to extract timezone from headers
+# Deliberately async: FastAPI runs sync dependencies through the threadpool
 async def get_timezone_offset(
     x_timezone_offset: Optional[str] = Header(None),
     x_timezone_string: Optional[str] = Header(None)
@@ -96,13 +138,5 @@ async def get_timezone_offset(
     Extract timezone offset from request headers.
     Returns offset in minutes from UTC.
     """
-    # Try the direct offset first
-    if x_timezone_offset:
-        return parse_timezone_offset(x_timezone_offset)
-    
-    # Try parsing the string format
-    if x_timezone_string:
-        return parse_timezone_offset(x_timezone_string)
-    
-    # Default to UTC
-    return 0
\ No newline at end of file
+    # The direct offset wins over the string format; neither header means UTC
+    return parse_timezone_offset(x_timezone_offset or x_timezone_string)
\ No newline at end of file
@@ -0,0 +1,102 @@
+# utils/ttl_cache.py
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from cachetools import TTLCache
+
+
+class AsyncTTLCache:
+    """
+    In-process TTL + LRU cache for async loaders.
+    Concurrent misses for the same key share one load (no stampede).
+    None results are not cached so a missing row is re-checked next time.
+    """
+
+    __slots__ = ('_cache', '_inflight', 'hits', 'misses', 'coalesced')
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        # Callers that joined another caller's in-flight load instead of starting their own
+        self.coalesced = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, calling loader() on a miss"""
+        value = self._cache.get(key)
+        if value is not None:
+            self.hits += 1
+            # Callers mutate the dicts they get back - hand out copies
+            return copy.deepcopy(value)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(pending))
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if value is not None and self._inflight.get(key) is future:
+                self._cache[key] = value
+            return copy.deepcopy(value)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def get(self, key: Hashable) -> Any:
+        """Cached value for key (a copy), or None - for callers that batch-load their own misses"""
+        value = self._cache.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value fetched some other way (e.g. as part of a combined query)"""
+        if value is not None:
+            # The caller keeps using its value - store a copy so later changes don't leak in
+            self._cache[key] = copy.deepcopy(value)
+
+    def pop(self, key: Hashable) -> None:
+        """Drop key, including any load in flight, so the next read hits the database"""
+        self._cache.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def pop_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every key matching predicate (O(size) - for rare invalidations)"""
+        for key in [key for key in self._cache if predicate(key)]:
+            self._cache.pop(key, None)
+        for key in [key for key in self._inflight if predicate(key)]:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._inflight.clear()
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Hit/miss counters for observability"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'inflight': len(self._inflight),
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'size': len(self._cache),
+            'maxsize': self._cache.maxsize,
+            'ttl': self._cache.ttl
+        }